@@ -0,0 +1,953 @@
+#!/usr/bin/env python3
+"""
+Batch Scheduling Modes for Image Resizer & Compressor
+=====================================================
+Runs a batch of images through ImageProcessor in one of four modes:
+
+- scheduled: largest first on a process pool, with memory-aware admission
+- pipeline: staged read / process / write threads under a byte budget
+- shape_batches: OpenCV on threads, planned once per group of same-size images
+- shared_memory: decode in this process, resize and encode in worker
+  processes, passing frames through shared memory slots
+
+Every mode yields one result record per image, in a deterministic order,
+and fills a stats dict with its decisions for the run metrics.
+
+Author: Hacktoberfest 2025 Contributor
+"""
+
+import os
+import math
+import time
+import queue
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from image_resizer_compressor import ImageProcessor, get_backend, process_bytes
+
+
+class _ByteBudget:
+    """Limit on bytes in flight, shared by the stages of a pipeline."""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self.items = 0
+        # Decisions, reported in the run metrics
+        self.deferred = 0
+        self.oversized = 0
+        self.peak_used = 0
+        self.peak_items = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, amount: int):
+        """Block until amount bytes fit in the budget."""
+        with self._condition:
+            # An item larger than the whole budget is admitted once nothing else is in flight
+            if self.used and self.used + amount > self.limit:
+                self.deferred += 1
+            while self.used and self.used + amount > self.limit:
+                self._condition.wait()
+            if amount > self.limit:
+                self.oversized += 1
+            self.used += amount
+            self.items += 1
+            self.peak_used = max(self.peak_used, self.used)
+            self.peak_items = max(self.peak_items, self.items)
+    
+    def release(self, amount: int):
+        """Return amount bytes to the budget."""
+        with self._condition:
+            self.used -= amount
+            self.items -= 1
+            self._condition.notify_all()
+
+
+class _FrameRing:
+    """
+    Fixed-size slots in one shared memory block, for handing decoded frames
+    to worker processes without pickling their pixels.
+    
+    The parent process creates the ring, hands out free slots and is the only
+    process that unlinks the block. Workers attach to it by name once, in the
+    pool initializer (attach_worker()). The block is registered with
+    multiprocessing's resource tracker, so it is removed even if the parent
+    is killed. If a worker dies, the process pool fails every pending image
+    and their slots are given back.
+    """
+    
+    # Worker side: the block attached by attach_worker()
+    worker_memory = None
+    
+    def __init__(self, slots: int, slot_bytes: int):
+        from multiprocessing import shared_memory
+        
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.memory = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self.name = self.memory.name
+        # Times a frame had to wait for a free slot
+        self.deferred = 0
+        self._free = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+    
+    @staticmethod
+    def fit(limit: int, slots: int) -> int:
+        """
+        Get the slot size for a ring of `slots` slots using at most limit bytes.
+        
+        On Linux, the block lives in /dev/shm, where writing past the free
+        space kills the process with SIGBUS instead of raising, so the ring
+        is also kept to half of the space free there.
+        """
+        if os.path.isdir("/dev/shm"):
+            stat = os.statvfs("/dev/shm")
+            limit = min(limit, stat.f_bavail * stat.f_frsize // 2)
+        return max(limit // slots, 0)
+    
+    def acquire(self) -> int:
+        """Block until a slot is free and take it."""
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            self.deferred += 1
+            return self._free.get()
+    
+    def release(self, slot: int):
+        """Give a slot back once the worker using it is done."""
+        self._free.put(slot)
+    
+    @staticmethod
+    def view(memory, slot: int, slot_bytes: int, shape: Tuple[int, ...], dtype: str):
+        """Get a NumPy array over one slot of a block (no copy)."""
+        import numpy as np
+        
+        return np.ndarray(shape, dtype=dtype, buffer=memory.buf, offset=slot * slot_bytes)
+    
+    def put(self, slot: int, frame) -> Dict:
+        """Copy a frame into a slot; returns the metadata a worker needs to read it back."""
+        self.view(self.memory, slot, self.slot_bytes, frame.shape, frame.dtype.str)[...] = frame
+        return {"slot": slot, "slot_bytes": self.slot_bytes, "shape": frame.shape, "dtype": frame.dtype.str}
+    
+    @classmethod
+    def attach_worker(cls, name: str):
+        """Pool initializer: attach this worker process to the parent's block."""
+        from multiprocessing import shared_memory
+        
+        cls.worker_memory = shared_memory.SharedMemory(name=name)
+    
+    @classmethod
+    def worker_view(cls, frame: Dict):
+        """Get the array of a frame put() by the parent, in a worker process."""
+        return cls.view(cls.worker_memory, frame["slot"], frame["slot_bytes"], frame["shape"], frame["dtype"])
+    
+    def close(self):
+        """Unmap and remove the block."""
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _render_shared_frame(
+    processor: ImageProcessor,
+    frame: Dict,
+    result: Dict,
+    settings: Dict,
+    keep_encoded: bool = False
+) -> Dict:
+    """
+    Resize, encode and write a frame that BatchScheduler.iter_shared_frames()
+    decoded into shared memory. Runs in a pool worker, so it must not print.
+    
+    Args:
+        processor: ImageProcessor the batch runs for
+        frame: Slot metadata from _FrameRing.put(), plus the image's
+            "original_size" and "new_size"
+        result: Result record started by the parent (read, hash and
+            decode timings)
+        settings: Processing settings (see ImageProcessor.effective_settings())
+        keep_encoded: Return the encoded bytes in result["encoded"]
+            instead of writing the output file
+    
+    Returns:
+        The completed result record
+    """
+    backend = get_backend(result["method"])
+    output_path = Path(result["output"])
+    timings = result["timings"]
+    try:
+        resize_started = time.perf_counter()
+        # The view must not outlive this call: the slot is reused as soon as it returns
+        pixels = _FrameRing.worker_view(frame)
+        resized = backend.resize_frame(pixels, frame["new_size"])
+        del pixels
+        timings["resize"] = time.perf_counter() - resize_started
+        
+        encode_started = time.perf_counter()
+        encoded, result["quality"], result["trials"] = processor.encode_image(
+            backend, resized, output_path.suffix, settings.get("quality", 85),
+            settings.get("target_kb"), settings.get("min_ssim"), processor.encoder_options(settings)
+        )
+        timings["encode"] = time.perf_counter() - encode_started
+        
+        result["original_size"] = frame["original_size"]
+        result["new_size"] = frame["new_size"]
+        result["target_kb"] = settings.get("target_kb")
+        result["bytes_out"] = len(encoded)
+        write_started = time.perf_counter()
+        processor.write_output(result, output_path, encoded, result["bytes_in"], keep_encoded)
+        timings["write"] = time.perf_counter() - write_started
+        result["success"] = True
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+class BatchScheduler:
+    """Process a batch of images for an ImageProcessor in one of the scheduling modes."""
+    
+    MODES = ("scheduled", "pipeline", "shape_batches", "shared_memory")
+    
+    def __init__(
+        self,
+        processor: ImageProcessor,
+        settings: Dict,
+        workers: int = 1,
+        max_inflight_mb: float = 512,
+        max_memory_mb: Optional[float] = None,
+        hash_source: bool = False,
+        keep_encoded: bool = False,
+        stats: Optional[Dict] = None,
+        source_hashes: Optional[Dict[Path, Tuple[int, int, str]]] = None
+    ):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            processor: ImageProcessor whose output_dir receives the outputs
+            settings: Processing settings (see ImageProcessor.effective_settings())
+            workers: Number of workers (0 = one per CPU); processes or
+                threads, depending on the mode
+            max_inflight_mb: Memory budget for images in flight
+            max_memory_mb: Memory cap per image for decoding and resizing
+                (see ImageBackend.render()); None means no cap
+            hash_source: Also record the source size, mtime and content hash
+                (used by the processing manifest)
+            keep_encoded: Hand encoded bytes back in result["encoded"]
+                instead of writing output files
+            stats: Dict to fill with the scheduler's decisions (see
+                RunMetrics.scheduler)
+            source_hashes: Content hashes already computed for some images,
+                from ImageProcessor.find_duplicates(); reused while a file's
+                size and mtime still match
+        """
+        self.processor = processor
+        self.settings = settings
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_inflight_mb = max_inflight_mb
+        self.max_memory_mb = max_memory_mb
+        self.hash_source = hash_source
+        self.keep_encoded = keep_encoded
+        self.stats = stats if stats is not None else {}
+        self.source_hashes = source_hashes or {}
+    
+    def run(self, mode: str, image_files: List[Path]) -> Iterator[Dict]:
+        """
+        Process images in one of MODES.
+        
+        "scheduled" and "pipeline" start the largest images first (see
+        schedule()); the other modes go through the images in input order.
+        Either way, results are yielded in the order of image_files.
+        
+        Returns:
+            Iterator of result records (see the mode's iter_*() method)
+        
+        Raises:
+            ValueError: If mode is not one of MODES
+        """
+        if mode == "scheduled":
+            self.stats["order"] = "largest first"
+            return self.iter_scheduled(self.schedule(image_files))
+        if mode == "pipeline":
+            self.stats["order"] = "largest first"
+            jobs = self.schedule(image_files)
+            return self._in_input_order(jobs, self.iter_pipeline([job["path"] for job in jobs]))
+        if mode == "shape_batches":
+            return self.iter_shape_batches(image_files)
+        if mode == "shared_memory":
+            return self.iter_shared_frames(image_files)
+        raise ValueError(f"Unknown batch mode '{mode}' (use {', '.join(self.MODES)})")
+    
+    @staticmethod
+    def _in_input_order(jobs: List[Dict], results: Iterator[Dict]) -> Iterator[Dict]:
+        """Re-order results yielded in job order (largest first) to the input order of the jobs."""
+        completed = {}
+        next_index = 0
+        try:
+            for job, result in zip(jobs, results):
+                completed[job["index"]] = result
+                while next_index in completed:
+                    yield completed.pop(next_index)
+                    next_index += 1
+        finally:
+            results.close()
+    
+    def _output_path(self, image_path: Path) -> Path:
+        return self.processor.output_dir / self.processor.output_name(image_path, self.settings.get("output_format"))
+    
+    def _hash(self, result: Dict, image_path: Path, data: bytes):
+        """Record the content hash of a source read into memory, reusing an earlier one if valid."""
+        hash_started = time.perf_counter()
+        known = self.processor.known_hash(self.source_hashes.get(image_path), result["source_stat"])
+        result["source_hash"] = known or hashlib.sha256(data).hexdigest()
+        if not known:
+            result["timings"]["hash"] = time.perf_counter() - hash_started
+    
+    def _new_result(self, image_path: Path) -> Dict:
+        result = self.processor.new_result(image_path, self._output_path(image_path))
+        result["method"] = self.settings.get("method", "pillow")
+        return result
+    
+    def schedule(self, image_files: List[Path]) -> List[Dict]:
+        """
+        Order images largest first by pixel count, read from their headers.
+        
+        Starting the biggest images first keeps one huge image from running
+        alone at the end of a parallel batch. Each job also carries its
+        admission cost, the decoded size (width x height x channels), capped
+        at max_memory_mb when set. Images whose header cannot be read cost
+        nothing and go last; processing them reports the error.
+        
+        Returns:
+            Job dicts (path, index in image_files, pixels, cost, position),
+            largest first
+        """
+        jobs = []
+        for index, image_path in enumerate(image_files):
+            job = {"path": image_path, "index": index, "pixels": 0, "cost": 0}
+            try:
+                with self.processor.open_image(image_path, lift_pixel_limit=True) as img:
+                    job["pixels"] = img.width * img.height
+                    job["cost"] = job["pixels"] * len(img.getbands())
+            except Exception:
+                pass
+            if self.max_memory_mb:
+                job["cost"] = min(job["cost"], int(self.max_memory_mb * 1024 * 1024))
+            jobs.append(job)
+        jobs.sort(key=lambda job: job["pixels"], reverse=True)
+        for position, job in enumerate(jobs):
+            job["position"] = position
+        return jobs
+    
+    def iter_scheduled(self, jobs: List[Dict]) -> Iterator[Dict]:
+        """
+        Process scheduled jobs on a process pool, yielding results in input order.
+        
+        Jobs are started in order while a worker is free and their decoded
+        size fits in max_inflight_mb together with the images already
+        running. When the next job does not fit, it waits (no smaller job
+        overtakes it) until enough running images finish; a job larger than
+        the whole budget runs once nothing else is in flight. Finished
+        results are held back until every image before them in the input
+        has been yielded, so output does not depend on timing. If a worker
+        process dies, the images running in the pool fail, and the rest of
+        the batch goes on in a new pool.
+        
+        Args:
+            jobs: Jobs from schedule()
+        
+        Yields:
+            Result records, in input order (each job's "index"), each with a
+            "schedule" entry (queue position, estimated decoded MB, time
+            waited for memory)
+        """
+        workers = max(1, min(self.workers, len(jobs)))
+        budget = int(self.max_inflight_mb * 1024 * 1024)
+        stats = self.stats
+        stats.setdefault("order", "input order")
+        stats.update({
+            "budget_mb": self.max_inflight_mb,
+            "workers": workers,
+            "deferred": 0,
+            "oversized": 0,
+            "peak_inflight_mb": 0.0,
+            "peak_concurrency": 0,
+            "pool_restarts": 0,
+        })
+        options = {
+            "hash_source": self.hash_source,
+            "max_memory_mb": self.max_memory_mb,
+            "keep_encoded": self.keep_encoded,
+        }
+        
+        def finish(job, result):
+            result["schedule"] = {
+                "position": job["position"],
+                "est_decoded_mb": round(job["cost"] / (1024 * 1024), 2),
+                "memory_wait_ms": round(job.get("waited", 0.0) * 1000, 3),
+            }
+            return result
+        
+        if workers == 1:
+            # Start order makes no difference to a single worker
+            for job in sorted(jobs, key=lambda job: job["index"]):
+                stats["peak_inflight_mb"] = max(stats["peak_inflight_mb"], round(job["cost"] / (1024 * 1024), 2))
+                stats["peak_concurrency"] = 1
+                yield finish(job, self.processor.process_image(
+                    job["path"], self.settings, source_hash=self.source_hashes.get(job["path"]), **options
+                ))
+            return
+        
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        from concurrent.futures.process import BrokenProcessPool
+        
+        def collect(future):
+            job = running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # A worker died (BrokenProcessPool) or the result could not be sent back
+                result = self.processor.failed_result(
+                    job["path"], self._output_path(job["path"]), self.settings.get("method", "pillow"), e
+                )
+            completed[job["index"]] = finish(job, result)
+            return job["cost"]
+        
+        running = {}
+        used = 0
+        next_job = 0
+        # Re-order completed images so output stays deterministic
+        completed = {}
+        next_index = 0
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while next_job < len(jobs) or running:
+                broken = False
+                while next_job < len(jobs) and len(running) < workers:
+                    job = jobs[next_job]
+                    if running and used + job["cost"] > budget:
+                        if "deferred_at" not in job:
+                            job["deferred_at"] = time.perf_counter()
+                            stats["deferred"] += 1
+                        break
+                    if job["cost"] > budget:
+                        stats["oversized"] += 1
+                    try:
+                        future = pool.submit(
+                            self.processor.process_image, job["path"], self.settings,
+                            source_hash=self.source_hashes.get(job["path"]), **options
+                        )
+                    except BrokenProcessPool:
+                        # Replaced below; the job is submitted again to the new pool
+                        broken = True
+                        break
+                    if "deferred_at" in job:
+                        job["waited"] = time.perf_counter() - job["deferred_at"]
+                    running[future] = job
+                    used += job["cost"]
+                    next_job += 1
+                    stats["peak_inflight_mb"] = max(stats["peak_inflight_mb"], round(used / (1024 * 1024), 2))
+                    stats["peak_concurrency"] = max(stats["peak_concurrency"], len(running))
+                
+                done = wait(running, return_when=FIRST_COMPLETED).done if running else set()
+                broken = broken or any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+                if broken:
+                    # Every image in a broken pool fails; collect them all before replacing it
+                    done = wait(running).done
+                for future in done:
+                    used -= collect(future)
+                if broken:
+                    print("⚠ A worker process died; starting a new pool")
+                    stats["pool_restarts"] += 1
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                while next_index in completed:
+                    yield completed.pop(next_index)
+                    next_index += 1
+        finally:
+            pool.shutdown()
+    
+    def iter_pipeline(self, image_files: List[Path]) -> Iterator[Dict]:
+        """
+        Process images in a staged pipeline, yielding results in input order.
+        
+        A reader thread prefetches file bytes, `workers` threads decode,
+        resize and encode from memory (Pillow and OpenCV release the GIL for
+        this work) and a writer thread flushes encoded buffers to disk. The
+        queues between stages are bounded, and the reader waits while the
+        bytes in flight (file data plus the decoded size estimated from the
+        header) would exceed max_inflight_mb. An image larger than the
+        budget is still processed, but only once nothing else is in flight.
+        
+        Args:
+            image_files: Images to process
+        
+        Yields:
+            Result records, in the same order as image_files
+        """
+        workers = self.workers
+        settings = self.settings
+        hash_source = self.hash_source
+        budget = _ByteBudget(int(self.max_inflight_mb * 1024 * 1024))
+        read_queue = queue.Queue(maxsize=workers * 2)
+        write_queue = queue.Queue(maxsize=workers * 2)
+        done_queue = queue.Queue()
+        stop = threading.Event()
+        
+        def read_stage():
+            try:
+                for index, image_path in enumerate(image_files):
+                    if stop.is_set():
+                        break
+                    item = {
+                        "index": index,
+                        "result": self._new_result(image_path),
+                        "data": None,
+                        "encoded": None,
+                        "cost": 0,
+                        "started": None,
+                    }
+                    try:
+                        stat = image_path.stat()
+                        decoded = self.processor.estimate_decoded_bytes(image_path)
+                        if self.max_memory_mb:
+                            decoded = min(decoded, int(self.max_memory_mb * 1024 * 1024))
+                        item["cost"] = stat.st_size + decoded
+                        budget.acquire(item["cost"])
+                        # Latency is measured from here, so it includes time queued between stages
+                        item["started"] = time.perf_counter()
+                        item["data"] = image_path.read_bytes()
+                        item["result"]["timings"]["read"] = time.perf_counter() - item["started"]
+                        item["result"]["source_stat"] = (stat.st_size, stat.st_mtime_ns)
+                    except Exception as e:
+                        item["result"]["error"] = str(e)
+                    read_queue.put(item)
+            finally:
+                for _ in range(workers):
+                    read_queue.put(None)
+        
+        def process_stage():
+            while (item := read_queue.get()) is not None:
+                result = item["result"]
+                if item["data"] is not None:
+                    try:
+                        if hash_source:
+                            self._hash(result, image_files[item["index"]], item["data"])
+                        config = {**settings, "format": Path(result["output"]).suffix, "max_memory_mb": self.max_memory_mb}
+                        item["encoded"], metadata = process_bytes(item["data"], config, name=result["source"])
+                        self.processor.apply_metadata(result, metadata)
+                    except Exception as e:
+                        result["error"] = str(e)
+                write_queue.put(item)
+            write_queue.put(None)
+        
+        def write_stage():
+            finished = 0
+            while finished < workers:
+                item = write_queue.get()
+                if item is None:
+                    finished += 1
+                    continue
+                result = item["result"]
+                try:
+                    if item["encoded"] is not None:
+                        write_started = time.perf_counter()
+                        self.processor.write_output(
+                            result, Path(result["output"]), item["encoded"], len(item["data"]), self.keep_encoded
+                        )
+                        result["timings"]["write"] = time.perf_counter() - write_started
+                        result["success"] = True
+                except Exception as e:
+                    result["error"] = str(e)
+                finally:
+                    budget.release(item["cost"])
+                if item["started"] is not None:
+                    result["timings"]["total"] = time.perf_counter() - item["started"]
+                if not hash_source:
+                    result.pop("source_stat", None)
+                done_queue.put((item["index"], result))
+            done_queue.put(None)
+        
+        threads = [threading.Thread(target=read_stage, daemon=True)]
+        threads += [threading.Thread(target=process_stage, daemon=True) for _ in range(workers)]
+        threads.append(threading.Thread(target=write_stage, daemon=True))
+        for thread in threads:
+            thread.start()
+        
+        # Re-order completed images so output stays deterministic
+        completed = {}
+        next_index = 0
+        try:
+            while (entry := done_queue.get()) is not None:
+                completed[entry[0]] = entry[1]
+                while next_index in completed:
+                    yield completed.pop(next_index)
+                    next_index += 1
+        finally:
+            # Stop reading new images; in-flight ones drain through the stages
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.stats.setdefault("order", "input order")
+            self.stats.update({
+                "budget_mb": self.max_inflight_mb,
+                "workers": workers,
+                "deferred": budget.deferred,
+                "oversized": budget.oversized,
+                "peak_inflight_mb": round(budget.peak_used / (1024 * 1024), 2),
+                "peak_concurrency": budget.peak_items,
+            })
+    
+    def shape_groups(self, image_files: List[Path]) -> Dict[Optional[Tuple[str, int, int]], List[int]]:
+        """
+        Group images by format and dimensions, read from their headers only.
+        
+        Returns:
+            Mapping of (Pillow format name, width, height) to indices into
+            image_files, in input order; images whose header cannot be read
+            are under None
+        """
+        groups: Dict[Optional[Tuple[str, int, int]], List[int]] = {}
+        for index, image_path in enumerate(image_files):
+            try:
+                with self.processor.open_image(image_path, lift_pixel_limit=True) as img:
+                    key = (img.format, img.width, img.height)
+            except Exception:
+                key = None
+            groups.setdefault(key, []).append(index)
+        return groups
+    
+    def iter_shape_batches(self, image_files: List[Path]) -> Iterator[Dict]:
+        """
+        Process images with OpenCV in batches of the same format and size.
+        
+        Camera dumps are mostly frames of a single resolution, so the decode
+        flags and output size are worked out once per group (see
+        shape_groups()) instead of from every image's header, and each group
+        gets `workers` preallocated output buffers that cv2.resize(dst=...)
+        reuses from frame to frame instead of allocating one per image.
+        Frames are read, decoded, resized and encoded on `workers` threads
+        (OpenCV releases the GIL for all of it), with at most twice that
+        many images and max_inflight_mb of decoded data in flight. Frames
+        that do not decode to their group's shape (EXIF rotation, bad data)
+        and images with unreadable headers go through render_file() instead.
+        Groups run one after another, but finished results are held back
+        and yielded in input order. The method is always "opencv".
+        
+        Args:
+            image_files: Images to process
+        
+        Yields:
+            Result records, in input order
+        """
+        import cv2
+        import numpy as np
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+        
+        workers = self.workers
+        processor = self.processor
+        hash_source = self.hash_source
+        settings = {**self.settings, "method": "opencv"}
+        backend = get_backend("opencv")
+        encoder = processor.encoder_options(settings)
+        budget = _ByteBudget(int(self.max_inflight_mb * 1024 * 1024))
+        
+        def plan_group(key: Optional[Tuple[str, int, int]], count: int) -> Optional[Dict]:
+            """Decode flags, decoded shape and output buffers of a group (None: no fast path)."""
+            if key is None:
+                return None
+            image_format, width, height = key
+            new_size = processor.calculate_dimensions(
+                (width, height), settings.get("width"), settings.get("height"), settings.get("scale_percent")
+            )
+            flags, factor = backend.decode_flags(image_format, (width, height), new_size)
+            decoded = (-(-height // factor), -(-width // factor), 3)
+            max_memory_mb = self.max_memory_mb
+            if max_memory_mb and (decoded[0] * decoded[1] + new_size[0] * new_size[1]) * 3 > max_memory_mb * 1024 * 1024:
+                # render_file() reports ImageTooLargeError for each image
+                return None
+            slots = queue.Queue()
+            for slot in range(min(workers, count)):
+                slots.put(slot)
+            return {
+                "size": (width, height),
+                "new_size": new_size,
+                "flags": flags,
+                "decoded": decoded,
+                "buffers": np.empty((min(workers, count), new_size[1], new_size[0], 3), dtype=np.uint8),
+                "slots": slots,
+            }
+        
+        def render_frame(image_path: Path, group: Optional[Dict]) -> Dict:
+            output_path = self._output_path(image_path)
+            if group is None:
+                return processor.render_file(
+                    image_path, output_path, settings, hash_source, self.max_memory_mb, self.keep_encoded,
+                    self.source_hashes.get(image_path)
+                )
+            result = processor.new_result(image_path, output_path)
+            result["method"] = "opencv"
+            timings = result["timings"]
+            started = time.perf_counter()
+            try:
+                stat = image_path.stat()
+                data = image_path.read_bytes()
+                timings["read"] = time.perf_counter() - started
+                if hash_source:
+                    result["source_stat"] = (stat.st_size, stat.st_mtime_ns)
+                    self._hash(result, image_path, data)
+                
+                decode_started = time.perf_counter()
+                img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), group["flags"])
+                timings["decode"] = time.perf_counter() - decode_started
+                if img is None or img.shape != group["decoded"]:
+                    return processor.render_file(
+                        image_path, output_path, settings, hash_source, self.max_memory_mb, self.keep_encoded,
+                        self.source_hashes.get(image_path)
+                    )
+                
+                slot = group["slots"].get()
+                try:
+                    resize_started = time.perf_counter()
+                    resized = cv2.resize(
+                        img, group["new_size"], dst=group["buffers"][slot], interpolation=cv2.INTER_AREA
+                    )
+                    del img
+                    timings["resize"] = time.perf_counter() - resize_started
+                    encode_started = time.perf_counter()
+                    encoded, result["quality"], result["trials"] = processor.encode_image(
+                        backend, resized, output_path.suffix, settings.get("quality", 85),
+                        settings.get("target_kb"), settings.get("min_ssim"), encoder
+                    )
+                    timings["encode"] = time.perf_counter() - encode_started
+                finally:
+                    group["slots"].put(slot)
+                
+                result["original_size"] = group["size"]
+                result["new_size"] = group["new_size"]
+                result["target_kb"] = settings.get("target_kb")
+                result["bytes_in"] = len(data)
+                result["bytes_out"] = len(encoded)
+                write_started = time.perf_counter()
+                processor.write_output(result, output_path, encoded, len(data), self.keep_encoded)
+                timings["write"] = time.perf_counter() - write_started
+                result["success"] = True
+            except Exception as e:
+                result["error"] = str(e)
+            timings["total"] = time.perf_counter() - started
+            return result
+        
+        groups = self.shape_groups(image_files)
+        running = {}
+        # Re-order completed images so output stays deterministic
+        completed = {}
+        next_index = 0
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for key, indices in groups.items():
+                    group = plan_group(key, len(indices))
+                    for index in indices:
+                        image_path = image_files[index]
+                        while len(running) >= workers * 2:
+                            done, _ = wait(running, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                completed[running.pop(future)] = future.result()
+                            while next_index in completed:
+                                yield completed.pop(next_index)
+                                next_index += 1
+                        try:
+                            decoded = math.prod(group["decoded"]) if group else processor.estimate_decoded_bytes(image_path)
+                            cost = image_path.stat().st_size + decoded
+                        except Exception:
+                            cost = 0
+                        budget.acquire(cost)
+                        future = pool.submit(render_frame, image_path, group)
+                        future.add_done_callback(lambda _, cost=cost: budget.release(cost))
+                        running[future] = index
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        completed[running.pop(future)] = future.result()
+                    while next_index in completed:
+                        yield completed.pop(next_index)
+                        next_index += 1
+        finally:
+            self.stats.setdefault("order", "same-shape batches")
+            self.stats.update({
+                "budget_mb": self.max_inflight_mb,
+                "workers": workers,
+                "deferred": budget.deferred,
+                "oversized": budget.oversized,
+                "peak_inflight_mb": round(budget.peak_used / (1024 * 1024), 2),
+                "peak_concurrency": budget.peak_items,
+                "shape_groups": len(groups),
+            })
+    
+    def iter_shared_frames(self, image_files: List[Path]) -> Iterator[Dict]:
+        """
+        Decode images in this process and resize and encode them in worker
+        processes, handing decoded frames over through shared memory.
+        
+        Pickling a decoded frame to send it to another process copies it
+        several times over a pipe. Here, `workers` * 2 fixed-size slots are
+        set up in one shared memory block (a _FrameRing sized to
+        max_inflight_mb). Decode threads (half as many as workers, since
+        decoding costs about as much as resizing and encoding together) copy
+        each frame into a free slot, and only the slot number, shape and dtype
+        are sent to the worker. A slot is recycled when its worker is done.
+        Images the backend cannot hand out as an array, or whose frame does
+        not fit in a slot, are processed whole in a worker by process_image().
+        The block is always unlinked when the run ends, and if a worker
+        process dies, its images and any not yet started fail instead of
+        hanging the run.
+        
+        Args:
+            image_files: Images to process
+        
+        Yields:
+            Result records, in the same order as image_files
+        """
+        from concurrent.futures import Future, ProcessPoolExecutor
+        
+        workers = self.workers
+        processor = self.processor
+        settings = self.settings
+        hash_source = self.hash_source
+        backend = get_backend(settings.get("method", "pillow"))
+        slots = workers * 2
+        ring = _FrameRing(slots, max(_FrameRing.fit(int(self.max_inflight_mb * 1024 * 1024), slots), 1))
+        usage = {"shared": 0, "unshared": 0, "images": 0, "bytes": 0, "peak_images": 0, "peak_bytes": 0}
+        lock = threading.Lock()
+        # Bounds the images waiting for or in a worker, including unshared ones
+        pending = threading.Semaphore(slots)
+        next_image = iter(enumerate(image_files))
+        done_queue = queue.Queue()
+        stop = threading.Event()
+        
+        def finish(index: int, result: Dict, started: float, slot: Optional[int] = None, nbytes: int = 0):
+            with lock:
+                usage["images"] -= 1
+                usage["bytes"] -= nbytes
+            if slot is not None:
+                ring.release(slot)
+            pending.release()
+            result["timings"]["total"] = time.perf_counter() - started
+            if not hash_source:
+                result.pop("source_stat", None)
+            done_queue.put((index, result))
+        
+        def submit(index: int, started: float, slot: Optional[int], nbytes: int, call, *args, **kwargs):
+            try:
+                future = pool.submit(call, *args, **kwargs)
+            except Exception as e:
+                # The pool is broken; the image fails without a worker
+                future = Future()
+                future.set_exception(e)
+            
+            def collect(future):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    image_path = image_files[index]
+                    result = processor.failed_result(
+                        image_path, self._output_path(image_path), settings.get("method", "pillow"), e
+                    )
+                finish(index, result, started, slot, nbytes)
+            
+            future.add_done_callback(collect)
+        
+        def decode_one(index: int, image_path: Path):
+            started = time.perf_counter()
+            result = self._new_result(image_path)
+            timings = result["timings"]
+            with lock:
+                usage["images"] += 1
+                usage["peak_images"] = max(usage["peak_images"], usage["images"])
+            slot = None
+            try:
+                stat = image_path.stat()
+                data = image_path.read_bytes()
+                timings["read"] = time.perf_counter() - started
+                result["source_stat"] = (stat.st_size, stat.st_mtime_ns)
+                result["bytes_in"] = len(data)
+                if hash_source:
+                    self._hash(result, image_path, data)
+                decode_started = time.perf_counter()
+                decoded = backend.decode_frame(
+                    data, settings.get("width"), settings.get("height"), settings.get("scale_percent"),
+                    settings.get("maintain_aspect", True), self.max_memory_mb, name=str(image_path)
+                )
+                timings["decode"] = time.perf_counter() - decode_started
+                del data
+                
+                if decoded is None or decoded[0].nbytes > ring.slot_bytes:
+                    with lock:
+                        usage["unshared"] += 1
+                    submit(index, started, None, 0, processor.process_image, image_path, settings,
+                           hash_source, self.max_memory_mb, self.keep_encoded, self.source_hashes.get(image_path))
+                    return
+                
+                pixels, original_size, new_size = decoded
+                del decoded
+                slot = ring.acquire()
+                frame = ring.put(slot, pixels)
+                with lock:
+                    usage["shared"] += 1
+                    usage["bytes"] += pixels.nbytes
+                    usage["peak_bytes"] = max(usage["peak_bytes"], usage["bytes"])
+                frame["original_size"] = original_size
+                frame["new_size"] = new_size
+                submit(index, started, slot, pixels.nbytes, _render_shared_frame, processor, frame, result,
+                       settings, self.keep_encoded)
+            except Exception as e:
+                result["error"] = str(e)
+                finish(index, result, started, slot)
+        
+        def decode_stage():
+            while not stop.is_set():
+                with lock:
+                    index, image_path = next(next_image, (None, None))
+                if image_path is None:
+                    break
+                pending.acquire()
+                decode_one(index, image_path)
+        
+        try:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_FrameRing.attach_worker, initargs=(ring.name,)
+            ) as pool:
+                # Start the workers before any decode thread, so none is forked mid-decode
+                pool.submit(os.getpid).result()
+                threads = [threading.Thread(target=decode_stage, daemon=True) for _ in range(max(1, workers // 2))]
+                for thread in threads:
+                    thread.start()
+                try:
+                    # Re-order completed images so output stays deterministic
+                    completed = {}
+                    for next_index in range(len(image_files)):
+                        while next_index not in completed:
+                            index, result = done_queue.get()
+                            completed[index] = result
+                        yield completed.pop(next_index)
+                finally:
+                    # Stop decoding new images; in-flight ones finish before the pool shuts down
+                    stop.set()
+                    for thread in threads:
+                        thread.join()
+        finally:
+            ring.close()
+            self.stats.setdefault("order", "input order")
+            self.stats.update({
+                "budget_mb": self.max_inflight_mb,
+                "workers": workers,
+                "deferred": ring.deferred,
+                "oversized": 0,
+                "peak_inflight_mb": round(usage["peak_bytes"] / (1024 * 1024), 2),
+                "peak_concurrency": usage["peak_images"],
+                "ring_slots": slots,
+                "slot_mb": round(ring.slot_bytes / (1024 * 1024), 2),
+                "shared_frames": usage["shared"],
+                "unshared": usage["unshared"],
+            })
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Backend Benchmark for Image Resizer & Compressor
+================================================
+Compares the Pillow and OpenCV backends on every preset in
+ConfigManager.PRESETS using a reproducible synthetic corpus.
+
+For each preset and backend it reports:
+- Processing time per image (in memory, after warm-up; min/median of repeats)
+- Peak RSS of the process that ran the case (each case runs in a fresh process)
+- Output bytes
+- SSIM of the output against a Pillow LANCZOS reference of the same size
+  (full-resolution decode, no reduced decoding)
+
+Results are saved as JSON so runs can be diffed across releases.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sizes small medium --repeats 5 --output results.json
+
+Author: Hacktoberfest 2025 Contributor
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import statistics
+import tempfile
+import multiprocessing
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from image_resizer_compressor import ImageProcessor, available_backends, get_backend, process_bytes
+
+
+# Synthetic corpus: name -> (width, height)
+CORPUS_SIZES = {
+    "small": (640, 480),
+    "medium": (1920, 1080),
+    "large": (4000, 3000),
+}
+CORPUS_FORMATS = ["jpg", "png", "webp", "tiff", "bmp"]
+
+
+def generate_image(size: Tuple[int, int], seed: int):
+    """
+    Draw a deterministic test image: gradients, shapes and fine lines.
+    
+    The mix gives both smooth areas and high-frequency detail, which is
+    where resampling filters and encoders differ.
+    """
+    from PIL import Image, ImageDraw
+    
+    rng = random.Random(seed)
+    width, height = size
+    red = Image.linear_gradient("L").resize(size)
+    green = Image.radial_gradient("L").resize(size)
+    blue = Image.linear_gradient("L").rotate(90).resize(size)
+    img = Image.merge("RGB", (red, green, blue))
+    
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = x0 + rng.randrange(width // 4 + 1), y0 + rng.randrange(height // 4 + 1)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if rng.random() < 0.5:
+            draw.ellipse((x0, y0, x1, y1), fill=color)
+        else:
+            draw.rectangle((x0, y0, x1, y1), outline=color, width=rng.randrange(1, 6))
+    
+    # Fine line pattern in one corner (aliases badly with poor filters)
+    for x in range(0, width // 3, 3):
+        draw.line((x, 0, x, height // 3), fill=(0, 0, 0))
+    return img
+
+
+def generate_corpus(corpus_dir: Path, sizes: List[str], formats: List[str], seed: int = 2025) -> List[Path]:
+    """
+    Write the synthetic corpus (one image per size and format).
+    
+    Returns:
+        Paths of the generated images
+    """
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for size_index, size_name in enumerate(sizes):
+        img = generate_image(CORPUS_SIZES[size_name], seed + size_index)
+        for fmt in formats:
+            path = corpus_dir / f"{size_name}.{fmt}"
+            if fmt == "jpg":
+                img.save(path, "JPEG", quality=92)
+            elif fmt == "webp":
+                img.save(path, "WEBP", quality=90)
+            else:
+                img.save(path)
+            paths.append(path)
+    return paths
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None if unavailable)."""
+    # VmHWM starts fresh with each exec; ru_maxrss on Linux carries over the
+    # parent's peak from before the exec
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(config: Dict, image_paths: List[str], warmup: int, repeats: int) -> Dict:
+    """
+    Time one preset/backend combination. Runs in its own process.
+    
+    Returns:
+        Dict with per-image timings and outputs, and the process's peak RSS
+    """
+    get_backend(config["method"])
+    baseline_rss = peak_rss_mb()
+    images = []
+    for image_path in image_paths:
+        data = Path(image_path).read_bytes()
+        entry = {"name": Path(image_path).name, "bytes_in": len(data)}
+        try:
+            for _ in range(warmup):
+                process_bytes(data, config)
+            times = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                encoded, metadata = process_bytes(data, config)
+                times.append(time.perf_counter() - started)
+            entry.update({
+                "new_size": list(metadata["new_size"]),
+                "bytes_out": len(encoded),
+                "time_ms": {
+                    "min": round(min(times) * 1000, 3),
+                    "median": round(statistics.median(times) * 1000, 3),
+                    "mean": round(statistics.mean(times) * 1000, 3),
+                },
+                "output": encoded,
+            })
+        except Exception as e:
+            entry["error"] = str(e)
+        images.append(entry)
+    return {"images": images, "baseline_rss_mb": baseline_rss, "peak_rss_mb": peak_rss_mb()}
+
+
+class ReferenceCache:
+    """Pillow LANCZOS references (full-resolution decode) by image and size."""
+    
+    def __init__(self):
+        self._sources = {}
+        self._references = {}
+    
+    def get(self, image_path: Path, size: Tuple[int, int]):
+        from PIL import Image
+        
+        key = (str(image_path), tuple(size))
+        if key not in self._references:
+            if str(image_path) not in self._sources:
+                with Image.open(image_path) as img:
+                    self._sources[str(image_path)] = img.convert("RGB")
+            source = self._sources[str(image_path)]
+            self._references[key] = source.resize(tuple(size), Image.Resampling.LANCZOS).convert("L")
+        return self._references[key]
+
+
+def run_benchmark(
+    presets: Dict[str, Dict],
+    backends: List[str],
+    image_paths: List[Path],
+    warmup: int = 1,
+    repeats: int = 3
+) -> List[Dict]:
+    """
+    Run every preset through every backend.
+    
+    Returns:
+        One result dict per (preset, backend) case
+    """
+    from PIL import Image
+    
+    try:
+        import numpy  # noqa: F401
+        have_numpy = True
+    except ImportError:
+        print("⚠ numpy not installed: SSIM will not be computed")
+        have_numpy = False
+    
+    references = ReferenceCache()
+    # A fresh interpreter per case keeps peak RSS figures independent
+    context = multiprocessing.get_context("spawn")
+    cases = []
+    
+    for preset_name, preset in presets.items():
+        for backend in backends:
+            config = {**preset, "method": backend}
+            case = {"preset": preset_name, "backend": backend}
+            print(f"⏱ {preset_name} / {backend} ...", end=" ", flush=True)
+            
+            try:
+                get_backend(backend)
+            except ImportError as e:
+                case["error"] = str(e)
+                cases.append(case)
+                print(f"skipped ({e})")
+                continue
+            
+            with context.Pool(1) as pool:
+                outcome = pool.apply(run_case, (config, [str(p) for p in image_paths], warmup, repeats))
+            
+            for image_path, entry in zip(image_paths, outcome["images"]):
+                encoded = entry.pop("output", None)
+                if encoded is not None and have_numpy:
+                    with Image.open(BytesIO(encoded)) as output:
+                        luma = output.convert("L")
+                    entry["ssim"] = round(ImageProcessor.ssim(luma, references.get(image_path, luma.size)), 5)
+            
+            done = [entry for entry in outcome["images"] if "error" not in entry]
+            case.update({
+                "peak_rss_mb": outcome["peak_rss_mb"],
+                "baseline_rss_mb": outcome["baseline_rss_mb"],
+                "total_time_ms": round(sum(entry["time_ms"]["median"] for entry in done), 3),
+                "bytes_out": sum(entry["bytes_out"] for entry in done),
+                "mean_ssim": round(statistics.mean(entry["ssim"] for entry in done), 5)
+                if done and have_numpy else None,
+                "failed": len(outcome["images"]) - len(done),
+                "images": outcome["images"],
+            })
+            cases.append(case)
+            print(f"{case['total_time_ms']:.0f} ms, {case['bytes_out'] / 1024:.0f} KB, "
+                  f"SSIM {case['mean_ssim']}, peak RSS {case['peak_rss_mb']} MB")
+    return cases
+
+
+def print_table(cases: List[Dict]):
+    """Print a side-by-side comparison of the backends per preset."""
+    print("\n" + "=" * 78)
+    print(f"{'Preset':<15}{'Backend':<9}{'Time (ms)':>11}{'Output (KB)':>13}{'SSIM':>9}{'Peak RSS (MB)':>15}")
+    print("=" * 78)
+    for case in cases:
+        if "error" in case:
+            print(f"{case['preset']:<15}{case['backend']:<9}  {case['error']}")
+            continue
+        mean_ssim = f"{case['mean_ssim']:.4f}" if case["mean_ssim"] is not None else "n/a"
+        print(f"{case['preset']:<15}{case['backend']:<9}{case['total_time_ms']:>11.1f}"
+              f"{case['bytes_out'] / 1024:>13.1f}{mean_ssim:>9}{str(case['peak_rss_mb']):>15}")
+    print("=" * 78)
+
+
+def environment_info() -> Dict:
+    """Library versions and platform, stored with the results."""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    for module, key in (("PIL", "pillow"), ("cv2", "opencv"), ("numpy", "numpy")):
+        try:
+            info[key] = __import__(module).__version__
+        except ImportError:
+            info[key] = None
+    return info
+
+
+def main():
+    """Main entry point."""
+    from cli_interface import ConfigManager
+    
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Pillow and OpenCV backends on every preset",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Full benchmark (small, medium and large images in every format)
+  python benchmark.py
+  
+  # Quicker run, more repeats
+  python benchmark.py --sizes small medium --repeats 5
+  
+  # Only some presets, saved under a release name
+  python benchmark.py --presets web thumbnail --output bench-v2.json
+        """
+    )
+    parser.add_argument('--sizes', nargs='+', choices=list(CORPUS_SIZES), default=list(CORPUS_SIZES),
+                        help='Synthetic image sizes to include (default: all)')
+    parser.add_argument('--formats', nargs='+', choices=CORPUS_FORMATS, default=CORPUS_FORMATS,
+                        help='Synthetic image formats to include (default: all)')
+    parser.add_argument('--presets', nargs='+', choices=list(ConfigManager.PRESETS),
+                        default=list(ConfigManager.PRESETS), help='Presets to run (default: all)')
+    parser.add_argument('--backends', nargs='+', choices=available_backends(), default=available_backends(),
+                        help='Backends to compare (default: all)')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per image (default: 1)')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed runs per image (default: 3)')
+    parser.add_argument('--seed', type=int, default=2025, help='Corpus seed (default: 2025)')
+    parser.add_argument('--corpus', help='Directory for the synthetic corpus (default: a temporary directory)')
+    parser.add_argument('--output', '-o', default='benchmark_results.json',
+                        help='JSON results file (default: benchmark_results.json)')
+    args = parser.parse_args()
+    
+    presets = {name: ConfigManager.PRESETS[name] for name in args.presets}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = Path(args.corpus or temp_dir)
+        print(f"📁 Generating synthetic corpus in {corpus_dir}")
+        image_paths = generate_corpus(corpus_dir, args.sizes, args.formats, args.seed)
+        print(f"   {len(image_paths)} image(s): sizes {', '.join(args.sizes)}; formats {', '.join(args.formats)}\n")
+        
+        started = time.perf_counter()
+        cases = run_benchmark(presets, args.backends, image_paths, args.warmup, args.repeats)
+        elapsed = time.perf_counter() - started
+    
+    print_table(cases)
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "settings": {
+            "sizes": {name: CORPUS_SIZES[name] for name in args.sizes},
+            "formats": args.formats,
+            "seed": args.seed,
+            "warmup": args.warmup,
+            "repeats": args.repeats,
+        },
+        "elapsed_s": round(elapsed, 1),
+        "cases": cases,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📝 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n❌ Benchmark interrupted by user.")
+        sys.exit(0)
@@ -10,7 +10,22 @@ Features:
 - Command-line arguments support
 - Interactive configuration mode
 - Preset configurations (web, social media, email, thumbnails)
-- Watch folder mode for automatic processing
+- Watch folder mode for automatic processing (--watch)
+- Parallel processing with a pool of worker processes
+- Incremental runs: unchanged images are skipped (--force re-processes all)
+- Multi-preset variants from a single decode (--variants)
+- Target file size mode (--target-kb)
+- Perceptual auto quality: lowest quality above an SSIM threshold (--quality auto)
+- Output format conversion and encoder effort (--format, --effort, --progressive, --palette)
+- Pipelined read/process/write mode with a memory budget (--pipeline)
+- Same-resolution batches resized on OpenCV threads (--shape-batches)
+- Decoded frames handed to worker processes through shared memory (--shared-memory)
+- HTTP resize service with an LRU variant cache (--serve)
+- Memory cap for very large images, decoded in strips (--max-memory-mb)
+- Per-image stage timings as JSON Lines (--metrics) and a quiet mode (--quiet)
+- Dry-run planner estimating time and output size from headers (--plan)
+- Output into a single ZIP, tar or pack archive (--archive)
+- Crash-safe output files and resumable runs (--resume)
 
 Author: Hacktoberfest 2025 Contributor
 """
@@ -22,7 +37,9 @@ import argparse
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Optional
-from image_resizer_compressor import ImageProcessor
+from image_resizer_compressor import ImageProcessor, available_backends
+from watch_folder import FolderWatcher
+from image_server import serve
 
 
 class ConfigManager:
@@ -91,6 +108,17 @@ class ConfigManager:
             "quality": 85,
             "maintain_aspect": True,
             "description": "No resize, just compress (85% quality)"
+        },
+        "webp": {
+            "name": "Web WebP",
+            "method": "pillow",
+            "width": 1920,
+            "height": None,
+            "scale_percent": None,
+            "quality": 80,
+            "maintain_aspect": True,
+            "format": "webp",
+            "description": "Web pages as WebP (1920px width, 80% quality)"
         }
     }
     
@@ -361,14 +389,33 @@ def create_custom_config() -> Dict:
     
     # Quality
     try:
-        quality = int(input("\nEnter compression quality (1-100, recommended 85): ") or "85")
-        config["quality"] = max(1, min(100, quality))
+        quality = input("\nEnter compression quality (1-100 or 'auto', recommended 85): ").strip() or "85"
+        if quality.lower() == "auto":
+            config["quality"] = "auto"
+        else:
+            config["quality"] = max(1, min(100, int(quality)))
     except ValueError:
         config["quality"] = 85
     
+    # Output format
+    output_format = input("\nOutput format (jpg, png, webp, avif; Enter = same as input): ").strip()
+    try:
+        config["format"] = ImageProcessor.parse_format(output_format)
+    except ValueError as e:
+        print(f"⚠ {e}, keeping the input format")
+        config["format"] = None
+    
     return config
 
 
+def describe_quality(config: Dict) -> str:
+    """Quality setting as shown to the user, e.g. "85%" or "auto (SSIM >= 0.95)"."""
+    quality = config.get('quality', 85)
+    if quality == "auto":
+        return f"auto (SSIM >= {config.get('min_ssim') or ImageProcessor.AUTO_MIN_SSIM})"
+    return f"{quality}%"
+
+
 def print_config(config: Dict):
     """Print configuration details."""
     print(f"Name: {config.get('name', 'Unnamed')}")
@@ -385,7 +432,17 @@ def print_config(config: Dict):
     if not config.get('width') and not config.get('height') and not config.get('scale_percent'):
         print("Resize: None (compress only)")
     
-    print(f"Quality: {config.get('quality', 85)}%")
+    print(f"Quality: {describe_quality(config)}")
+    if config.get('target_kb'):
+        print(f"Target Size: {config['target_kb']} KB")
+    if config.get('format'):
+        print(f"Output Format: {config['format'].lstrip('.').upper()}")
+    encoder = [config.get('effort') or ImageProcessor.DEFAULT_EFFORT]
+    if config.get('progressive'):
+        encoder.append("progressive")
+    if config.get('palette'):
+        encoder.append(f"{256 if config['palette'] is True else config['palette']}-color palette")
+    print(f"Encoder: {', '.join(encoder)}")
     print(f"Maintain Aspect Ratio: {config.get('maintain_aspect', True)}")
 
 
@@ -419,42 +476,187 @@ def list_all_configurations(config_manager: ConfigManager):
     print("\n" + "=" * 60)
 
 
-def process_images(ingest_dir: Path, output_dir: Path, config: Dict):
-    """Process images with the given configuration."""
+def process_images(
+    ingest_dir: Path,
+    output_dir: Path,
+    config: Dict,
+    workers: int = 1,
+    force: bool = False,
+    mode: str = "scheduled",
+    max_inflight_mb: float = 512,
+    max_memory_mb: Optional[float] = None,
+    quiet: bool = False,
+    metrics_path: Optional[str] = None,
+    archive: Optional[str] = None,
+    resume: bool = False
+):
+    """Process images with the given configuration (mode: see ImageProcessor.batch_process())."""
     print("\n" + "=" * 60)
     print("🚀 PROCESSING IMAGES")
     print("=" * 60)
     
     processor = ImageProcessor(str(ingest_dir), str(output_dir))
     
-    # Extract config parameters
-    method = config.get('method', 'pillow')
-    width = config.get('width')
-    height = config.get('height')
-    scale_percent = config.get('scale_percent')
-    quality = config.get('quality', 85)
-    maintain_aspect = config.get('maintain_aspect', True)
-    
     # Process
     successful, failed = processor.batch_process(
-        method=method,
-        width=width,
-        height=height,
-        scale_percent=scale_percent,
-        quality=quality,
-        maintain_aspect=maintain_aspect
+        config,
+        workers=workers,
+        mode=mode,
+        force=force,
+        resume=resume,
+        archive=archive,
+        max_inflight_mb=max_inflight_mb,
+        max_memory_mb=max_memory_mb,
+        quiet=quiet,
+        metrics_path=metrics_path
     )
+    skipped = sum(1 for result in processor.last_results if result["skipped"])
+    duplicates = sum(1 for result in processor.last_results if result["duplicate_of"] and result["success"])
     
     # Log results
-    log_processing(config, successful, failed)
+    log_processing(config, successful, failed, workers, skipped, processor.last_metrics, duplicates)
+
+
+def plan_images(
+    ingest_dir: Path,
+    output_dir: Path,
+    config: Dict,
+    workers: int = 1,
+    force: bool = False
+):
+    """Estimate processing time and output size without processing anything."""
+    print("\n" + "=" * 60)
+    print("📊 PROCESSING PLAN (dry run)")
+    print("=" * 60)
+    
+    processor = ImageProcessor(str(ingest_dir), str(output_dir))
+    plan = processor.plan_batch(config, workers=workers, force=force)
+    processor.print_plan(plan)
+
 
+def process_variants(
+    ingest_dir: Path,
+    output_dir: Path,
+    configs: Dict[str, Dict],
+    workers: int = 1,
+    force: bool = False,
+    quiet: bool = False,
+    metrics_path: Optional[str] = None,
+    resume: bool = False
+):
+    """Render several configurations of every image, each into its own subfolder."""
+    print("\n" + "=" * 60)
+    print("🚀 PROCESSING IMAGE VARIANTS")
+    print("=" * 60)
+    
+    processor = ImageProcessor(str(ingest_dir), str(output_dir))
+    successful, failed = processor.batch_process_variants(
+        configs, workers=workers, force=force, quiet=quiet, metrics_path=metrics_path, resume=resume
+    )
+    skipped = sum(1 for result in processor.last_results if result["skipped"])
+    duplicates = sum(1 for result in processor.last_results if result["duplicate_of"] and result["success"])
+    
+    # Log results
+    log_config = {"name": f"Variants: {', '.join(configs)}", "method": "pillow"}
+    log_processing(log_config, successful, failed, workers, skipped, processor.last_metrics, duplicates)
+
+
+def watch_images(
+    ingest_dir: Path,
+    output_dir: Path,
+    config: Dict,
+    workers: int = 1,
+    settle_seconds: float = 2.0,
+    force: bool = False,
+    max_memory_mb: Optional[float] = None,
+    quiet: bool = False,
+    metrics_path: Optional[str] = None
+):
+    """Process images continuously as they arrive in the ingest folder."""
+    print("\n" + "=" * 60)
+    print("👀 WATCH FOLDER MODE")
+    print("=" * 60)
+    
+    processor = ImageProcessor(str(ingest_dir), str(output_dir))
+    watcher = FolderWatcher(
+        processor,
+        config,
+        workers=workers,
+        settle_seconds=settle_seconds,
+        force=force,
+        max_memory_mb=max_memory_mb,
+        quiet=quiet,
+        metrics_path=metrics_path
+    )
+    successful, failed = watcher.run()
+    
+    # Log results
+    log_processing(config, successful, failed, watcher.workers, metrics=watcher.metrics.summary())
+
+
+def serve_images(args):
+    """Serve resized variants of the ingest folder over HTTP."""
+    print_header()
+    
+    config_manager = ConfigManager()
+    defaults = {
+        "method": args.method,
+        "width": args.width,
+        "height": args.height,
+        "scale_percent": args.scale,
+        "quality": args.quality,
+        "maintain_aspect": not args.no_aspect,
+        "min_ssim": args.min_ssim,
+        "format": args.format,
+        "effort": args.effort,
+        "progressive": args.progressive,
+        "palette": args.palette
+    }
+    if args.config:
+        defaults = config_manager.get_config(args.config)
+        if not defaults:
+            print(f"❌ Configuration '{args.config}' not found")
+            sys.exit(1)
+    
+    processor = ImageProcessor(args.ingest, args.output)
+    serve(
+        processor,
+        config_manager.list_configs(),
+        defaults,
+        host=args.host,
+        port=args.port,
+        cache_mb=args.cache_mb,
+        disk_cache=args.disk_cache,
+        disk_cache_mb=args.disk_cache_mb,
+        max_dimension=args.max_dimension
+    )
 
-def log_processing(config: Dict, successful: int, failed: int):
+
+def log_processing(
+    config: Dict,
+    successful: int,
+    failed: int,
+    workers: int = 1,
+    skipped: int = 0,
+    metrics: Optional[Dict] = None,
+    duplicates: int = 0
+):
     """Log processing results to a file."""
     log_file = Path("processing_log.txt")
     
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
+    performance = ""
+    for method, stats in (metrics or {}).items():
+        if not stats["images"]:
+            continue
+        latency = stats["latency_ms"]
+        performance += (
+            f"Performance ({method}): {stats['images_per_s']} images/s, "
+            f"{stats['mb_in_per_s']} MB/s in, {stats['mb_out_per_s']} MB/s out, "
+            f"latency p50/p95/p99 {latency['p50']}/{latency['p95']}/{latency['p99']} ms\n"
+        )
+    
     log_entry = f"""
 {'='*60}
 Processing Log - {timestamp}
@@ -464,11 +666,17 @@ Method: {config.get('method', 'pillow')}
 Width: {config.get('width', 'N/A')}
 Height: {config.get('height', 'N/A')}
 Scale: {config.get('scale_percent', 'N/A')}%
-Quality: {config.get('quality', 85)}%
+Quality: {describe_quality(config)}
+Target Size: {config.get('target_kb') or 'N/A'} KB
+Output Format: {config.get('format') or 'same as input'}
+Effort: {config.get('effort') or ImageProcessor.DEFAULT_EFFORT}
+Workers: {workers}
 Results:
   Successful: {successful}
   Failed: {failed}
-{'='*60}
+  Skipped (up to date): {skipped}
+  Duplicates linked (encodes saved): {duplicates}
+{performance}{'='*60}
 
 """
     
@@ -480,6 +688,18 @@ Results:
         print(f"⚠ Could not save log: {e}")
 
 
+def apply_overrides(config: Dict, args) -> Dict:
+    """Apply the command-line options that override a saved configuration or preset."""
+    if args.target_kb:
+        config = {**config, "target_kb": args.target_kb}
+    if args.quality == "auto":
+        config = {**config, "quality": "auto", "min_ssim": args.min_ssim}
+    for key in ("format", "effort", "progressive", "palette"):
+        if getattr(args, key):
+            config = {**config, key: getattr(args, key)}
+    return config
+
+
 def cli_mode(args):
     """Run in CLI mode with arguments."""
     print_header()
@@ -490,6 +710,28 @@ def cli_mode(args):
     print(f"📁 Ingest: {ingest_dir.absolute()}")
     print(f"📁 Output: {output_dir.absolute()}")
     
+    # Multi-preset mode: one decode per image, one subfolder per variant
+    if args.variants:
+        if args.watch or args.plan or args.archive or args.shape_batches or args.shared_memory:
+            print("❌ --watch, --plan, --archive, --shape-batches and --shared-memory work with a single "
+                  "configuration, not --variants")
+            sys.exit(1)
+        config_manager = ConfigManager()
+        configs = {}
+        for name in args.variants:
+            config = config_manager.get_config(name)
+            if not config:
+                print(f"❌ Configuration '{name}' not found")
+                sys.exit(1)
+            configs[name] = apply_overrides(config, args)
+        
+        print(f"\n✓ Rendering variants: {', '.join(configs)}")
+        process_variants(
+            ingest_dir, output_dir, configs, workers=args.workers, force=args.force,
+            quiet=args.quiet, metrics_path=args.metrics, resume=args.resume
+        )
+        return
+    
     # Check if using a preset or saved config
     if args.config:
         config_manager = ConfigManager()
@@ -499,6 +741,8 @@ def cli_mode(args):
             print(f"❌ Configuration '{args.config}' not found")
             sys.exit(1)
         
+        config = apply_overrides(config, args)
+        
         print(f"\n✓ Using configuration: {config.get('name', args.config)}")
         print_config(config)
     else:
@@ -509,13 +753,79 @@ def cli_mode(args):
             "height": args.height,
             "scale_percent": args.scale,
             "quality": args.quality,
-            "maintain_aspect": not args.no_aspect
+            "maintain_aspect": not args.no_aspect,
+            "target_kb": args.target_kb,
+            "min_ssim": args.min_ssim,
+            "format": args.format,
+            "effort": args.effort,
+            "progressive": args.progressive,
+            "palette": args.palette
         }
         print("\n✓ Using command-line parameters")
         print_config(config)
     
+    if sum((args.pipeline, args.shape_batches, args.shared_memory)) > 1:
+        print("❌ Choose one of --pipeline, --shape-batches and --shared-memory")
+        sys.exit(1)
+    if args.shared_memory and args.watch:
+        print("❌ --shared-memory cannot be combined with --watch")
+        sys.exit(1)
+    
+    # Same-shape batches always resize with OpenCV
+    if args.shape_batches:
+        if args.watch:
+            print("❌ --shape-batches cannot be combined with --watch")
+            sys.exit(1)
+        if config.get('method', 'pillow') != 'opencv':
+            print(f"\n⚠ --shape-batches uses the opencv method instead of {config.get('method', 'pillow')}")
+            config = {**config, "method": "opencv"}
+    
+    # Dry run: estimate only
+    if args.plan:
+        plan_images(ingest_dir, output_dir, config, workers=args.workers, force=args.force)
+        return
+    
+    # Process continuously until stopped
+    if args.watch:
+        if args.archive:
+            print("❌ --archive cannot be combined with --watch")
+            sys.exit(1)
+        watch_images(
+            ingest_dir,
+            output_dir,
+            config,
+            workers=args.workers,
+            settle_seconds=args.settle_seconds,
+            force=args.force,
+            max_memory_mb=args.max_memory_mb,
+            quiet=args.quiet,
+            metrics_path=args.metrics
+        )
+        return
+    
     # Process
-    process_images(ingest_dir, output_dir, config)
+    if args.pipeline:
+        mode = "pipeline"
+    elif args.shape_batches:
+        mode = "shape_batches"
+    elif args.shared_memory:
+        mode = "shared_memory"
+    else:
+        mode = "scheduled"
+    process_images(
+        ingest_dir,
+        output_dir,
+        config,
+        workers=args.workers,
+        force=args.force,
+        mode=mode,
+        max_inflight_mb=args.max_inflight_mb,
+        max_memory_mb=args.max_memory_mb,
+        quiet=args.quiet,
+        metrics_path=args.metrics,
+        archive=args.archive,
+        resume=args.resume
+    )
 
 
 def main():
@@ -537,6 +847,58 @@ Examples:
   # Resize by percentage
   python cli_interface.py --scale 50 --quality 90
   
+  # Use 8 worker processes (0 = one per CPU core)
+  python cli_interface.py --config web --workers 8
+  
+  # Pipelined mode for network shares: 4 processing threads, 1 GB in flight
+  python cli_interface.py --config web --pipeline --workers 4 --max-inflight-mb 1024
+  
+  # Camera dump of one resolution: OpenCV batches on 8 threads
+  python cli_interface.py --width 1920 --shape-batches --workers 8
+  
+  # Decode here, resize and encode in 8 processes; frames pass through shared memory
+  python cli_interface.py --config web --shared-memory --workers 8
+  
+  # Re-process everything, even images whose output is up to date
+  python cli_interface.py --config web --force
+  
+  # Continue an overnight batch that was killed, without redoing finished images
+  python cli_interface.py --config web --workers 0 --resume
+  
+  # Fit every image under 150 KB (quality searched from 90 down)
+  python cli_interface.py --width 1920 --quality 90 --target-kb 150
+  
+  # Lowest quality per image that still looks like the resized original
+  python cli_interface.py --width 1920 --quality auto --min-ssim 0.97
+  
+  # Convert to WebP, spending more CPU time for smaller files
+  python cli_interface.py --config web --format webp --effort max
+  
+  # Progressive JPEGs; PNG screenshots quantized to a 128-color palette
+  python cli_interface.py --width 1200 --format jpg --progressive
+  python cli_interface.py --config compress_only --palette 128
+  
+  # Scanned archives: keep decoding under 256 MB per image (strips for TIFF/BMP)
+  python cli_interface.py --config web --max-memory-mb 256
+  
+  # Large runs: print only failures, record per-image stage timings
+  python cli_interface.py --config web --workers 0 --quiet --metrics metrics.jsonl
+  
+  # Before a big run: estimate time and output size from image headers
+  python cli_interface.py --config web --workers 8 --plan
+  
+  # Many small outputs on network storage: one archive instead of thousands of files
+  python cli_interface.py --config thumbnail --archive output/thumbs.pack
+  
+  # Write several presets from one decode (output/web, output/thumbnail, ...)
+  python cli_interface.py --variants web social thumbnail email
+  
+  # Keep running and process new images as they are dropped into ./ingest
+  python cli_interface.py --config web --watch --workers 4
+  
+  # Serve variants on demand: http://127.0.0.1:8000/img/photo.jpg?preset=thumbnail
+  python cli_interface.py --serve --port 8000 --cache-mb 512 --disk-cache ./cache
+  
   # List all configurations
   python cli_interface.py --list-configs
         """
@@ -559,11 +921,19 @@ Examples:
         help='Use a preset or saved configuration (e.g., web, social, email)'
     )
     
+    parser.add_argument(
+        '--variants',
+        nargs='+',
+        metavar='CONFIG',
+        help='Render several presets/saved configurations from a single decode, '
+             'each into its own output subfolder'
+    )
+    
     parser.add_argument(
         '--method', '-m',
-        choices=['pillow', 'opencv'],
+        choices=available_backends(),
         default='pillow',
-        help='Processing method (default: pillow)'
+        help='Processing method; OpenCV is only imported when selected (default: pillow)'
     )
     
     parser.add_argument(
@@ -586,9 +956,52 @@ Examples:
     
     parser.add_argument(
         '--quality', '-q',
-        type=int,
+        type=ImageProcessor.parse_quality,
         default=85,
-        help='Compression quality 1-100 (default: 85)'
+        help='Compression quality 1-100, or "auto" for the lowest quality whose '
+             'SSIM against the resized image reaches --min-ssim (default: 85)'
+    )
+    
+    parser.add_argument(
+        '--min-ssim',
+        type=float,
+        help=f'SSIM threshold for --quality auto, 0-1 '
+             f'(default: {ImageProcessor.AUTO_MIN_SSIM})'
+    )
+    
+    parser.add_argument(
+        '--target-kb',
+        type=float,
+        help='Maximum output size in KB; JPEG/WEBP quality is lowered from '
+             '--quality until each image fits'
+    )
+    
+    parser.add_argument(
+        '--format', '-f',
+        type=ImageProcessor.parse_format,
+        help='Convert outputs to this format: jpg, png, webp, avif, bmp, tiff '
+             '(default: keep each input\'s format)'
+    )
+    
+    parser.add_argument(
+        '--effort',
+        choices=ImageProcessor.EFFORT_LEVELS,
+        help='Encoder effort: fast (less CPU), balanced (default) or max (smaller files)'
+    )
+    
+    parser.add_argument(
+        '--progressive',
+        action='store_true',
+        help='Write progressive JPEGs'
+    )
+    
+    parser.add_argument(
+        '--palette',
+        type=int,
+        nargs='?',
+        const=256,
+        metavar='COLORS',
+        help='Quantize PNG output to a palette of at most COLORS colors (default: 256; lossy)'
     )
     
     parser.add_argument(
@@ -597,6 +1010,151 @@ Examples:
         help='Do not maintain aspect ratio'
     )
     
+    parser.add_argument(
+        '--workers', '-j',
+        type=int,
+        default=1,
+        help='Number of worker processes, 0 = one per CPU core (default: 1)'
+    )
+    
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Overlap reading, processing and writing (--workers sets the processing threads)'
+    )
+    
+    parser.add_argument(
+        '--shape-batches',
+        action='store_true',
+        help='Group images of the same size and resize each group with OpenCV, '
+             'reusing output buffers (--workers sets the threads)'
+    )
+    
+    parser.add_argument(
+        '--shared-memory',
+        action='store_true',
+        help='Decode in the main process and pass frames to the --workers processes '
+             'through shared memory (a ring of --max-inflight-mb)'
+    )
+    
+    parser.add_argument(
+        '--max-inflight-mb',
+        type=float,
+        default=512,
+        help='Memory budget for images in flight, from their decoded size in the '
+             'header; images start largest first while they fit (default: 512)'
+    )
+    
+    parser.add_argument(
+        '--max-memory-mb',
+        type=float,
+        help='Memory cap per image for decoding and resizing; huge uncompressed '
+             'TIFF/BMP images are decoded in strips, and images that cannot fit '
+             'fail from their header before decoding (default: no cap)'
+    )
+    
+    parser.add_argument(
+        '--archive',
+        metavar='FILE',
+        help='Write all outputs into one archive instead of separate files: '
+             '.zip, .tar or .pack (append-only with an index); read it with output_archive.py'
+    )
+    
+    parser.add_argument(
+        '--metrics',
+        metavar='FILE',
+        help='Append per-image metrics (stage timings, bytes in/out) to FILE as JSON Lines'
+    )
+    
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Only print failed images and the run summary'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue a run that was killed: images it finished (recorded in '
+             'the output journal) are not processed again, even with --force'
+    )
+    
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='Dry run: read image headers only and estimate processing time and '
+             'output size per format from a few sampled images'
+    )
+    
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Re-process all images, ignoring the output manifest'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and process new or changed images as they arrive '
+             '(stop with Ctrl+C or SIGTERM; in-flight images are finished)'
+    )
+    
+    parser.add_argument(
+        '--settle-seconds',
+        type=float,
+        default=2.0,
+        help='In --watch mode, how long a file must stop growing before it is '
+             'processed (default: 2)'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='Serve resized variants of the ingest images over HTTP '
+             '(/img/<name>?preset=web or ?w=800&q=80, /stats)'
+    )
+    
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='Address for --serve to listen on (default: 127.0.0.1)'
+    )
+    
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help='Port for --serve (default: 8000)'
+    )
+    
+    parser.add_argument(
+        '--cache-mb',
+        type=float,
+        default=256,
+        help='Memory for cached variants in --serve mode (default: 256)'
+    )
+    
+    parser.add_argument(
+        '--disk-cache',
+        metavar='DIR',
+        help='Also keep rendered variants in DIR across restarts (--serve)'
+    )
+    
+    parser.add_argument(
+        '--disk-cache-mb',
+        type=float,
+        default=1024,
+        help='Disk space for --disk-cache; least recently used variants are '
+             'deleted beyond it (default: 1024)'
+    )
+    
+    parser.add_argument(
+        '--max-dimension',
+        type=int,
+        default=8192,
+        help='Largest w and h a --serve request may ask for, in pixels (default: 8192)'
+    )
+    
     parser.add_argument(
         '--list-configs',
         action='store_true',
@@ -617,14 +1175,17 @@ Examples:
         list_all_configurations(config_manager)
         return
     
-    # Check if any processing arguments provided
-    has_args = any([
-        args.config,
-        args.width,
-        args.height,
-        args.scale,
-        args.quality != 85  # Non-default quality
-    ])
+    if args.serve:
+        serve_images(args)
+        return
+    
+    # Check if any processing arguments provided: any option other than the
+    # folders that differs from its default (so new flags are never ignored)
+    has_args = any(
+        value != parser.get_default(option)
+        for option, value in vars(args).items()
+        if option not in ("ingest", "output", "interactive")
+    )
     
     # Run appropriate mode
     if args.interactive or not has_args:
@@ -9,7 +9,25 @@ Features:
 - Resize images by width, height, or percentage
 - Compress images with quality control
 - Batch processing of multiple images
-- Support for both Pillow and OpenCV
+- Parallel batch processing across a process pool
+- Reduced (DCT-domain) JPEG decoding when downscaling
+- Incremental re-processing (skips images whose output is up to date)
+- Multi-preset variants from a single decode, with cascaded downscaling
+- Target file size mode (searches encoder quality in memory)
+- Pipelined read/decode/encode/write stages with a memory budget
+- Decoded frames handed to worker processes through shared memory slots
+- Pluggable backends (Pillow, OpenCV), imported only when first used
+- In-memory bytes-to-bytes API (process_bytes) for embedding in services
+- Memory-capped mode for very large images (strip decoding, header-only size checks)
+- Per-image stage timings as JSON Lines, with latency percentiles and throughput
+- Dry-run planning from image headers, with sampled time and size estimates
+- Largest-first scheduling with memory-aware admission of images to workers
+- Byte-identical inputs are encoded once; copies get a hardlink of the output
+- Output streamed into a ZIP, tar or pack archive instead of separate files
+- Crash-safe output (temp file + atomic rename) and a journal to resume killed runs
+- "auto" quality: the lowest quality whose SSIM meets a threshold (NumPy)
+- Output format conversion (WebP, progressive JPEG, AVIF), encoder effort
+  levels and lossy palette PNGs
 - Maintains aspect ratio option
 - Creates output directory automatically
 
@@ -18,11 +36,305 @@ Author: Hacktoberfest 2025 Contributor
 
 import os
 import sys
+import json
+import math
+import time
+import hashlib
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from functools import partial
+from itertools import chain
+from io import BytesIO
 from pathlib import Path
-from PIL import Image
-import cv2
-import numpy as np
-from typing import Tuple, List, Optional
+from typing import Callable, Dict, Iterator, Tuple, List, Optional
+
+from output_archive import open_writer
+
+
+class ImageTooLargeError(ValueError):
+    """Raised (before decoding) when an image cannot be processed within the memory cap."""
+
+
+class ProcessingManifest:
+    """
+    Persisted record of processed images, stored in the output directory.
+    
+    Each entry is keyed by source path and holds the source size, mtime,
+    content hash, the hash of the effective settings and the output size.
+    An image is up to date when none of these changed and its output still
+    exists, so re-runs only process new or modified images.
+    
+    Between saves, every update is also appended to a journal file and
+    flushed, so a run that is killed before it can save the manifest leaves
+    a record of the images it finished. save() folds the journal into the
+    manifest and removes it; a manifest opened with resume=True merges a
+    leftover journal first.
+    """
+    
+    FILE_NAME = ".image_manifest.json"
+    JOURNAL_NAME = ".image_manifest.journal"
+    VERSION = 1
+    
+    def __init__(self, output_dir: Path, resume: bool = False):
+        """
+        Load the manifest for an output directory (empty if missing).
+        
+        Args:
+            output_dir: Directory holding the manifest
+            resume: Merge the journal of an interrupted run, so the images
+                it finished count as up to date; otherwise the journal is
+                discarded on the first update
+        """
+        self.path = Path(output_dir) / self.FILE_NAME
+        self.journal_path = Path(output_dir) / self.JOURNAL_NAME
+        self.entries = self.load()
+        # Entries recorded by an interrupted run (merged only when resuming)
+        self.interrupted = self.load_journal()
+        self.resumed = set()
+        if resume:
+            self.entries.update(self.interrupted)
+            self.resumed = set(self.interrupted)
+        # Whether the journal on disk belongs to this manifest (merged or written by it)
+        self._owns_journal = resume
+        self._journal = None
+    
+    def load(self) -> Dict:
+        """Load manifest entries from disk."""
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get("version") == self.VERSION:
+                    return data.get("entries", {})
+            except Exception as e:
+                print(f"⚠ Error loading manifest: {e}")
+        return {}
+    
+    def load_journal(self) -> Dict:
+        """Load entries from the journal of an interrupted run (ignoring a torn last line)."""
+        entries = {}
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    entries[self._key(Path(entry["source"]))] = entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠ Error loading journal: {e}")
+        return entries
+    
+    def save(self):
+        """Write manifest entries to disk, replacing the old file in one step."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"version": self.VERSION, "entries": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        # Everything journaled is in the manifest now
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+        if self._owns_journal:
+            self.journal_path.unlink(missing_ok=True)
+    
+    @staticmethod
+    def config_hash(settings: Dict) -> str:
+        """Hash the effective processing settings."""
+        encoded = json.dumps(settings, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+    
+    @staticmethod
+    def file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """Generate SHA256 hash of a file's contents."""
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+        return h.hexdigest()
+    
+    @staticmethod
+    def _key(image_path: Path) -> str:
+        return str(Path(image_path).resolve())
+    
+    def is_resumed(self, image_path: Path) -> bool:
+        """Check whether the interrupted run being resumed finished an image."""
+        return self._key(image_path) in self.resumed
+    
+    def is_up_to_date(self, image_path: Path, output_path: Path, config_hash: str) -> bool:
+        """
+        Check whether an image's output is current for the given settings.
+        
+        The content hash is only computed when size matches but mtime does
+        not (e.g. the file was touched or copied back unchanged).
+        """
+        entry = self.entries.get(self._key(image_path))
+        if not entry or entry["config_hash"] != config_hash:
+            return False
+        try:
+            if output_path.stat().st_size != entry["output_size"]:
+                return False
+            stat = image_path.stat()
+        except OSError:
+            return False
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if self.file_hash(image_path) != entry["sha256"]:
+            return False
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+    
+    def update(self, result: Dict, config_hash: str):
+        """Record a successfully processed image from its result record, journaling it at once."""
+        entry = {
+            "source": result["source"],
+            "size": result["source_stat"][0],
+            "mtime_ns": result["source_stat"][1],
+            "sha256": result["source_hash"],
+            "config_hash": config_hash,
+            "output": result["output"],
+            "output_size": Path(result["output"]).stat().st_size,
+        }
+        self.entries[self._key(Path(result["source"]))] = entry
+        if self._journal is None:
+            # Without resume, this run's journal replaces the interrupted one
+            self._journal = open(self.journal_path, 'a' if self._owns_journal else 'w')
+            self._owns_journal = True
+        self._journal.write(json.dumps(entry, sort_keys=True) + "\n")
+        self._journal.flush()
+
+
+class RunMetrics:
+    """
+    Per-image metrics for a processing run.
+    
+    Each result record is appended to an optional JSON Lines file as soon as
+    it is available (stage timings in milliseconds, bytes in/out, sizes).
+    summary() reports, per backend, latency percentiles for whole images
+    and for each stage, and throughput in images/s and MB/s.
+    """
+    
+    STAGES = ("read", "hash", "decode", "resize", "encode", "write")
+    FIELDS = (
+        "name", "source", "output", "variant", "method", "success", "skipped", "error",
+        "original_size", "new_size", "quality", "trials", "bytes_in", "bytes_out", "schedule",
+        "duplicate_of",
+    )
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize run metrics.
+        
+        Args:
+            path: JSON Lines file to append per-image records to (None = keep in memory only)
+        """
+        self.path = Path(path) if path else None
+        self._file = open(self.path, 'a') if self.path else None
+        self.backends: Dict[str, Dict] = {}
+        # Scheduler decisions for the run (see batch_scheduler.BatchScheduler)
+        self.scheduler: Dict = {}
+    
+    def record(self, result: Dict):
+        """Add one result record."""
+        timings = result.get("timings") or {}
+        if self._file:
+            line = {key: result.get(key) for key in self.FIELDS}
+            line["timings_ms"] = {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+            self._file.write(json.dumps(line) + "\n")
+        
+        stats = self.backends.setdefault(result.get("method") or "unknown", {
+            "images": 0, "failed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0,
+            "totals": [], "stages": {}, "start": None, "end": None,
+        })
+        if result["skipped"]:
+            stats["skipped"] += 1
+            return
+        if not result["success"]:
+            stats["failed"] += 1
+        else:
+            stats["images"] += 1
+            stats["bytes_in"] += result.get("bytes_in") or 0
+            stats["bytes_out"] += result.get("bytes_out") or 0
+        if "total" in timings:
+            # Track the wall-clock span the backend was busy for throughput
+            end = time.perf_counter()
+            start = end - timings["total"]
+            stats["start"] = start if stats["start"] is None else min(stats["start"], start)
+            stats["end"] = end if stats["end"] is None else max(stats["end"], end)
+            stats["totals"].append(timings["total"])
+            for stage in self.STAGES:
+                if stage in timings:
+                    stats["stages"].setdefault(stage, []).append(timings[stage])
+    
+    @staticmethod
+    def percentile(values: List[float], percent: float) -> float:
+        """Nearest-rank percentile of values (0.0 if empty)."""
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        rank = max(1, -(-len(ordered) * percent // 100))
+        return ordered[int(rank) - 1]
+    
+    def summary(self) -> Dict:
+        """Get per-backend latency percentiles (ms) and throughput."""
+        summary = {}
+        for method, stats in self.backends.items():
+            elapsed = (stats["end"] - stats["start"]) if stats["start"] is not None else 0.0
+            summary[method] = {
+                "images": stats["images"],
+                "failed": stats["failed"],
+                "skipped": stats["skipped"],
+                "elapsed_s": round(elapsed, 3),
+                "images_per_s": round(stats["images"] / elapsed, 2) if elapsed else 0.0,
+                "mb_in_per_s": round(stats["bytes_in"] / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+                "mb_out_per_s": round(stats["bytes_out"] / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    f"p{pct}": round(self.percentile(stats["totals"], pct) * 1000, 2) for pct in (50, 95, 99)
+                },
+                "stages_ms": {
+                    stage: {f"p{pct}": round(self.percentile(values, pct) * 1000, 2) for pct in (50, 95, 99)}
+                    for stage, values in stats["stages"].items()
+                },
+            }
+        return summary
+    
+    def print_summary(self):
+        """Print the run summary."""
+        for method, stats in self.summary().items():
+            if not stats["images"] and not stats["failed"]:
+                continue
+            latency = stats["latency_ms"]
+            print(f"\n📊 {method}: {stats['images']} image(s) in {stats['elapsed_s']:.2f}s, "
+                  f"{stats['images_per_s']:.1f} images/s, {stats['mb_in_per_s']:.1f} MB/s in, "
+                  f"{stats['mb_out_per_s']:.1f} MB/s out")
+            print(f"  Latency p50/p95/p99: {latency['p50']:.1f} / {latency['p95']:.1f} / {latency['p99']:.1f} ms")
+            stages = ", ".join(f"{stage} {values['p50']:.1f}" for stage, values in stats["stages_ms"].items())
+            print(f"  Stage p50 (ms): {stages}")
+        if self.scheduler:
+            scheduler = self.scheduler
+            print(f"\n🗂 Scheduler: {scheduler['order']}, budget {scheduler['budget_mb']:g} MB; "
+                  f"{scheduler['deferred']} admission(s) deferred for memory, "
+                  f"peak {scheduler['peak_inflight_mb']:.1f} MB in flight over "
+                  f"{scheduler['peak_concurrency']} image(s)")
+            if "ring_slots" in scheduler:
+                print(f"  Shared memory: {scheduler['shared_frames']} frame(s) through {scheduler['ring_slots']} "
+                      f"slot(s) of {scheduler['slot_mb']:g} MB, {scheduler['unshared']} image(s) processed whole")
+            if scheduler.get("pool_restarts"):
+                print(f"  ⚠ Worker pool restarted {scheduler['pool_restarts']} time(s) after a worker died")
+        if self.path:
+            print(f"\n📝 Per-image metrics appended to {self.path}")
+    
+    def close(self):
+        if self._file:
+            if self.scheduler:
+                self._file.write(json.dumps({"scheduler": self.scheduler}) + "\n")
+            self._file.close()
+            self._file = None
 
 
 class ImageProcessor:
@@ -30,6 +342,59 @@ class ImageProcessor:
     
     SUPPORTED_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff', '.tif'}
     
+    # Reduced decoding keeps at least this many source pixels per output pixel
+    # (the same default Pillow uses for Image.thumbnail), so the final
+    # high-quality resize still has enough detail to work with.
+    REDUCING_GAP = 2.0
+    
+    # reducing_gap passed to Image.resize(); Pillow documents 3.0 as
+    # indistinguishable from a full LANCZOS resample in most cases
+    RESIZE_REDUCING_GAP = 3.0
+    
+    # Formats whose size depends on the quality setting (target_kb searches these)
+    LOSSY_FORMATS = {'.jpg', '.jpeg', '.webp', '.avif'}
+    
+    # Output formats selectable with the "format" setting. AVIF needs Pillow
+    # built with libavif (or the pillow-avif-plugin package).
+    OUTPUT_FORMATS = {'.jpg', '.jpeg', '.png', '.webp', '.avif', '.bmp', '.tiff', '.tif'}
+    
+    # Encoder effort ("effort" setting), trading CPU time against output
+    # bytes; what each level means per format is up to the backend's encode()
+    EFFORT_LEVELS = ("fast", "balanced", "max")
+    DEFAULT_EFFORT = "balanced"
+    
+    # Settings handed to the backend encoders (see encoder_options())
+    ENCODER_OPTIONS = ("effort", "progressive", "palette")
+    
+    # Per-image settings of a configuration dict (see effective_settings()),
+    # also accepted as keyword arguments by batch_process() and plan_batch()
+    CONFIG_KEYS = (
+        "method", "width", "height", "scale_percent", "quality", "maintain_aspect",
+        "target_kb", "min_ssim", "format", "output_format", "effort", "progressive", "palette",
+    )
+    
+    # Quality search bounds for target_kb
+    TARGET_MIN_QUALITY = 10
+    TARGET_MAX_TRIALS = 8
+    
+    # quality="auto": lowest of AUTO_QUALITIES whose SSIM against the resized
+    # image is at least AUTO_MIN_SSIM. The search encodes a mosaic of
+    # AUTO_SAMPLE_TILES tiles (AUTO_TILE px, a multiple of the 16 px JPEG/WebP
+    # block size) picked from detailed and flat areas, not the whole image;
+    # the quality it finds is then checked on the whole image.
+    AUTO_QUALITIES = (40, 50, 60, 70, 75, 80, 85, 90, 95)
+    AUTO_MIN_SSIM = 0.95
+    AUTO_TILE = 32
+    AUTO_SAMPLE_TILES = 16
+    # Quality used for lossless formats when quality is "auto"
+    DEFAULT_QUALITY = 85
+    
+    # Images encoded per input format to calibrate plan_batch() estimates
+    PLAN_SAMPLES = 3
+    
+    # Guards Image.MAX_IMAGE_PIXELS while it is lifted for memory-capped opens
+    _pixel_limit_lock = threading.Lock()
+    
     def __init__(self, input_dir: str, output_dir: str = None):
         """
         Initialize the ImageProcessor.
@@ -46,97 +411,743 @@ class ImageProcessor:
         
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Per-image result records from the most recent batch_process() call
+        self.last_results: List[Dict] = []
+        # RunMetrics.summary() of the most recent batch run
+        self.last_metrics: Dict = {}
+        # Scheduler decisions of the most recent batch_process() call
+        self.last_schedule: Dict = {}
     
     def get_image_files(self) -> List[Path]:
-        """Get all supported image files from input directory."""
+        """Get all supported image files from input directory, sorted by name."""
         image_files = []
         for file_path in self.input_dir.iterdir():
             if file_path.is_file() and file_path.suffix.lower() in self.SUPPORTED_FORMATS:
                 image_files.append(file_path)
-        return image_files
+        return sorted(image_files)
     
-    def resize_with_pillow(
-        self,
-        image_path: Path,
-        output_path: Path,
+    @staticmethod
+    def new_result(image_path: Path, output_path: Path) -> Dict:
+        """Create an empty per-image result record."""
+        return {
+            "name": image_path.name,
+            "source": str(image_path),
+            "output": str(output_path),
+            "success": False,
+            "original_size": None,
+            "new_size": None,
+            "original_kb": None,
+            "compressed_kb": None,
+            "reduction": None,
+            "quality": None,
+            "target_kb": None,
+            "trials": 0,
+            "skipped": False,
+            "variant": None,
+            "derived_from": None,
+            "duplicate_of": None,
+            "error": None,
+            "method": None,
+            "bytes_in": None,
+            "bytes_out": None,
+            "timings": {},
+        }
+    
+    @classmethod
+    def failed_result(cls, image_path: Path, output_path: Path, method: str, error: Exception) -> Dict:
+        """Result record for an image whose worker process died or could not send its result back."""
+        result = cls.new_result(image_path, output_path)
+        result["method"] = method
+        result["error"] = f"Worker process failed: {error}"
+        return result
+    
+    @staticmethod
+    def print_result(result: Dict):
+        """Print a per-image result record in the standard format."""
+        label = result["name"]
+        if result["variant"]:
+            label = f"{result['variant']}/{label}"
+        if result["skipped"]:
+            print(f"⏭ {label} (up to date)\n")
+        elif result["success"]:
+            new_width, new_height = result["new_size"]
+            print(f"✓ {label}")
+            if result["derived_from"]:
+                print(f"  Derived from: {result['derived_from']}")
+            if result["duplicate_of"]:
+                print(f"  Duplicate of: {result['duplicate_of']} (output linked, not re-encoded)")
+            print(f"  Original: {result['original_size']} ({result['original_kb']:.2f} KB)")
+            print(f"  New: {new_width}x{new_height} ({result['compressed_kb']:.2f} KB)")
+            if result["target_kb"]:
+                met = "met" if result["compressed_kb"] <= result["target_kb"] else "not met"
+                print(f"  Target: {result['target_kb']} KB ({met}), quality {result['quality']}, "
+                      f"{result['trials']} encoder trial(s)")
+            elif result["trials"] > 1:
+                print(f"  Auto quality: {result['quality']} ({result['trials']} encoder trials)")
+            print(f"  Size reduction: {result['reduction']:.2f}%\n")
+        else:
+            print(f"✗ Error processing {label}: {result['error']}\n")
+    
+    @staticmethod
+    def calculate_dimensions(
+        original_size: Tuple[int, int],
         width: Optional[int] = None,
         height: Optional[int] = None,
         scale_percent: Optional[int] = None,
-        quality: int = 85,
         maintain_aspect: bool = True
-    ) -> bool:
+    ) -> Tuple[int, int]:
         """
-        Resize and compress image using Pillow.
+        Calculate the output dimensions for an image.
         
         Args:
-            image_path: Path to input image
-            output_path: Path to save output image
+            original_size: (width, height) of the source image
             width: Target width in pixels
             height: Target height in pixels
             scale_percent: Scale percentage (e.g., 50 for 50%)
-            quality: Compression quality (1-100, higher is better)
             maintain_aspect: Whether to maintain aspect ratio
         
         Returns:
-            True if successful, False otherwise
+            Tuple of (new_width, new_height)
+        """
+        original_width, original_height = original_size
+        if scale_percent:
+            new_width = int(original_width * scale_percent / 100)
+            new_height = int(original_height * scale_percent / 100)
+        elif width and height:
+            new_width = width
+            new_height = height
+        elif width:
+            new_width = width
+            new_height = int(original_height * (width / original_width)) if maintain_aspect else original_height
+        elif height:
+            new_height = height
+            new_width = int(original_width * (height / original_height)) if maintain_aspect else original_width
+        else:
+            new_width, new_height = original_width, original_height
+        return new_width, new_height
+    
+    @classmethod
+    def reduction_factor(
+        cls,
+        original_size: Tuple[int, int],
+        new_size: Tuple[int, int],
+        max_factor: int = 8
+    ) -> int:
+        """
+        Get the largest power-of-two decode reduction that is safe for a resize.
+        
+        A factor is safe when the reduced image still has at least
+        REDUCING_GAP pixels per output pixel along both axes.
+        
+        Returns:
+            1, 2, 4 or 8 (1 means decode at full resolution)
+        """
+        ratio = min(
+            original_size[0] / max(new_size[0], 1),
+            original_size[1] / max(new_size[1], 1)
+        )
+        factor = 1
+        while factor < max_factor and factor * 2 * cls.REDUCING_GAP <= ratio:
+            factor *= 2
+        return factor
+    
+    @staticmethod
+    def parse_quality(value):
+        """
+        Validate a quality setting: an integer from 1 to 100, or "auto".
+        
+        Raises:
+            ValueError: If the value is neither
+        """
+        if isinstance(value, str) and value.strip().lower() == "auto":
+            return "auto"
+        quality = int(value)
+        if not 1 <= quality <= 100:
+            raise ValueError("Quality must be between 1 and 100 (or 'auto')")
+        return quality
+    
+    @classmethod
+    def parse_format(cls, value) -> Optional[str]:
+        """
+        Normalize an output format ("webp", ".WEBP") to a file extension.
+        
+        Returns:
+            The extension, or None for an empty value (keep the input format)
+        
+        Raises:
+            ValueError: If the format cannot be written
+        """
+        if not value:
+            return None
+        suffix = "." + str(value).strip().lower().lstrip(".")
+        if suffix not in cls.OUTPUT_FORMATS:
+            formats = ", ".join(sorted(s.lstrip(".") for s in cls.OUTPUT_FORMATS))
+            raise ValueError(f"Unsupported output format '{value}' (available: {formats})")
+        return suffix
+    
+    @staticmethod
+    def output_name(image_path: Path, output_format: Optional[str] = None) -> str:
+        """Output file name for an input: its own name, or its stem with output_format's extension."""
+        return image_path.stem + output_format if output_format else image_path.name
+    
+    @classmethod
+    def output_owners(cls, image_files: List[Path], output_format: Optional[str] = None) -> Dict[str, Path]:
+        """
+        Decide which input writes each output name when converted names collide.
+        
+        With output_format, a.jpg and a.png both map to a.webp; the first
+        input (in order) gets it, except that an input whose name is
+        unchanged (a.webp itself) always keeps its own name.
+        """
+        owners = {}
+        for image_path in sorted(image_files, key=lambda path: cls.output_name(path, output_format) != path.name):
+            owners.setdefault(cls.output_name(image_path, output_format), image_path)
+        return owners
+    
+    @classmethod
+    def encoder_options(cls, settings: Dict) -> Dict:
+        """Pick the keyword arguments for a backend's encode() from effective settings."""
+        return {key: settings[key] for key in cls.ENCODER_OPTIONS if settings.get(key)}
+    
+    @staticmethod
+    def effective_settings(config: Dict) -> Dict:
+        """
+        Normalize a configuration dict to the settings that affect output.
+        
+        Names and descriptions are dropped so that renaming a preset does
+        not invalidate processed images in the manifest. The output format
+        is read from "format" or, in settings that were already normalized,
+        "output_format".
+        """
+        settings = {
+            "method": config.get("method", "pillow").lower(),
+            "width": config.get("width"),
+            "height": config.get("height"),
+            "scale_percent": config.get("scale_percent"),
+            "quality": config.get("quality", 85),
+            "maintain_aspect": config.get("maintain_aspect", True),
+        }
+        # Only present when set, so older manifests stay valid
+        if config.get("target_kb"):
+            settings["target_kb"] = config["target_kb"]
+        if settings["quality"] == "auto":
+            settings["min_ssim"] = config.get("min_ssim") or ImageProcessor.AUTO_MIN_SSIM
+        output_format = config.get("format") or config.get("output_format")
+        if output_format:
+            settings["output_format"] = ImageProcessor.parse_format(output_format)
+        effort = config.get("effort") or ImageProcessor.DEFAULT_EFFORT
+        if effort not in ImageProcessor.EFFORT_LEVELS:
+            raise ValueError(f"Unknown effort '{effort}' (use {', '.join(ImageProcessor.EFFORT_LEVELS)})")
+        if effort != ImageProcessor.DEFAULT_EFFORT:
+            settings["effort"] = effort
+        if config.get("progressive"):
+            settings["progressive"] = True
+        if config.get("palette"):
+            # True means a full 256-color palette
+            colors = 256 if config["palette"] is True else int(config["palette"])
+            if not 2 <= colors <= 256:
+                raise ValueError("Palette size must be between 2 and 256 colors")
+            settings["palette"] = colors
+        return settings
+    
+    @classmethod
+    def merge_config(cls, config: Optional[Dict], overrides: Dict) -> Dict:
+        """
+        Combine a configuration dict with per-image settings given as keyword
+        arguments (e.g. batch_process(preset, width=800)).
+        
+        Raises:
+            TypeError: If an override is not one of CONFIG_KEYS
+        """
+        unknown = sorted(set(overrides) - set(cls.CONFIG_KEYS))
+        if unknown:
+            raise TypeError(f"Unknown setting(s): {', '.join(unknown)}")
+        return {**(config or {}), **overrides}
+    
+    @classmethod
+    def encode_to_target(
+        cls,
+        encode: Callable[[int], bytes],
+        suffix: str,
+        quality: int = 85,
+        target_kb: Optional[float] = None
+    ) -> Tuple[bytes, int, int]:
+        """
+        Encode at the given quality, lowering it until the output fits target_kb.
+        
+        The highest fitting quality is found by binary search between
+        TARGET_MIN_QUALITY and quality, with at most TARGET_MAX_TRIALS encodes.
+        Lossless formats are encoded once. If nothing fits, the smallest
+        encoding found is returned.
+        
+        Args:
+            encode: Function encoding the image in memory at a quality
+            suffix: Output file extension
+            quality: Starting (maximum) quality
+            target_kb: Maximum output size in KB (None = no target)
+        
+        Returns:
+            Tuple of (encoded bytes, quality used, number of encoder trials)
+        """
+        data = encode(quality)
+        trials = 1
+        if not target_kb or suffix.lower() not in cls.LOSSY_FORMATS:
+            return data, quality, trials
+        
+        limit = target_kb * 1024
+        if len(data) <= limit:
+            return data, quality, trials
+        
+        best = None
+        smallest = (data, quality)
+        low, high = cls.TARGET_MIN_QUALITY, quality - 1
+        while low <= high and trials < cls.TARGET_MAX_TRIALS:
+            middle = (low + high) // 2
+            candidate = encode(middle)
+            trials += 1
+            if len(candidate) <= limit:
+                best = (candidate, middle)
+                low = middle + 1
+            else:
+                if len(candidate) < len(smallest[0]):
+                    smallest = (candidate, middle)
+                high = middle - 1
+        
+        data, quality = best or smallest
+        return data, quality, trials
+    
+    @staticmethod
+    def ssim(first, second) -> float:
+        """
+        Mean structural similarity of two equally sized 8-bit luma planes.
+        
+        Uses 8x8 uniform windows at a stride of 4 (built from 4x4 block sums,
+        so windows straddle the 8 px JPEG block edges where blocking shows)
+        and the usual constants K1=0.01, K2=0.03. Edge pixels beyond a
+        multiple of 4 are ignored.
+        """
+        import numpy as np
+        
+        step = 4
+        height, width = (np.asarray(first).shape[0] // step) * step, (np.asarray(first).shape[1] // step) * step
+        if height < 2 * step or width < 2 * step:
+            return float(np.array_equal(np.asarray(first), np.asarray(second)))
+        a = np.asarray(first, dtype=np.float32)[:height, :width]
+        b = np.asarray(second, dtype=np.float32)[:height, :width]
+        
+        def local_mean(x):
+            blocks = x.reshape(height // step, step, width // step, step).sum(axis=(1, 3))
+            return (blocks[:-1, :-1] + blocks[1:, :-1] + blocks[:-1, 1:] + blocks[1:, 1:]) / (4 * step * step)
+        
+        c1 = (0.01 * 255) ** 2
+        c2 = (0.03 * 255) ** 2
+        mean_a, mean_b = local_mean(a), local_mean(b)
+        var_a = local_mean(a * a) - mean_a ** 2
+        var_b = local_mean(b * b) - mean_b ** 2
+        covariance = local_mean(a * b) - mean_a * mean_b
+        ssim_map = ((2 * mean_a * mean_b + c1) * (2 * covariance + c2)) / (
+            (mean_a ** 2 + mean_b ** 2 + c1) * (var_a + var_b + c2)
+        )
+        return float(ssim_map.mean())
+    
+    @classmethod
+    def sample_boxes(cls, luma) -> Optional[List[Tuple[int, int, int, int]]]:
+        """
+        Pick AUTO_SAMPLE_TILES tiles of a luma plane for auto-quality trials.
+        
+        Half are the most detailed tiles (highest variance, where artifacts
+        show first); the rest are spread evenly over the remaining tiles, so
+        flat areas (where banding shows) are represented too.
+        
+        Returns:
+            (left, top, right, bottom) boxes, or None if the image is small
+            enough to be used whole
+        """
+        import numpy as np
+        
+        tile = cls.AUTO_TILE
+        rows, cols = luma.shape[0] // tile, luma.shape[1] // tile
+        if rows * cols <= cls.AUTO_SAMPLE_TILES:
+            return None
+        # Every second pixel is enough to rank tiles by detail
+        half = tile // 2
+        blocks = np.asarray(luma[:rows * tile:2, :cols * tile:2], dtype=np.float32).reshape(rows, half, cols, half)
+        order = np.argsort(blocks.var(axis=(1, 3)).ravel())[::-1]
+        detailed = order[:cls.AUTO_SAMPLE_TILES // 2]
+        rest = np.sort(order[cls.AUTO_SAMPLE_TILES // 2:])
+        spread = rest[np.linspace(0, len(rest) - 1, cls.AUTO_SAMPLE_TILES - len(detailed)).astype(int)]
+        boxes = []
+        for index in sorted(np.concatenate([detailed, spread]).tolist()):
+            top, left = (index // cols) * tile, (index % cols) * tile
+            boxes.append((left, top, left + tile, top + tile))
+        return boxes
+    
+    @classmethod
+    def auto_quality(
+        cls,
+        backend,
+        img,
+        suffix: str,
+        min_ssim: float,
+        options: Optional[Dict] = None
+    ) -> Tuple[int, int, bytes]:
+        """
+        Find the lowest quality whose encoding keeps SSIM >= min_ssim.
+        
+        Binary search over AUTO_QUALITIES (at most 4 trials) encoding only a
+        small tile mosaic (see sample_boxes()). The mosaic leans towards
+        detailed tiles, whose SSIM reads higher than the whole image's, so
+        the whole image is then encoded at the quality found and compared
+        at full resolution, stepping up through AUTO_QUALITIES until it
+        passes. That encoding is returned for reuse as the output. Assumes
+        SSIM grows with quality.
+        
+        Args:
+            backend: ImageBackend that produced img (encodes and decodes it)
+            img: Resized image, in the backend's image type
+            suffix: Output file extension
+            min_ssim: SSIM threshold
+            options: Encoder options (see encoder_options())
+        
+        Returns:
+            Tuple of (quality, number of trial encodes including the
+            returned one, whole-image encoding at that quality)
+        """
+        options = options or {}
+        luma = backend.to_luma(img)
+        boxes = cls.sample_boxes(luma)
+        sample = backend.mosaic(img, boxes, cls.AUTO_TILE) if boxes else img
+        reference = backend.to_luma(sample) if boxes else luma
+        
+        qualities = cls.AUTO_QUALITIES
+        best = len(qualities) - 1
+        # Whole-image encodings by index into qualities
+        encoded = {}
+        low, high = 0, len(qualities) - 1
+        trials = 0
+        while low <= high:
+            middle = (low + high) // 2
+            trials += 1
+            data = backend.encode(sample, suffix, qualities[middle], **options)
+            if not boxes:
+                encoded[middle] = data
+            if cls.ssim(backend.decode_luma(data), reference) >= min_ssim:
+                best = middle
+                high = middle - 1
+            else:
+                low = middle + 1
+        
+        while True:
+            if best not in encoded:
+                trials += 1
+                encoded[best] = backend.encode(img, suffix, qualities[best], **options)
+            if not boxes or best == len(qualities) - 1:
+                break
+            if cls.ssim(backend.decode_luma(encoded[best]), luma) >= min_ssim:
+                break
+            best += 1
+        return qualities[best], trials, encoded[best]
+    
+    @classmethod
+    def encode_image(
+        cls,
+        backend,
+        img,
+        suffix: str,
+        quality=85,
+        target_kb: Optional[float] = None,
+        min_ssim: Optional[float] = None,
+        options: Optional[Dict] = None
+    ) -> Tuple[bytes, int, int]:
+        """
+        Encode a resized image with a backend, resolving quality="auto" first.
+        
+        Args:
+            backend: ImageBackend that produced img
+            img: Resized image, in the backend's image type
+            suffix: Output file extension
+            quality: Compression quality (1-100) or "auto" (see auto_quality())
+            target_kb: Maximum output size in KB (see encode_to_target())
+            min_ssim: SSIM threshold for "auto" (default: AUTO_MIN_SSIM)
+            options: Encoder options: effort, progressive, palette (see
+                encoder_options())
+        
+        Returns:
+            Tuple of (encoded bytes, quality used, number of encoder trials)
+        """
+        options = options or {}
+        trials = 0
+        encode = partial(backend.encode, img, suffix, **options)
+        if quality == "auto":
+            if suffix.lower() in cls.LOSSY_FORMATS:
+                quality, trials, verified = cls.auto_quality(
+                    backend, img, suffix, min_ssim or cls.AUTO_MIN_SSIM, options
+                )
+                # auto_quality() already encoded the whole image at this quality
+                # (counted in its trials), so encode_to_target() starts from it
+                trials -= 1
+                encode = partial(cls.reuse_encoding, encode, quality, verified)
+            else:
+                quality = cls.DEFAULT_QUALITY
+        data, used_quality, encode_trials = cls.encode_to_target(encode, suffix, quality, target_kb)
+        return data, used_quality, trials + encode_trials
+    
+    @staticmethod
+    def reuse_encoding(encode: Callable[[int], bytes], known_quality: int, known_data: bytes, quality: int) -> bytes:
+        """Encoder for encode_to_target() that returns known_data instead of encoding at known_quality again."""
+        return known_data if quality == known_quality else encode(quality)
+    
+    TEMP_SUFFIX = ".tmp"
+    
+    @classmethod
+    def temp_path(cls, path: Path) -> Path:
+        """Hidden temporary name next to path, unique per process and thread."""
+        return path.with_name(f".{path.name}.{os.getpid()}-{threading.get_ident()}{cls.TEMP_SUFFIX}")
+    
+    @classmethod
+    def write_atomic(cls, path: Path, data: bytes):
+        """
+        Write a file via a temporary file and an atomic rename.
+        
+        A reader (or a run killed mid-write) never sees a truncated file:
+        path holds either the old or the new content. Replacing the file
+        also detaches it from any hardlink shared with a duplicate's output.
         """
+        tmp_path = cls.temp_path(path)
         try:
-            with Image.open(image_path) as img:
-                original_size = img.size
-                
-                # Calculate new dimensions
-                if scale_percent:
-                    new_width = int(img.width * scale_percent / 100)
-                    new_height = int(img.height * scale_percent / 100)
-                elif width and height:
-                    new_width = width
-                    new_height = height
-                elif width:
-                    new_width = width
-                    new_height = int(img.height * (width / img.width)) if maintain_aspect else img.height
-                elif height:
-                    new_height = height
-                    new_width = int(img.width * (height / img.height)) if maintain_aspect else img.width
-                else:
-                    new_width, new_height = img.size
-                
-                # Resize image
-                resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                
-                # Save with compression
-                if image_path.suffix.lower() in ['.jpg', '.jpeg']:
-                    resized_img.save(output_path, 'JPEG', quality=quality, optimize=True)
-                elif image_path.suffix.lower() == '.png':
-                    resized_img.save(output_path, 'PNG', optimize=True, compress_level=9)
-                else:
-                    resized_img.save(output_path, quality=quality, optimize=True)
-                
-                # Calculate size reduction
-                original_size_kb = image_path.stat().st_size / 1024
-                compressed_size_kb = output_path.stat().st_size / 1024
-                reduction = ((original_size_kb - compressed_size_kb) / original_size_kb) * 100
-                
-                print(f"✓ {image_path.name}")
-                print(f"  Original: {original_size} ({original_size_kb:.2f} KB)")
-                print(f"  New: {new_width}x{new_height} ({compressed_size_kb:.2f} KB)")
-                print(f"  Size reduction: {reduction:.2f}%\n")
-                
-                return True
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    
+    @classmethod
+    def remove_stale_temp_files(cls, directory: Path) -> int:
+        """Delete temporary files left in directory by processes that no longer run."""
+        removed = 0
+        if os.name == "nt":
+            # os.kill() cannot probe a process on Windows
+            return removed
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return 0
+        for entry in entries:
+            if not (entry.name.startswith(".") and entry.name.endswith(cls.TEMP_SUFFIX)):
+                continue
+            owner = entry.name[:-len(cls.TEMP_SUFFIX)].rsplit(".", 1)[-1].split("-")[0]
+            if not owner.isdigit():
+                continue
+            try:
+                os.kill(int(owner), 0)
+                continue
+            except ProcessLookupError:
+                pass
+            except OSError:
+                continue
+            try:
+                os.unlink(entry.path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+    
+    @staticmethod
+    def write_output(result: Dict, output_path: Path, data: bytes, original_bytes: int, keep_encoded: bool = False):
+        """
+        Write encoded bytes and fill in file size statistics.
+        
+        With keep_encoded, nothing is written and the bytes are kept in
+        result["encoded"] for the caller (e.g. to add them to an archive).
+        """
+        if keep_encoded:
+            result["encoded"] = data
+        else:
+            ImageProcessor.write_atomic(output_path, data)
+        original_size_kb = original_bytes / 1024
+        compressed_size_kb = len(data) / 1024
+        result["original_kb"] = original_size_kb
+        result["compressed_kb"] = compressed_size_kb
+        result["reduction"] = ((original_size_kb - compressed_size_kb) / original_size_kb) * 100
+    
+    @classmethod
+    def open_image(cls, source, lift_pixel_limit: bool = False, name: Optional[str] = None):
+        """
+        Open an image with Pillow; only the header is read until pixels are used.
+        
+        Args:
+            source: Path or file object
+            lift_pixel_limit: Skip Pillow's decompression-bomb pixel limit, for
+                callers that check the decoded size against their own cap
+            name: Name of an in-memory image (e.g. its file path) for error
+                messages; Pillow would show the file object's repr
+        """
+        from PIL import Image, UnidentifiedImageError
+        
+        try:
+            if not lift_pixel_limit:
+                return Image.open(source)
+            with cls._pixel_limit_lock:
+                limit = Image.MAX_IMAGE_PIXELS
+                Image.MAX_IMAGE_PIXELS = None
+                try:
+                    return Image.open(source)
+                finally:
+                    Image.MAX_IMAGE_PIXELS = limit
+        except UnidentifiedImageError:
+            if isinstance(source, (str, os.PathLike)):
+                raise
+            raise UnidentifiedImageError(
+                f"cannot identify image file {name!r}" if name else "cannot identify image data"
+            ) from None
+    
+    @classmethod
+    def estimate_decoded_bytes(cls, image_path: Path) -> int:
+        """Estimate an image's decoded size from its header (width x height x channels)."""
+        with cls.open_image(image_path, lift_pixel_limit=True) as img:
+            return img.width * img.height * len(img.getbands())
+    
+    @staticmethod
+    def known_hash(source_hash: Optional[Tuple[int, int, str]], source_stat: Tuple[int, int]) -> Optional[str]:
+        """
+        Get a content hash computed earlier (see find_duplicates()), if still valid.
+        
+        Args:
+            source_hash: (size, mtime_ns, SHA-256) recorded when the file was hashed
+            source_stat: (size, mtime_ns) of the file now
+        
+        Returns:
+            The SHA-256, or None if there is none or the file changed since
+        """
+        if source_hash and tuple(source_hash[:2]) == tuple(source_stat):
+            return source_hash[2]
+        return None
+    
+    def render_file(
+        self,
+        image_path: Path,
+        output_path: Path,
+        settings: Optional[Dict] = None,
+        hash_source: bool = False,
+        max_memory_mb: Optional[float] = None,
+        keep_encoded: bool = False,
+        source_hash: Optional[Tuple[int, int, str]] = None
+    ) -> Dict:
+        """
+        Resize and compress an image file with any registered backend.
+        
+        The file is read into memory and processed with process_bytes(), so
+        files and in-memory images go through the same code. With
+        max_memory_mb, the decoder reads the file itself instead, so that
+        only pixel buffers (kept under the cap) are held in memory.
+        
+        Args:
+            image_path: Path to input image
+            output_path: Path to save output image; its extension sets the
+                output format
+            settings: Processing settings (see effective_settings()); the
+                defaults resize nothing and use the Pillow backend
+            hash_source: Also record the source size, mtime and content hash
+                (used by the processing manifest)
+            max_memory_mb: Memory cap for decoding and resizing (see
+                ImageBackend.render()); None means no cap
+            keep_encoded: Return the encoded bytes in result["encoded"]
+                instead of writing output_path
+            source_hash: (size, mtime_ns, SHA-256) of the source from an
+                earlier pass (see find_duplicates()); with hash_source, it is
+                used instead of hashing the file again while the file's size
+                and mtime still match
+        
+        Returns:
+            Result record (see new_result())
+        """
+        config = {**(settings or {}), "format": output_path.suffix, "max_memory_mb": max_memory_mb}
+        method = config.get("method", "pillow")
+        result = self.new_result(image_path, output_path)
+        result["method"] = method
+        timings = result["timings"]
+        started = time.perf_counter()
+        try:
+            # Stat before reading so a concurrent modification is never recorded as current
+            stat = image_path.stat()
+            if hash_source:
+                result["source_stat"] = (stat.st_size, stat.st_mtime_ns)
+                result["source_hash"] = self.known_hash(source_hash, result["source_stat"])
+            
+            if max_memory_mb:
+                if hash_source and not result["source_hash"]:
+                    result["source_hash"] = ProcessingManifest.file_hash(image_path)
+                    timings["hash"] = time.perf_counter() - started
+                encoded, metadata = get_backend(method).process_file(image_path, config)
+            else:
+                data = image_path.read_bytes()
+                timings["read"] = time.perf_counter() - started
+                if hash_source and not result["source_hash"]:
+                    hash_started = time.perf_counter()
+                    result["source_hash"] = hashlib.sha256(data).hexdigest()
+                    timings["hash"] = time.perf_counter() - hash_started
+                encoded, metadata = process_bytes(data, config, name=str(image_path))
+            self.apply_metadata(result, metadata)
+            
+            write_started = time.perf_counter()
+            self.write_output(result, output_path, encoded, metadata["bytes_in"], keep_encoded)
+            timings["write"] = time.perf_counter() - write_started
+            result["success"] = True
         except Exception as e:
-            print(f"✗ Error processing {image_path.name}: {str(e)}\n")
-            return False
+            result["error"] = str(e)
+        timings["total"] = time.perf_counter() - started
+        return result
     
-    def resize_with_opencv(
+    @staticmethod
+    def apply_metadata(result: Dict, metadata: Dict):
+        """Copy process_bytes() metadata into a result record."""
+        for key in ("original_size", "new_size", "quality", "trials", "target_kb", "bytes_in", "bytes_out"):
+            result[key] = metadata[key]
+        result["timings"].update(metadata["timings"])
+    
+    def pillow_result(
+        self,
+        image_path: Path,
+        output_path: Path,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        quality: int = 85,
+        maintain_aspect: bool = True,
+        target_kb: Optional[float] = None
+    ) -> Dict:
+        """
+        Resize and compress image using Pillow, returning a result record.
+        
+        Takes the same arguments as resize_with_pillow() but does not print.
+        
+        Returns:
+            Result record (see new_result())
+        """
+        return self.render_file(image_path, output_path, {
+            "method": "pillow",
+            "width": width,
+            "height": height,
+            "scale_percent": scale_percent,
+            "quality": quality,
+            "maintain_aspect": maintain_aspect,
+            "target_kb": target_kb,
+        })
+    
+    def resize_with_pillow(
         self,
         image_path: Path,
         output_path: Path,
         width: Optional[int] = None,
         height: Optional[int] = None,
         scale_percent: Optional[int] = None,
-        quality: int = 85
+        quality: int = 85,
+        maintain_aspect: bool = True,
+        target_kb: Optional[float] = None
     ) -> bool:
         """
-        Resize and compress image using OpenCV.
+        Resize and compress image using Pillow.
         
         Args:
             image_path: Path to input image
@@ -145,126 +1156,1926 @@ class ImageProcessor:
             height: Target height in pixels
             scale_percent: Scale percentage (e.g., 50 for 50%)
             quality: Compression quality (1-100, higher is better)
+            maintain_aspect: Whether to maintain aspect ratio
+            target_kb: Maximum output size in KB; quality is lowered from
+                `quality` until the image fits (JPEG/WEBP only)
         
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Read image
-            img = cv2.imread(str(image_path))
-            if img is None:
-                raise ValueError(f"Could not read image: {image_path}")
-            
-            original_height, original_width = img.shape[:2]
-            original_size = (original_width, original_height)
-            
-            # Calculate new dimensions
-            if scale_percent:
-                new_width = int(original_width * scale_percent / 100)
-                new_height = int(original_height * scale_percent / 100)
-            elif width and height:
-                new_width = width
-                new_height = height
-            elif width:
-                aspect_ratio = original_height / original_width
-                new_width = width
-                new_height = int(width * aspect_ratio)
-            elif height:
-                aspect_ratio = original_width / original_height
-                new_height = height
-                new_width = int(height * aspect_ratio)
-            else:
-                new_width, new_height = original_width, original_height
-            
-            # Resize image
-            resized_img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
-            
-            # Save with compression
-            if image_path.suffix.lower() in ['.jpg', '.jpeg']:
-                cv2.imwrite(str(output_path), resized_img, [cv2.IMWRITE_JPEG_QUALITY, quality])
-            elif image_path.suffix.lower() == '.png':
-                compression = int((100 - quality) / 10)  # Convert to PNG compression level (0-9)
-                cv2.imwrite(str(output_path), resized_img, [cv2.IMWRITE_PNG_COMPRESSION, compression])
-            else:
-                cv2.imwrite(str(output_path), resized_img)
-            
-            # Calculate size reduction
-            original_size_kb = image_path.stat().st_size / 1024
-            compressed_size_kb = output_path.stat().st_size / 1024
-            reduction = ((original_size_kb - compressed_size_kb) / original_size_kb) * 100
-            
-            print(f"✓ {image_path.name}")
-            print(f"  Original: {original_size} ({original_size_kb:.2f} KB)")
-            print(f"  New: {new_width}x{new_height} ({compressed_size_kb:.2f} KB)")
-            print(f"  Size reduction: {reduction:.2f}%\n")
-            
-            return True
-        except Exception as e:
-            print(f"✗ Error processing {image_path.name}: {str(e)}\n")
-            return False
+        result = self.pillow_result(
+            image_path, output_path, width, height, scale_percent, quality, maintain_aspect, target_kb
+        )
+        self.print_result(result)
+        return result["success"]
     
-    def batch_process(
+    def opencv_result(
         self,
-        method: str = "pillow",
+        image_path: Path,
+        output_path: Path,
         width: Optional[int] = None,
         height: Optional[int] = None,
         scale_percent: Optional[int] = None,
         quality: int = 85,
-        maintain_aspect: bool = True
-    ) -> Tuple[int, int]:
+        target_kb: Optional[float] = None
+    ) -> Dict:
         """
-        Process all images in the input directory.
+        Resize and compress image using OpenCV, returning a result record.
         
-        Args:
-            method: Processing method ('pillow' or 'opencv')
-            width: Target width in pixels
-            height: Target height in pixels
-            scale_percent: Scale percentage
-            quality: Compression quality (1-100)
-            maintain_aspect: Whether to maintain aspect ratio (Pillow only)
+        Takes the same arguments as resize_with_opencv() but does not print.
         
         Returns:
-            Tuple of (successful_count, failed_count)
+            Result record (see new_result())
         """
-        image_files = self.get_image_files()
+        return self.render_file(image_path, output_path, {
+            "method": "opencv",
+            "width": width,
+            "height": height,
+            "scale_percent": scale_percent,
+            "quality": quality,
+            "target_kb": target_kb,
+        })
+    
+    def resize_with_opencv(
+        self,
+        image_path: Path,
+        output_path: Path,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        quality: int = 85,
+        target_kb: Optional[float] = None
+    ) -> bool:
+        """
+        Resize and compress image using OpenCV.
+        
+        Args:
+            image_path: Path to input image
+            output_path: Path to save output image
+            width: Target width in pixels
+            height: Target height in pixels
+            scale_percent: Scale percentage (e.g., 50 for 50%)
+            quality: Compression quality (1-100, higher is better)
+            target_kb: Maximum output size in KB; quality is lowered from
+                `quality` until the image fits (JPEG/WEBP only)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        result = self.opencv_result(
+            image_path, output_path, width, height, scale_percent, quality, target_kb
+        )
+        self.print_result(result)
+        return result["success"]
+    
+    def process_image(
+        self,
+        image_path: Path,
+        settings: Optional[Dict] = None,
+        hash_source: bool = False,
+        max_memory_mb: Optional[float] = None,
+        keep_encoded: bool = False,
+        source_hash: Optional[Tuple[int, int, str]] = None
+    ) -> Dict:
+        """
+        Process a single image into the output directory.
+        
+        This is the unit of work handed to pool workers, so it must not print.
+        
+        Args:
+            image_path: Path to input image
+            settings: Processing settings (see effective_settings());
+                "output_format" is the output file extension (None = same as
+                the input)
+            hash_source, max_memory_mb, keep_encoded, source_hash: As for
+                render_file()
+        
+        Returns:
+            Result record (see new_result())
+        """
+        settings = settings or {}
+        output_path = self.output_dir / self.output_name(image_path, settings.get("output_format"))
+        return self.render_file(
+            image_path, output_path, settings, hash_source, max_memory_mb, keep_encoded, source_hash
+        )
+    
+    def iter_process(
+        self,
+        image_files: List[Path],
+        settings: Optional[Dict] = None,
+        workers: int = 1,
+        **options
+    ) -> Iterator[Dict]:
+        """
+        Process images, yielding one result record per image in input order.
+        
+        Args:
+            image_files: Images to process
+            settings: Processing settings (see effective_settings())
+            workers: Number of worker processes (1 = serial, 0 = one per CPU)
+            **options: hash_source, max_memory_mb and keep_encoded, as for
+                process_image()
+        
+        Yields:
+            Result records, in the same order as image_files
+        """
+        settings = settings or {}
+        
+        def failed(error: Exception, image_path: Path) -> Dict:
+            output_path = self.output_dir / self.output_name(image_path, settings.get("output_format"))
+            return self.failed_result(image_path, output_path, settings.get("method", "pillow"), error)
+        
+        yield from self._map_ordered(
+            partial(self.process_image, settings=settings, **options), workers, image_files, on_error=failed
+        )
+    
+    @staticmethod
+    def _map_ordered(func, workers: int, *iterables, on_error: Optional[Callable] = None) -> Iterator:
+        """
+        Apply func across the iterables, serially or on a process pool.
+        
+        Results are yielded in input order either way, which keeps output
+        deterministic. workers=0 means one process per CPU. When a call
+        fails in the pool (a worker process died, or its result could not be
+        sent back), on_error(exception, *args) supplies its result instead;
+        after a worker dies, the items it took down with the pool fail and
+        the rest run in a new pool. Without on_error, the exception is raised.
+        """
+        items = list(zip(*iterables))
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(items))
+        
+        if workers <= 1:
+            for args in items:
+                yield func(*args)
+            return
+        
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        from concurrent.futures.process import BrokenProcessPool
+        
+        running = {}
+        next_item = 0
+        # Re-order completed items so output stays deterministic
+        completed = {}
+        next_index = 0
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            while next_index < len(items):
+                broken = False
+                # No more items than workers, so a dying worker only takes down running ones
+                while next_item < len(items) and len(running) < workers:
+                    try:
+                        running[pool.submit(func, *items[next_item])] = next_item
+                    except BrokenProcessPool:
+                        # Replaced below; the item is submitted again to the new pool
+                        broken = True
+                        break
+                    next_item += 1
+                
+                done = wait(running, return_when=FIRST_COMPLETED).done if running else set()
+                broken = broken or any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+                if broken:
+                    # Every item in a broken pool fails; collect them all before replacing it
+                    done = wait(running).done
+                for future in done:
+                    index = running.pop(future)
+                    try:
+                        completed[index] = future.result()
+                    except Exception as e:
+                        if on_error is None:
+                            raise
+                        completed[index] = on_error(e, *items[index])
+                if broken:
+                    print("⚠ A worker process died; starting a new pool")
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                while next_index in completed:
+                    yield completed.pop(next_index)
+                    next_index += 1
+        finally:
+            pool.shutdown()
+    
+    @staticmethod
+    def _preserves_aspect(size: Tuple[int, int], original_size: Tuple[int, int]) -> bool:
+        """Check whether size has the original aspect ratio, up to rounding."""
+        return abs(size[0] * original_size[1] - size[1] * original_size[0]) <= max(original_size)
+    
+    def process_variants(
+        self,
+        image_path: Path,
+        variants: Dict[str, Dict],
+        source_hash: Optional[Tuple[int, int, str]] = None,
+        hash_source: bool = False
+    ) -> List[Dict]:
+        """
+        Render several configurations of one image from a single decode.
+        
+        Variants are rendered largest first with the Pillow backend. A smaller variant is
+        resized from the smallest already-rendered intermediate that keeps
+        the original aspect ratio and is at least REDUCING_GAP times its
+        target size on both axes, instead of from the full original. Each
+        variant is written to output_dir/<variant name>/. The shared read and
+        decode time is recorded in the timings of the first (largest) variant.
+        
+        Args:
+            image_path: Path to input image
+            variants: Mapping of variant name to configuration dict
+            source_hash: Content hash from an earlier pass (see render_file())
+            hash_source: Also record the source size, mtime and content hash
+        
+        Returns:
+            One result record per variant, in the order of variants
+        """
+        backend = get_backend("pillow")
+        from PIL import Image
+        
+        settings = {name: self.effective_settings(config) for name, config in variants.items()}
+        results = {}
+        for name in variants:
+            output_name = self.output_name(image_path, settings[name].get("output_format"))
+            results[name] = self.new_result(image_path, self.output_dir / name / output_name)
+            results[name]["variant"] = name
+            results[name]["method"] = "pillow"
+        
+        started = time.perf_counter()
+        shared_timings = {}
+        try:
+            stat = image_path.stat()
+            data = image_path.read_bytes()
+            shared_timings["read"] = time.perf_counter() - started
+            if hash_source:
+                source_stat = (stat.st_size, stat.st_mtime_ns)
+                digest = self.known_hash(source_hash, source_stat) or hashlib.sha256(data).hexdigest()
+                for result in results.values():
+                    result["source_stat"] = source_stat
+                    result["source_hash"] = digest
+            
+            with self.open_image(BytesIO(data), name=str(image_path)) as img:
+                original_size = img.size
+                targets = {
+                    name: self.calculate_dimensions(
+                        original_size,
+                        config.get("width"),
+                        config.get("height"),
+                        config.get("scale_percent"),
+                        config.get("maintain_aspect", True)
+                    )
+                    for name, config in variants.items()
+                }
+                
+                # One reduced decode that is still large enough for every variant
+                if img.format == 'JPEG':
+                    img.draft(None, (
+                        int(max(w for w, _ in targets.values()) * self.REDUCING_GAP),
+                        int(max(h for _, h in targets.values()) * self.REDUCING_GAP)
+                    ))
+                decode_started = time.perf_counter()
+                img.load()
+                shared_timings["decode"] = time.perf_counter() - decode_started
+                
+                intermediates = []
+                for name in sorted(targets, key=lambda n: targets[n][0] * targets[n][1], reverse=True):
+                    result = results[name]
+                    target = targets[name]
+                    timings = result["timings"]
+                    variant_started = time.perf_counter()
+                    if shared_timings:
+                        timings.update(shared_timings)
+                        variant_started = started
+                        shared_timings = {}
+                    try:
+                        source = img
+                        for inter_name, inter in reversed(intermediates):
+                            if (inter.width >= target[0] * self.REDUCING_GAP
+                                    and inter.height >= target[1] * self.REDUCING_GAP):
+                                source = inter
+                                result["derived_from"] = inter_name
+                                break
+                        
+                        resize_started = time.perf_counter()
+                        resized_img = source.resize(
+                            target,
+                            Image.Resampling.LANCZOS,
+                            reducing_gap=self.RESIZE_REDUCING_GAP
+                        )
+                        timings["resize"] = time.perf_counter() - resize_started
+                        output_path = Path(result["output"])
+                        output_path.parent.mkdir(parents=True, exist_ok=True)
+                        target_kb = variants[name].get("target_kb")
+                        encode_started = time.perf_counter()
+                        encoded, result["quality"], result["trials"] = self.encode_image(
+                            backend,
+                            resized_img,
+                            output_path.suffix,
+                            variants[name].get("quality", 85),
+                            target_kb,
+                            variants[name].get("min_ssim"),
+                            self.encoder_options(settings[name])
+                        )
+                        timings["encode"] = time.perf_counter() - encode_started
+                        
+                        result["target_kb"] = target_kb
+                        result["original_size"] = original_size
+                        result["new_size"] = target
+                        result["bytes_in"] = len(data)
+                        result["bytes_out"] = len(encoded)
+                        write_started = time.perf_counter()
+                        self.write_output(result, output_path, encoded, len(data))
+                        timings["write"] = time.perf_counter() - write_started
+                        result["success"] = True
+                        
+                        # Only downscales can stand in for the source: an
+                        # upscaled variant holds no more detail than img
+                        if (self._preserves_aspect(target, original_size)
+                                and target[0] <= img.width and target[1] <= img.height):
+                            intermediates.append((name, resized_img))
+                    except Exception as e:
+                        result["error"] = str(e)
+                    timings["total"] = time.perf_counter() - variant_started
+        except Exception as e:
+            for result in results.values():
+                if not result["success"]:
+                    result["error"] = str(e)
+        
+        return [results[name] for name in variants]
+    
+    @staticmethod
+    def find_duplicates(
+        image_files: List[Path],
+        source_hashes: Optional[Dict[Path, Tuple[int, int, str]]] = None
+    ) -> Dict[Path, Tuple[Path, str]]:
+        """
+        Find byte-identical copies among image files.
+        
+        Files are grouped by size first, so only files sharing a size with
+        another file are hashed (SHA-256, as in the manifest). Copies with a
+        different extension are kept apart, since they are encoded to
+        different output formats.
+        
+        Args:
+            image_files: Files to compare
+            source_hashes: Dict to fill with (size, mtime_ns, SHA-256) of every
+                file hashed, so processing can reuse the hash (see render_file())
+        
+        Returns:
+            Mapping of each copy to (first file with the same content, SHA-256)
+        """
+        by_size: Dict[int, List[Tuple[Path, os.stat_result]]] = {}
+        for image_path in image_files:
+            try:
+                stat = image_path.stat()
+            except OSError:
+                continue
+            by_size.setdefault(stat.st_size, []).append((image_path, stat))
+        
+        duplicates = {}
+        for group in by_size.values():
+            if len(group) < 2:
+                continue
+            originals = {}
+            for image_path, stat in sorted(group, key=lambda entry: entry[0]):
+                try:
+                    digest = ProcessingManifest.file_hash(image_path)
+                except OSError:
+                    continue
+                if source_hashes is not None:
+                    source_hashes[image_path] = (stat.st_size, stat.st_mtime_ns, digest)
+                key = (digest, image_path.suffix.lower())
+                if key in originals:
+                    duplicates[image_path] = (originals[key], digest)
+                else:
+                    originals[key] = image_path
+        return duplicates
+    
+    @staticmethod
+    def link_output(source: Path, target: Path):
+        """Materialize an output as a hardlink of another one, copying if linking fails."""
+        tmp_path = ImageProcessor.temp_path(target)
+        try:
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+    
+    def duplicate_result(
+        self,
+        original: Dict,
+        image_path: Path,
+        output_path: Path,
+        digest: str,
+        materialize: Optional[Callable[[], None]] = None
+    ) -> Dict:
+        """
+        Produce the result for a copy of an already processed image.
+        
+        The original's output is linked (or copied) to output_path instead of
+        encoding the image again.
+        
+        Args:
+            original: Result record of the image with the same content
+            image_path: Path of the copy
+            output_path: Output path for the copy
+            digest: SHA-256 of the copy's content
+            materialize: Stores the copy's output (default: link_output()
+                from the original's output file)
+        
+        Returns:
+            Result record (see new_result()) with duplicate_of set
+        """
+        result = self.new_result(image_path, output_path)
+        for key in ("variant", "method", "original_size", "new_size", "quality", "trials", "target_kb",
+                    "bytes_in", "bytes_out", "original_kb", "compressed_kb", "reduction"):
+            result[key] = original[key]
+        result["duplicate_of"] = original["name"]
+        if not original["success"]:
+            result["error"] = f"same content as {original['name']}, which failed: {original['error']}"
+            return result
+        
+        started = time.perf_counter()
+        try:
+            stat = image_path.stat()
+            result["source_stat"] = (stat.st_size, stat.st_mtime_ns)
+            result["source_hash"] = digest
+            if materialize:
+                materialize()
+            else:
+                self.link_output(Path(original["output"]), output_path)
+            result["success"] = True
+        except Exception as e:
+            result["error"] = str(e)
+        result["timings"]["write"] = time.perf_counter() - started
+        return result
+    
+    def plan_batch(
+        self,
+        config: Optional[Dict] = None,
+        workers: int = 1,
+        force: bool = False,
+        samples: int = PLAN_SAMPLES,
+        **overrides
+    ) -> Dict:
+        """
+        Estimate the time and output size of batch_process() without running it.
+        
+        Only image headers are read to get each image's format and
+        dimensions; the output dimensions come from calculate_dimensions(),
+        as in a real run. A few images per format (those closest to the
+        median pixel count) are then processed in memory, and their time per
+        source pixel and output bytes per output pixel are extrapolated to
+        the rest of that format. Nothing is written.
+        
+        Args:
+            config, workers, force, **overrides: As for batch_process()
+            samples: Number of images encoded per input format
+        
+        Returns:
+            Plan dict with per-format estimates ("formats") and totals
+        """
+        started = time.perf_counter()
+        settings = self.effective_settings(self.merge_config(config, overrides))
+        get_backend(settings["method"])
+        manifest = ProcessingManifest(self.output_dir)
+        config_hash = manifest.config_hash(settings)
+        
+        formats: Dict[str, Dict] = {}
+        skipped = 0
+        unreadable = []
+        for image_path in self.get_image_files():
+            output_path = self.output_dir / self.output_name(image_path, settings.get("output_format"))
+            if not force and manifest.is_up_to_date(image_path, output_path, config_hash):
+                skipped += 1
+                continue
+            try:
+                with self.open_image(image_path, lift_pixel_limit=True) as img:
+                    image_format, original_size = img.format, img.size
+                bytes_in = image_path.stat().st_size
+            except Exception as e:
+                unreadable.append({"name": image_path.name, "error": str(e)})
+                continue
+            new_size = self.calculate_dimensions(
+                original_size, settings["width"], settings["height"], settings["scale_percent"],
+                settings["maintain_aspect"]
+            )
+            group = formats.setdefault(image_format, {"images": []})
+            group["images"].append((image_path, original_size[0] * original_size[1], new_size[0] * new_size[1], bytes_in))
+        
+        config = {**settings, "format": settings.get("output_format"), "max_memory_mb": None}
+        sampled = 0
+        for image_format, group in formats.items():
+            images = group.pop("images")
+            by_pixels = sorted(images, key=lambda image: image[1])
+            middle = len(by_pixels) // 2
+            low = max(0, middle - samples // 2)
+            sample = by_pixels[low:low + samples]
+            
+            # Calibrate on the sample: seconds per source pixel, bytes per output pixel
+            sample_seconds = sample_source_pixels = sample_bytes = sample_output_pixels = group_sampled = 0
+            for image_path, source_pixels, output_pixels, _ in sample:
+                sample_started = time.perf_counter()
+                try:
+                    encoded, _ = process_bytes(image_path.read_bytes(), config)
+                except Exception:
+                    continue
+                sample_seconds += time.perf_counter() - sample_started
+                sample_source_pixels += source_pixels
+                sample_bytes += len(encoded)
+                sample_output_pixels += output_pixels
+                group_sampled += 1
+            sampled += group_sampled
+            
+            source_pixels = sum(image[1] for image in images)
+            output_pixels = sum(image[2] for image in images)
+            group.update({
+                "images": len(images),
+                "bytes_in": sum(image[3] for image in images),
+                "source_pixels": source_pixels,
+                "output_pixels": output_pixels,
+                "sampled": group_sampled,
+                "est_seconds": source_pixels * sample_seconds / sample_source_pixels if sample_source_pixels else None,
+                "est_bytes_out": int(output_pixels * sample_bytes / sample_output_pixels) if sample_output_pixels else None,
+            })
+        
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        pending = sum(group["images"] for group in formats.values())
+        est_seconds = sum(group["est_seconds"] or 0 for group in formats.values())
+        return {
+            "settings": settings,
+            "images": pending + skipped + len(unreadable),
+            "pending": pending,
+            "skipped": skipped,
+            "unreadable": unreadable,
+            "formats": formats,
+            "bytes_in": sum(group["bytes_in"] for group in formats.values()),
+            "est_bytes_out": sum(group["est_bytes_out"] or 0 for group in formats.values()),
+            "est_seconds": est_seconds,
+            "workers": workers,
+            "est_wall_seconds": est_seconds / max(1, min(workers, pending)),
+            "sampled": sampled,
+            "plan_seconds": time.perf_counter() - started,
+        }
+    
+    @staticmethod
+    def print_plan(plan: Dict):
+        """Print a plan from plan_batch() as a per-format table."""
+        print(f"\nFound {plan['images']} image(s), {plan['pending']} to process")
+        if plan["skipped"]:
+            print(f"Skipping {plan['skipped']} up-to-date image(s) (force=True re-processes them)")
+        for entry in plan["unreadable"]:
+            print(f"✗ Cannot read header of {entry['name']}: {entry['error']}")
+        
+        print("\n" + "=" * 72)
+        print(f"{'Format':<8}{'Images':>8}{'Megapixels':>12}{'Input MB':>11}{'Output MB (est)':>17}{'Time s (est)':>16}")
+        print("=" * 72)
+        
+        def estimate(value, scale):
+            return "n/a" if value is None else f"{value / scale:.1f}"
+        
+        for image_format, group in sorted(plan["formats"].items()):
+            print(f"{image_format:<8}{group['images']:>8}{group['source_pixels'] / 1e6:>12.1f}"
+                  f"{group['bytes_in'] / 1048576:>11.1f}{estimate(group['est_bytes_out'], 1048576):>17}"
+                  f"{estimate(group['est_seconds'], 1):>16}")
+        print("-" * 72)
+        print(f"{'Total':<8}{plan['pending']:>8}"
+              f"{sum(g['source_pixels'] for g in plan['formats'].values()) / 1e6:>12.1f}"
+              f"{plan['bytes_in'] / 1048576:>11.1f}{plan['est_bytes_out'] / 1048576:>17.1f}"
+              f"{plan['est_seconds']:>16.1f}")
+        print("=" * 72)
+        print(f"\nEstimated wall time with {plan['workers']} worker(s): {plan['est_wall_seconds']:.1f} s")
+        print(f"Estimates from {plan['sampled']} sampled image(s); planned in {plan['plan_seconds']:.2f} s")
+    
+    @staticmethod
+    def report_interrupted(manifest: ProcessingManifest, resume: bool):
+        """Tell the user about a journal left by an interrupted run."""
+        if not manifest.interrupted:
+            return
+        if resume:
+            print(f"↻ Resuming: {len(manifest.interrupted)} image(s) finished by the interrupted run "
+                  f"in {manifest.path.parent} are skipped if still up to date")
+        else:
+            print(f"⚠ A previous run in {manifest.path.parent} was interrupted after "
+                  f"{len(manifest.interrupted)} image(s); use resume (--resume) to skip them")
+    
+    def batch_process(
+        self,
+        config: Optional[Dict] = None,
+        workers: int = 1,
+        mode: str = "scheduled",
+        force: bool = False,
+        resume: bool = False,
+        archive: Optional[str] = None,
+        max_inflight_mb: float = 512,
+        max_memory_mb: Optional[float] = None,
+        quiet: bool = False,
+        metrics_path: Optional[str] = None,
+        **overrides
+    ) -> Tuple[int, int]:
+        """
+        Process all images in the input directory.
+        
+        Args:
+            config: Per-image settings (e.g. a preset), see effective_settings():
+                method: Processing method, a registered backend name ('pillow' or 'opencv')
+                width: Target width in pixels
+                height: Target height in pixels
+                scale_percent: Scale percentage
+                quality: Compression quality (1-100), or "auto" for the lowest
+                    quality that keeps SSIM >= min_ssim (JPEG/WEBP)
+                maintain_aspect: Whether to maintain aspect ratio (Pillow only)
+                target_kb: Maximum output size in KB (JPEG/WEBP quality is lowered to fit)
+                min_ssim: SSIM threshold for quality="auto" (default: AUTO_MIN_SSIM)
+                format: Convert outputs to this format, e.g. "webp" or "avif"
+                    (see OUTPUT_FORMATS; default: keep each input's format).
+                    Inputs whose converted names collide (a.jpg and a.png as
+                    a.webp) fail, except the first
+                effort: Encoder effort, "fast", "balanced" (default) or "max":
+                    CPU time traded against output bytes
+                progressive: Write progressive JPEGs
+                palette: Quantize PNG output to at most this many colors (lossy)
+            workers: Number of workers (1 = serial, 0 = one per CPU)
+            mode: How images are scheduled on the workers (see
+                batch_scheduler.BatchScheduler):
+                "scheduled": worker processes, largest images first, started
+                    only while their estimated decoded size fits in
+                    max_inflight_mb (default)
+                "pipeline": overlap reading, processing and writing in a
+                    staged pipeline; workers are threads
+                "shape_batches": OpenCV in batches of same-size images, on
+                    `workers` threads. Meant for camera dumps where most
+                    frames share one resolution; the method is always "opencv"
+                "shared_memory": decode in this process and resize and
+                    encode in `workers` processes, passing decoded frames
+                    through shared memory instead of pickling them
+            force: Re-process every image, even if its output is up to date
+            resume: Continue a run that was killed: images it finished (per
+                the manifest journal) are skipped, even with force
+            archive: Write all outputs into this .zip, .tar or .pack file
+                instead of separate files (see output_archive). Entries are
+                named like the output files; every image is processed, as
+                the manifest only tracks separate files
+            max_inflight_mb: Memory budget for images in flight
+            max_memory_mb: Memory cap per image for decoding and resizing.
+                Large uncompressed images are decoded in strips to stay under
+                it, and images that cannot fit fail before any decode
+            quiet: Only print failed images and the summary
+            metrics_path: JSON Lines file to append per-image metrics to
+                (see RunMetrics); the summary is kept in self.last_metrics
+            **overrides: Settings that replace those in config, e.g.
+                batch_process(width=800, quality=80)
+        
+        Returns:
+            Tuple of (successful_count, failed_count). Images skipped because
+            their output was up to date count as neither; the per-image result
+            records (including skipped ones) are kept in self.last_results.
+        """
+        from batch_scheduler import BatchScheduler
+        
+        if mode not in BatchScheduler.MODES:
+            raise ValueError(f"Unknown batch mode '{mode}' (use {', '.join(BatchScheduler.MODES)})")
+        config = self.merge_config(config, overrides)
+        if mode == "shape_batches":
+            config["method"] = "opencv"
+        
+        self.last_results = []
+        image_files = self.get_image_files()
         
         if not image_files:
             print(f"No supported image files found in {self.input_dir}")
             return 0, 0
         
-        print(f"\nFound {len(image_files)} image(s) to process")
-        print(f"Output directory: {self.output_dir}\n")
+        settings = self.effective_settings(config)
+        # Load the backend up front so a missing library fails once, not per image
+        get_backend(settings["method"])
+        self.remove_stale_temp_files(self.output_dir)
+        manifest = ProcessingManifest(self.output_dir, resume=resume and not archive)
+        config_hash = manifest.config_hash(settings)
+        self.report_interrupted(manifest, resume)
+        
+        skipped = []
+        pending = []
+        collisions = []
+        owners = self.output_owners(image_files, settings.get("output_format"))
+        for image_path in image_files:
+            output_path = self.output_dir / self.output_name(image_path, settings.get("output_format"))
+            if owners[output_path.name] != image_path:
+                result = self.new_result(image_path, output_path)
+                result["method"] = settings["method"]
+                result["error"] = f"Output {output_path.name} is already written for {owners[output_path.name].name}"
+                collisions.append(result)
+                continue
+            check = not force or manifest.is_resumed(image_path)
+            if check and not archive and manifest.is_up_to_date(image_path, output_path, config_hash):
+                result = self.new_result(image_path, output_path)
+                result["method"] = settings["method"]
+                result["success"] = True
+                result["skipped"] = True
+                skipped.append(result)
+            else:
+                pending.append(image_path)
+        
+        # Identical copies are not encoded; they get the original's output
+        source_hashes = {}
+        duplicates = self.find_duplicates(pending, source_hashes)
+        copies: Dict[str, List[Tuple[Path, str]]] = {}
+        for image_path, (original_path, digest) in duplicates.items():
+            copies.setdefault(str(original_path), []).append((image_path, digest))
+        pending = [image_path for image_path in pending if image_path not in duplicates]
+        
+        print(f"\nFound {len(image_files)} image(s), {len(pending) + len(duplicates)} to process")
+        if skipped:
+            print(f"Skipping {len(skipped)} up-to-date image(s) (force=True re-processes them)")
+        if duplicates:
+            print(f"{len(duplicates)} image(s) are copies of other inputs and will be linked, not encoded")
+        if collisions:
+            print(f"⚠ {len(collisions)} image(s) would overwrite another image's {settings['output_format']} output")
+        print(f"Output directory: {archive or self.output_dir}\n")
         print("=" * 60)
         
         successful = 0
         failed = 0
+        metrics = RunMetrics(metrics_path)
+        # Encoded images come back to this process and are streamed into the archive
+        writer = open_writer(archive) if archive else None
+        
+        scheduler = BatchScheduler(
+            self, settings, workers=workers, max_inflight_mb=max_inflight_mb, max_memory_mb=max_memory_mb,
+            hash_source=True, keep_encoded=bool(writer), stats=metrics.scheduler, source_hashes=source_hashes
+        )
+        results = scheduler.run(mode, pending)
+        
+        def store(result: Dict, encoded: bytes, add: Callable[[], None]):
+            """Add an encoded image to the archive, timing it as the write stage."""
+            write_started = time.perf_counter()
+            try:
+                add()
+                result["output"] = f"{archive}:{Path(result['output']).name}"
+            except Exception as e:
+                result["success"] = False
+                result["error"] = f"Could not add to archive: {e}"
+            result["timings"]["write"] = result["timings"].get("write", 0.0) + time.perf_counter() - write_started
+        
+        def with_copies(results):
+            for result in results:
+                encoded = result.pop("encoded", None)
+                entry = Path(result["output"]).name
+                if encoded is not None:
+                    store(result, encoded, partial(writer.add, entry, encoded, result["name"]))
+                yield result
+                for image_path, digest in copies.get(result["source"], []):
+                    output_path = self.output_dir / self.output_name(image_path, settings.get("output_format"))
+                    if writer:
+                        copy = self.duplicate_result(
+                            result, image_path, output_path, digest,
+                            materialize=partial(writer.add_copy, output_path.name, entry, encoded, image_path.name)
+                        )
+                        copy["output"] = f"{archive}:{output_path.name}"
+                    else:
+                        copy = self.duplicate_result(result, image_path, output_path, digest)
+                    yield copy
+        
+        try:
+            # Name collisions fail up front, without being processed
+            for result in chain(collisions, with_copies(results)):
+                self.last_results.append(result)
+                metrics.record(result)
+                if not quiet or not result["success"]:
+                    self.print_result(result)
+                
+                if result["success"]:
+                    successful += 1
+                    if not writer:
+                        manifest.update(result, config_hash)
+                else:
+                    failed += 1
+        finally:
+            if writer:
+                writer.close()
+            # Keep progress from interrupted runs
+            manifest.save()
+            for result in skipped:
+                metrics.record(result)
+            metrics.close()
+        
+        self.last_results.extend(skipped)
+        self.last_results.sort(key=lambda r: r["source"])
+        self.last_metrics = metrics.summary()
+        self.last_schedule = metrics.scheduler
+        linked = sum(1 for result in self.last_results if result["duplicate_of"] and result["success"])
+        
+        print("=" * 60)
+        print(f"\nProcessing complete!")
+        print(f"✓ Successful: {successful}")
+        print(f"✗ Failed: {failed}")
+        print(f"⏭ Skipped (up to date): {len(skipped)}")
+        if duplicates:
+            print(f"♻ Duplicates linked: {linked} ({linked} encode(s) saved)")
+        metrics.print_summary()
+        print(f"\nProcessed images saved to: {archive or self.output_dir}")
+        
+        return successful, failed
+    
+    def batch_process_variants(
+        self,
+        variants: Dict[str, Dict],
+        workers: int = 1,
+        force: bool = False,
+        quiet: bool = False,
+        metrics_path: Optional[str] = None,
+        resume: bool = False
+    ) -> Tuple[int, int]:
+        """
+        Render several configurations of every image, decoding each image once.
+        
+        Args:
+            variants: Mapping of variant name (e.g. a preset key) to
+                configuration dict; each is written to output_dir/<name>/
+            workers: Number of worker processes (1 = serial, 0 = one per CPU)
+            force: Re-render every variant, even if its output is up to date
+            quiet: Only print failed outputs and the summary
+            metrics_path: JSON Lines file to append per-output metrics to
+            resume: Continue a run that was killed (see batch_process())
+        
+        Returns:
+            Tuple of (successful_count, failed_count), counted per variant
+            output. Result records are kept in self.last_results.
+        """
+        self.last_results = []
+        image_files = self.get_image_files()
         
+        if not image_files:
+            print(f"No supported image files found in {self.input_dir}")
+            return 0, 0
+        
+        # Variants are always rendered with Pillow
+        get_backend("pillow")
+        manifests = {}
+        config_hashes = {}
+        output_formats = {}
+        for name, config in variants.items():
+            (self.output_dir / name).mkdir(parents=True, exist_ok=True)
+            self.remove_stale_temp_files(self.output_dir / name)
+            manifests[name] = ProcessingManifest(self.output_dir / name, resume=resume)
+            self.report_interrupted(manifests[name], resume)
+            settings = self.effective_settings({**config, "method": "pillow"})
+            config_hashes[name] = ProcessingManifest.config_hash(settings)
+            output_formats[name] = settings.get("output_format")
+        
+        skipped = []
+        collisions = []
+        owners = {name: self.output_owners(image_files, output_formats[name]) for name in variants}
+        pending_files = []
+        pending_variants = []
         for image_path in image_files:
-            output_path = self.output_dir / image_path.name
-            
-            if method.lower() == "opencv":
-                success = self.resize_with_opencv(
-                    image_path, output_path, width, height, scale_percent, quality
-                )
-            else:  # Default to Pillow
-                success = self.resize_with_pillow(
-                    image_path, output_path, width, height, scale_percent, quality, maintain_aspect
-                )
-            
-            if success:
-                successful += 1
-            else:
-                failed += 1
+            stale = {}
+            for name, config in variants.items():
+                output_path = self.output_dir / name / self.output_name(image_path, output_formats[name])
+                owner = owners[name][output_path.name]
+                if owner != image_path:
+                    result = self.new_result(image_path, output_path)
+                    result["variant"] = name
+                    result["method"] = "pillow"
+                    result["error"] = f"Output {output_path.name} is already written for {owner.name}"
+                    collisions.append(result)
+                    continue
+                check = not force or manifests[name].is_resumed(image_path)
+                if check and manifests[name].is_up_to_date(image_path, output_path, config_hashes[name]):
+                    result = self.new_result(image_path, output_path)
+                    result["variant"] = name
+                    result["method"] = "pillow"
+                    result["success"] = True
+                    result["skipped"] = True
+                    skipped.append(result)
+                else:
+                    stale[name] = config
+            if stale:
+                pending_files.append(image_path)
+                pending_variants.append(stale)
+        
+        # A copy is linked when its original renders every variant the copy needs
+        stale_by_file = dict(zip(pending_files, pending_variants))
+        copies: Dict[str, List[Tuple[Path, str, Dict]]] = {}
+        linked_files = set()
+        source_hashes = {}
+        for image_path, (original_path, digest) in self.find_duplicates(pending_files, source_hashes).items():
+            if original_path in linked_files or not set(stale_by_file[image_path]) <= set(stale_by_file[original_path]):
+                continue
+            copies.setdefault(str(original_path), []).append((image_path, digest, stale_by_file[image_path]))
+            linked_files.add(image_path)
+        pending_variants = [stale_by_file[path] for path in pending_files if path not in linked_files]
+        pending_files = [path for path in pending_files if path not in linked_files]
+        
+        print(f"\nFound {len(image_files)} image(s), {len(pending_files) + len(linked_files)} to process")
+        print(f"Variants: {', '.join(variants)}")
+        if skipped:
+            print(f"Skipping {len(skipped)} up-to-date variant output(s) (force=True re-processes them)")
+        if linked_files:
+            print(f"{len(linked_files)} image(s) are copies of other inputs and will be linked, not encoded")
+        if collisions:
+            print(f"⚠ {len(collisions)} variant output(s) would overwrite another image's converted output")
+        print(f"Output directory: {self.output_dir}\n")
+        print("=" * 60)
+        
+        def worker_failed(
+            error: Exception, image_path: Path, stale: Dict[str, Dict], source_hash: Optional[Tuple] = None
+        ) -> List[Dict]:
+            """Failed results for every variant of an image whose worker died."""
+            results = []
+            for name in stale:
+                output_path = self.output_dir / name / self.output_name(image_path, output_formats[name])
+                result = self.failed_result(image_path, output_path, "pillow", error)
+                result["variant"] = name
+                results.append(result)
+            return results
+        
+        successful = 0
+        failed = 0
+        metrics = RunMetrics(metrics_path)
+        
+        try:
+            # Name collisions fail up front, without being processed
+            for image_results in chain([collisions], self._map_ordered(
+                partial(self.process_variants, hash_source=True),
+                workers,
+                pending_files,
+                pending_variants,
+                [source_hashes.get(path) for path in pending_files],
+                on_error=worker_failed
+            )):
+                for original in list(image_results):
+                    for image_path, digest, stale in copies.get(original["source"], []):
+                        if original["variant"] in stale:
+                            output_name = self.output_name(image_path, output_formats[original["variant"]])
+                            output_path = self.output_dir / original["variant"] / output_name
+                            image_results.append(self.duplicate_result(original, image_path, output_path, digest))
+                for result in image_results:
+                    self.last_results.append(result)
+                    metrics.record(result)
+                    if not quiet or not result["success"]:
+                        self.print_result(result)
+                    
+                    if result["success"]:
+                        successful += 1
+                        manifests[result["variant"]].update(result, config_hashes[result["variant"]])
+                    else:
+                        failed += 1
+        finally:
+            for manifest in manifests.values():
+                manifest.save()
+            for result in skipped:
+                metrics.record(result)
+            metrics.close()
+        
+        self.last_results.extend(skipped)
+        self.last_results.sort(key=lambda r: (r["source"], r["variant"]))
+        self.last_metrics = metrics.summary()
+        linked = sum(1 for result in self.last_results if result["duplicate_of"] and result["success"])
         
         print("=" * 60)
         print(f"\nProcessing complete!")
         print(f"✓ Successful: {successful}")
         print(f"✗ Failed: {failed}")
+        print(f"⏭ Skipped (up to date): {len(skipped)}")
+        if linked_files:
+            print(f"♻ Duplicates linked: {linked} ({linked} encode(s) saved)")
+        metrics.print_summary()
         print(f"\nProcessed images saved to: {self.output_dir}")
         
         return successful, failed
 
 
+class ImageBackend(ABC):
+    """
+    Base class for image processing backends.
+    
+    Backends are registered by method name with register_backend() and
+    created on first use by get_backend(). Each backend imports its libraries
+    in load(), so importing this module stays fast and only the backend that
+    is actually used needs to be installed. A subclass must implement every
+    abstract method; register_backend() rejects one that does not.
+    """
+    
+    name = ""
+    requirements = ""
+    
+    # Output extension used for each input format when no format is requested
+    FORMAT_SUFFIXES = {
+        'JPEG': '.jpg',
+        'MPO': '.jpg',
+        'PNG': '.png',
+        'WEBP': '.webp',
+        'TIFF': '.tiff',
+        'BMP': '.bmp',
+    }
+    
+    def __init__(self):
+        self.load()
+    
+    def load(self):
+        """Import the libraries this backend needs (raises ImportError if missing)."""
+    
+    @classmethod
+    @abstractmethod
+    def encode(
+        cls,
+        img,
+        suffix: str,
+        quality: int,
+        effort: Optional[str] = None,
+        progressive: bool = False,
+        palette: Optional[int] = None
+    ) -> bytes:
+        """Encode an image (as returned by render() or resize_frame()) in memory for a file extension."""
+    
+    def default_suffix(self, input_format: str) -> str:
+        """Get the output extension for an input format (Pillow format name)."""
+        if input_format not in self.FORMAT_SUFFIXES:
+            raise ValueError(f"No default output format for {input_format} input; set 'format' in the config")
+        return self.FORMAT_SUFFIXES[input_format]
+    
+    def process_bytes(self, data: bytes, config: Dict, name: Optional[str] = None) -> Tuple[bytes, Dict]:
+        """
+        Resize and compress an encoded image held in memory.
+        
+        Args:
+            data: Encoded input image (bytes, bytearray or memoryview; not copied)
+            config: Configuration dict (width, height, scale_percent, quality,
+                maintain_aspect, target_kb), optionally with "format", the
+                output extension (e.g. ".webp"; defaults to the input format)
+                and "max_memory_mb" (see render())
+            name: Name of the image (e.g. its file path) for error messages
+        
+        Returns:
+            Tuple of (encoded output bytes, metadata dict with original_size,
+            new_size, quality, trials, target_kb, format, bytes_in, bytes_out
+            and timings, the seconds spent in each stage: decode, resize, encode)
+        """
+        encoded, metadata = self._render_config(data, config, name)
+        metadata["bytes_in"] = len(data)
+        metadata["bytes_out"] = len(encoded)
+        return encoded, metadata
+    
+    def process_file(self, path: Path, config: Dict) -> Tuple[bytes, Dict]:
+        """
+        Like process_bytes(), but the decoder reads the file itself.
+        
+        Used with "max_memory_mb" so that large files are never held in
+        memory as a whole.
+        """
+        encoded, metadata = self._render_config(Path(path), config)
+        metadata["bytes_in"] = Path(path).stat().st_size
+        metadata["bytes_out"] = len(encoded)
+        return encoded, metadata
+    
+    def _render_config(self, source, config: Dict, name: Optional[str] = None) -> Tuple[bytes, Dict]:
+        """Call render() with the settings from a configuration dict."""
+        settings = ImageProcessor.effective_settings(config)
+        suffix = config.get("format")
+        if suffix:
+            suffix = "." + suffix.lower().lstrip(".")
+        return self.render(
+            source,
+            suffix,
+            settings["width"],
+            settings["height"],
+            settings["scale_percent"],
+            settings["quality"],
+            settings["maintain_aspect"],
+            settings.get("target_kb"),
+            config.get("max_memory_mb"),
+            settings.get("min_ssim"),
+            ImageProcessor.encoder_options(settings),
+            name
+        )
+    
+    @abstractmethod
+    def render(
+        self,
+        source,
+        suffix: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        quality: int = 85,
+        maintain_aspect: bool = True,
+        target_kb: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+        min_ssim: Optional[float] = None,
+        encoder: Optional[Dict] = None,
+        name: Optional[str] = None
+    ) -> Tuple[bytes, Dict]:
+        """
+        Resize and encode an image entirely in memory.
+        
+        Args:
+            source: Path or encoded bytes of the input image
+            suffix: Output file extension (selects the encoder); None keeps
+                the input format
+            width: Target width in pixels
+            height: Target height in pixels
+            scale_percent: Scale percentage (e.g., 50 for 50%)
+            quality: Compression quality (1-100, higher is better)
+            maintain_aspect: Whether to maintain aspect ratio
+            target_kb: Maximum output size in KB (see ImageProcessor.encode_to_target())
+            max_memory_mb: Cap on the pixel buffers used for decoding and
+                resizing. It is checked against the image header before
+                decoding, and ImageTooLargeError is raised if it cannot be met
+            min_ssim: SSIM threshold when quality is "auto"
+            encoder: Encoder options passed to encode(): effort,
+                progressive, palette (see ImageProcessor.encoder_options())
+            name: Name of in-memory input (e.g. its file path) for error messages
+        
+        Returns:
+            Tuple of (encoded bytes, dict of result fields)
+        """
+    
+    def decode_frame(
+        self,
+        data: bytes,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        maintain_aspect: bool = True,
+        max_memory_mb: Optional[float] = None,
+        name: Optional[str] = None
+    ) -> Optional[Tuple[object, Tuple[int, int], Tuple[int, int]]]:
+        """
+        Decode an image to a pixel array that another process resizes with
+        resize_frame() (see batch_scheduler.BatchScheduler.iter_shared_frames()).
+        
+        Returns:
+            Tuple of (NumPy array, original (width, height), new (width,
+            height)), or None if the image must go through render() instead
+        """
+        return None
+    
+    @abstractmethod
+    def resize_frame(self, frame, new_size: Tuple[int, int]):
+        """Resize a pixel array from decode_frame() into an image encode() accepts."""
+    
+    @abstractmethod
+    def to_luma(self, img):
+        """Get the luma plane of an image as a 2-D uint8 NumPy array (for quality="auto")."""
+    
+    @abstractmethod
+    def decode_luma(self, data: bytes):
+        """Decode encoded bytes straight to a luma plane (for quality="auto")."""
+    
+    @abstractmethod
+    def mosaic(self, img, boxes: List[Tuple[int, int, int, int]], tile: int):
+        """Assemble equally sized tile boxes of an image into a square grid image."""
+
+
+_BACKENDS: Dict[str, type] = {}
+_BACKEND_INSTANCES: Dict[str, ImageBackend] = {}
+
+
+def register_backend(backend_class: type) -> type:
+    """
+    Register an ImageBackend subclass under its name (usable as a decorator).
+    
+    Raises:
+        TypeError: If the class leaves abstract methods unimplemented
+    """
+    missing = sorted(getattr(backend_class, "__abstractmethods__", ()))
+    if missing:
+        raise TypeError(f"Backend '{backend_class.name}' does not implement {', '.join(missing)}")
+    _BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+def available_backends() -> List[str]:
+    """Get the names of all registered backends."""
+    return list(_BACKENDS)
+
+
+def get_backend(name: str) -> ImageBackend:
+    """
+    Get the backend for a processing method, loading it on first use.
+    
+    Raises:
+        ValueError: If no backend is registered under name
+        ImportError: If the backend's libraries are not installed
+    """
+    name = name.lower()
+    if name not in _BACKEND_INSTANCES:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown processing method '{name}' (available: {', '.join(_BACKENDS)})")
+        backend_class = _BACKENDS[name]
+        try:
+            _BACKEND_INSTANCES[name] = backend_class()
+        except ImportError as e:
+            raise ImportError(f"The '{name}' method requires {backend_class.requirements} ({e})") from e
+    return _BACKEND_INSTANCES[name]
+
+
+@register_backend
+class PillowBackend(ImageBackend):
+    """Pillow backend: LANCZOS resampling with reduced JPEG decoding."""
+    
+    name = "pillow"
+    requirements = "Pillow (pip install Pillow)"
+    
+    # Bytes per pixel of uncompressed 8-bit raw layouts that can be decoded in strips
+    STRIP_RAW_MODES = {"L": 1, "LA": 2, "RGB": 3, "BGR": 3, "RGBA": 4, "RGBX": 4, "BGRA": 4, "BGRX": 4, "CMYK": 4}
+    
+    # Modes decode_frame() hands out; Image.fromarray() maps them back exactly
+    FRAME_MODES = ("L", "LA", "RGB", "RGBA")
+    
+    # Size of the raw read buffer resize_capped() reuses for every strip.
+    # Small strips keep the peak close to the reduced image; reads stay
+    # sequential, so a few MB is as fast as reading the whole file.
+    STRIP_BYTES = 4 * 1024 * 1024
+    
+    # Encoder settings per effort level (see ImageProcessor.EFFORT_LEVELS).
+    # zlib level 9 costs several times level 6 for a few percent on photos.
+    JPEG_OPTIMIZE = {"fast": False, "balanced": True, "max": True}
+    PNG_EFFORT = {
+        "fast": {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "max": {"compress_level": 9, "optimize": True},
+    }
+    WEBP_METHOD = {"fast": 2, "balanced": 4, "max": 6}
+    AVIF_SPEED = {"fast": 8, "balanced": 6, "max": 3}
+    
+    def load(self):
+        from PIL import Image  # noqa: F401
+    
+    @classmethod
+    def encode(
+        cls,
+        img,
+        suffix: str,
+        quality: int,
+        effort: Optional[str] = None,
+        progressive: bool = False,
+        palette: Optional[int] = None
+    ) -> bytes:
+        """
+        Encode a Pillow image in memory with compression settings for its format.
+        
+        Args:
+            img: Image to encode
+            suffix: Output file extension (selects the encoder)
+            quality: Compression quality (1-100; ignored by lossless formats)
+            effort: Encoder effort level (default: "balanced")
+            progressive: Write a progressive JPEG
+            palette: Quantize PNG output to at most this many colors
+        """
+        from PIL import Image
+        
+        buffer = BytesIO()
+        suffix = suffix.lower()
+        effort = effort or ImageProcessor.DEFAULT_EFFORT
+        if suffix in ['.jpg', '.jpeg']:
+            if img.mode not in ("L", "RGB", "CMYK"):
+                img = cls.flatten(img)
+            img.save(buffer, 'JPEG', quality=quality, optimize=cls.JPEG_OPTIMIZE[effort], progressive=progressive)
+        elif suffix == '.png':
+            if palette:
+                img = cls.quantize(img, palette, effort)
+            img.save(buffer, 'PNG', **cls.PNG_EFFORT[effort])
+        elif suffix == '.webp':
+            img.save(buffer, 'WEBP', quality=quality, method=cls.WEBP_METHOD[effort])
+        elif suffix == '.avif':
+            cls.require_avif()
+            img.save(buffer, 'AVIF', quality=quality, speed=cls.AVIF_SPEED[effort])
+        else:
+            img.save(buffer, Image.registered_extensions()[suffix], quality=quality, optimize=True)
+        return buffer.getvalue()
+    
+    @staticmethod
+    def flatten(img):
+        """Convert an image to RGB, compositing any transparency onto white (for JPEG)."""
+        from PIL import Image
+        
+        if "A" not in img.getbands() and "transparency" not in img.info:
+            return img.convert("RGB")
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    
+    @staticmethod
+    def require_avif():
+        """Make AVIF encoding available, or raise ValueError if it is not installed."""
+        from PIL import features
+        
+        if features.check("avif"):
+            return
+        try:
+            import pillow_avif  # noqa: F401  (registers the AVIF plugin)
+        except ImportError:
+            raise ValueError("AVIF output needs Pillow built with libavif or the pillow-avif-plugin package")
+    
+    @staticmethod
+    def quantize(img, colors: int, effort: str):
+        """
+        Reduce an image to a palette of at most `colors` colors (lossy PNG).
+        
+        Images that already use few enough colors get an exact palette
+        (fast path, no quantization error). Others go through Pillow's fast
+        octree quantizer, or libimagequant at effort "max" if Pillow has it.
+        """
+        from PIL import Image, features
+        
+        if img.mode == "P" and len(img.getpalette() or []) // 3 <= colors:
+            return img
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        if img.mode == "RGB":
+            found = img.getcolors(colors)
+            if found is not None:
+                exact = Image.new("P", (1, 1))
+                exact.putpalette([channel for _, color in found for channel in color])
+                return img.quantize(palette=exact, dither=Image.Dither.NONE)
+        method = Image.Quantize.FASTOCTREE
+        if effort == "max" and features.check_feature("libimagequant"):
+            method = Image.Quantize.LIBIMAGEQUANT
+        return img.quantize(colors, method=method)
+    
+    def to_luma(self, img):
+        import numpy as np
+        
+        return np.asarray(img.convert("L"))
+    
+    def decode_luma(self, data: bytes):
+        import numpy as np
+        from PIL import Image
+        
+        with Image.open(BytesIO(data)) as img:
+            return np.asarray(img.convert("L"))
+    
+    def mosaic(self, img, boxes: List[Tuple[int, int, int, int]], tile: int):
+        from PIL import Image
+        
+        columns = math.isqrt(len(boxes))
+        sample = Image.new(img.mode, (columns * tile, -(-len(boxes) // columns) * tile))
+        for index, box in enumerate(boxes):
+            sample.paste(img.crop(box), ((index % columns) * tile, (index // columns) * tile))
+        return sample
+    
+    def render(
+        self,
+        source,
+        suffix: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        quality: int = 85,
+        maintain_aspect: bool = True,
+        target_kb: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+        min_ssim: Optional[float] = None,
+        encoder: Optional[Dict] = None,
+        name: Optional[str] = None
+    ) -> Tuple[bytes, Dict]:
+        """Resize and encode an image with Pillow (see ImageBackend.render())."""
+        from PIL import Image
+        
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = BytesIO(source)
+        started = time.perf_counter()
+        with ImageProcessor.open_image(source, lift_pixel_limit=bool(max_memory_mb), name=name) as img:
+            original_size = img.size
+            suffix = suffix or self.default_suffix(img.format)
+            
+            # Calculate new dimensions
+            new_width, new_height = ImageProcessor.calculate_dimensions(
+                original_size, width, height, scale_percent, maintain_aspect
+            )
+            # Header parsing counts towards decoding
+            timings = {"decode": time.perf_counter() - started, "resize": 0.0}
+            
+            if max_memory_mb:
+                resized_img = self.resize_capped(
+                    img, source, (new_width, new_height), int(max_memory_mb * 1024 * 1024), timings
+                )
+            else:
+                # Let libjpeg scale down in the DCT domain (1/2, 1/4, 1/8) while
+                # keeping REDUCING_GAP x the target size, before any pixels are decoded
+                gap = ImageProcessor.REDUCING_GAP
+                if img.format == 'JPEG' and ImageProcessor.reduction_factor(original_size, (new_width, new_height)) > 1:
+                    img.draft(None, (int(new_width * gap), int(new_height * gap)))
+                resized_img = self.timed_resize(img, (new_width, new_height), timings)
+        
+        # Encode (searching quality for "auto" and if a target size is set)
+        encode_started = time.perf_counter()
+        data, used_quality, trials = ImageProcessor.encode_image(
+            self, resized_img, suffix, quality, target_kb, min_ssim, encoder
+        )
+        timings["encode"] = time.perf_counter() - encode_started
+        return data, {
+            "original_size": original_size,
+            "new_size": (new_width, new_height),
+            "quality": used_quality,
+            "trials": trials,
+            "target_kb": target_kb,
+            "format": suffix,
+            "timings": timings,
+        }
+    
+    def decode_frame(
+        self,
+        data: bytes,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        maintain_aspect: bool = True,
+        max_memory_mb: Optional[float] = None,
+        name: Optional[str] = None
+    ) -> Optional[Tuple[object, Tuple[int, int], Tuple[int, int]]]:
+        """
+        Decode to an L, LA, RGB or RGBA array, as render() would before resizing.
+        
+        Other modes (palettes, 16-bit, CMYK) and images over max_memory_mb,
+        which render() decodes in strips, return None.
+        """
+        import numpy as np
+        
+        with ImageProcessor.open_image(BytesIO(data), lift_pixel_limit=bool(max_memory_mb), name=name) as img:
+            original_size = img.size
+            new_size = ImageProcessor.calculate_dimensions(
+                original_size, width, height, scale_percent, maintain_aspect
+            )
+            if img.mode not in self.FRAME_MODES or "transparency" in img.info:
+                return None
+            gap = ImageProcessor.REDUCING_GAP
+            if img.format == 'JPEG' and ImageProcessor.reduction_factor(original_size, new_size) > 1:
+                img.draft(None, (int(new_size[0] * gap), int(new_size[1] * gap)))
+            if max_memory_mb and img.width * img.height * len(img.getbands()) > max_memory_mb * 1024 * 1024:
+                return None
+            img.load()
+            return np.asarray(img), original_size, new_size
+    
+    def resize_frame(self, frame, new_size: Tuple[int, int]):
+        """Resize an array from decode_frame() with LANCZOS, as render() does."""
+        from PIL import Image
+        
+        return Image.fromarray(frame).resize(
+            new_size, Image.Resampling.LANCZOS, reducing_gap=ImageProcessor.RESIZE_REDUCING_GAP
+        )
+    
+    @staticmethod
+    def timed_resize(img, new_size: Tuple[int, int], timings: Dict):
+        """Decode (if not yet loaded) and resize with LANCZOS, adding to the decode/resize timings."""
+        from PIL import Image
+        
+        decode_started = time.perf_counter()
+        img.load()
+        resize_started = time.perf_counter()
+        # reducing_gap does a cheap box reduce before LANCZOS
+        resized_img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=ImageProcessor.RESIZE_REDUCING_GAP)
+        timings["decode"] += resize_started - decode_started
+        timings["resize"] += time.perf_counter() - resize_started
+        return resized_img
+    
+    def resize_capped(self, img, source, new_size: Tuple[int, int], limit: int, timings: Dict):
+        """
+        Resize an opened (not yet decoded) image keeping pixel buffers under limit bytes.
+        
+        Every decision is made from the header before any pixels are decoded:
+        
+        1. Decode the whole image if it fits; JPEGs may be decoded at 1/2,
+           1/4 or 1/8 scale (further than usual if the cap requires it, but
+           never below the target size).
+        2. Otherwise, uncompressed images (TIFF, BMP, PPM) are read in small
+           horizontal strips into one reused buffer, and each strip is
+           box-reduced by an integer factor into an intermediate image that
+           is then resized with LANCZOS.
+        3. Otherwise raise ImageTooLargeError.
+        
+        The budget counts Pillow's in-memory layout (4 bytes per pixel for
+        multi-band images) and the copies resize() makes (see resize_bytes()).
+        Time spent is added to timings["decode"] and timings["resize"].
+        """
+        from PIL import Image
+        
+        width, height = img.size
+        pixel_bytes = self.pixel_bytes(img.mode)
+        # Largest integer reduction that still leaves at least the target size
+        max_factor = max(1, int(min(width / max(new_size[0], 1), height / max(new_size[1], 1))))
+        factor = ImageProcessor.reduction_factor(img.size, new_size, max_factor=max_factor)
+        
+        def reduced_size(f: int) -> Tuple[int, int]:
+            return -(-width // f), -(-height // f)
+        
+        def image_bytes(f: int) -> int:
+            return math.prod(reduced_size(f)) * pixel_bytes
+        
+        # 1. Whole-image decode
+        if img.format == 'JPEG':
+            draft_factors = [f for f in (1, 2, 4, 8) if factor <= f <= max_factor] or [1]
+        else:
+            draft_factors = [1]
+        for draft_factor in draft_factors:
+            if image_bytes(draft_factor) + self.resize_bytes(reduced_size(draft_factor), new_size, pixel_bytes) <= limit:
+                if draft_factor > 1:
+                    img.draft(None, reduced_size(draft_factor))
+                return self.timed_resize(img, new_size, timings)
+        
+        # 2. Strip decode: the reduced image plus either one strip (raw
+        # bytes, decoded rows, their reduction) or the final resize must fit
+        tile = self.strip_tile(img)
+        if tile is not None:
+            stride = tile[2]
+            
+            def strip_row_bytes(f: int) -> int:
+                return stride + width * pixel_bytes + width * pixel_bytes // f ** 2
+            
+            for strip_factor in range(factor, max_factor + 1):
+                spare = limit - image_bytes(strip_factor)
+                if self.resize_bytes(reduced_size(strip_factor), new_size, pixel_bytes) > spare:
+                    continue
+                rows = min(spare // strip_row_bytes(strip_factor), max(self.STRIP_BYTES // stride, 1))
+                rows = rows // strip_factor * strip_factor
+                if rows >= strip_factor:
+                    reduced = Image.new(img.mode, reduced_size(strip_factor))
+                    self.reduce_strips(reduced, source, img.mode, img.size, tile, rows, strip_factor, timings)
+                    return self.timed_resize(reduced, new_size, timings)
+        
+        needed = image_bytes(draft_factors[-1]) + self.resize_bytes(reduced_size(draft_factors[-1]), new_size, pixel_bytes)
+        if tile is not None:
+            needed = min(needed, image_bytes(max_factor) + max(
+                self.resize_bytes(reduced_size(max_factor), new_size, pixel_bytes),
+                max_factor * strip_row_bytes(max_factor)
+            ))
+        raise ImageTooLargeError(
+            f"{width}x{height} {img.format} image needs about {needed / (1024 * 1024):.0f} MB "
+            f"to decode, over the {limit / (1024 * 1024):.0f} MB memory cap"
+            + ("" if tile is not None or img.format == 'JPEG' else " (only uncompressed images can be decoded in strips)")
+        )
+    
+    @staticmethod
+    def pixel_bytes(mode: str) -> int:
+        """Bytes per pixel of a Pillow image in memory (multi-band 8-bit modes are padded to 4)."""
+        if mode in ("1", "L", "P"):
+            return 1
+        if mode.startswith("I;16"):
+            return 2
+        return 4
+    
+    @staticmethod
+    def resize_bytes(size: Tuple[int, int], new_size: Tuple[int, int], pixel_bytes: int) -> int:
+        """
+        Estimate the memory Image.resize() allocates for a LANCZOS resize.
+        
+        With reducing_gap set, resize() first box-reduces a copy of the image
+        by the largest factor that keeps RESIZE_REDUCING_GAP pixels per
+        output pixel, then resamples horizontally into an intermediate image
+        before the vertical pass writes the output. All three are counted.
+        """
+        gap = ImageProcessor.RESIZE_REDUCING_GAP
+        factor_x = max(1, int(size[0] / max(new_size[0], 1) / gap))
+        factor_y = max(1, int(size[1] / max(new_size[1], 1) / gap))
+        source_width, source_height = -(-size[0] // factor_x), -(-size[1] // factor_y)
+        copy = source_width * source_height if factor_x * factor_y > 1 else 0
+        intermediate = new_size[0] * source_height if source_width != new_size[0] else 0
+        return (copy + intermediate + new_size[0] * new_size[1]) * pixel_bytes
+    
+    @classmethod
+    def strip_tile(cls, img) -> Optional[Tuple]:
+        """
+        Get the (offset, rawmode, stride, orientation) of an uncompressed image stored as one raw block.
+        
+        Returns None for compressed images, which Pillow can only decode whole.
+        """
+        if len(img.tile) != 1 or img.mode not in ("L", "LA", "RGB", "RGBA", "CMYK"):
+            return None
+        decoder_name, extents, offset, args = img.tile[0]
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if decoder_name != "raw" or tuple(extents) != (0, 0) + img.size or rawmode not in cls.STRIP_RAW_MODES:
+            return None
+        stride = stride or img.width * cls.STRIP_RAW_MODES[rawmode]
+        return offset, rawmode, stride, orientation
+    
+    @staticmethod
+    def reduce_strips(reduced, source, mode: str, size: Tuple[int, int], tile: Tuple, rows: int, factor: int, timings: Dict):
+        """
+        Read an image described by strip_tile() `rows` rows at a time and
+        paste each strip, box-reduced by factor, into `reduced`.
+        
+        Every strip is read into the same raw buffer and decoded into the
+        same strip image, so memory freed between strips is not left behind
+        in the allocator's heap.
+        """
+        from PIL import Image
+        
+        offset, rawmode, stride, orientation = tile
+        width, height = size
+        buffer = bytearray(rows * stride)
+        strip = Image.new(mode, (width, rows))
+        fp = source if hasattr(source, "read") else open(source, "rb")
+        try:
+            for top in range(0, height, rows):
+                decode_started = time.perf_counter()
+                count = min(rows, height - top)
+                if count < rows:
+                    strip = Image.new(mode, (width, count))
+                # Bottom-up files (BMP) store the last row first
+                fp.seek(offset + (top if orientation > 0 else height - top - count) * stride)
+                view = memoryview(buffer)[:count * stride]
+                if fp.readinto(view) != len(view):
+                    raise OSError("image file is truncated")
+                strip.frombytes(view, "raw", rawmode, stride, orientation)
+                reduce_started = time.perf_counter()
+                reduced.paste(strip.reduce(factor), (0, top // factor))
+                timings["decode"] += reduce_started - decode_started
+                timings["resize"] += time.perf_counter() - reduce_started
+        finally:
+            if fp is not source:
+                fp.close()
+
+
+@register_backend
+class OpenCVBackend(ImageBackend):
+    """OpenCV backend: INTER_AREA resampling with reduced JPEG decoding."""
+    
+    name = "opencv"
+    requirements = "opencv-python and numpy (pip install -r requirements.txt)"
+    
+    # EXIF Orientation tag, and its values that swap width and height
+    # (rotated by 90 or 270 degrees, possibly mirrored)
+    EXIF_ORIENTATION = 0x0112
+    TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+    
+    def load(self):
+        import cv2
+        import numpy  # noqa: F401
+        from PIL import Image  # noqa: F401  (header reads)
+        
+        # cv2.imread flags for 1/2, 1/4 and 1/8 scale JPEG decoding
+        self.reduced_flags = (
+            (8, cv2.IMREAD_REDUCED_COLOR_8),
+            (4, cv2.IMREAD_REDUCED_COLOR_4),
+            (2, cv2.IMREAD_REDUCED_COLOR_2),
+        )
+    
+    # Encoder settings per effort level (see ImageProcessor.EFFORT_LEVELS).
+    # "balanced" PNG keeps the compression level derived from quality.
+    JPEG_OPTIMIZE = {"fast": 0, "balanced": 0, "max": 1}
+    PNG_COMPRESSION = {"fast": 1, "max": 9}
+    
+    @classmethod
+    def encode(
+        cls,
+        img,
+        suffix: str,
+        quality: int,
+        effort: Optional[str] = None,
+        progressive: bool = False,
+        palette: Optional[int] = None
+    ) -> bytes:
+        """
+        Encode an OpenCV image in memory with compression settings for its format.
+        
+        Takes the same options as PillowBackend.encode(). Palette PNGs, and
+        AVIF if this OpenCV build cannot write it, are encoded with Pillow.
+        """
+        import cv2
+        
+        suffix = suffix.lower()
+        effort = effort or ImageProcessor.DEFAULT_EFFORT
+        if suffix in ['.jpg', '.jpeg']:
+            params = [
+                cv2.IMWRITE_JPEG_QUALITY, quality,
+                cv2.IMWRITE_JPEG_OPTIMIZE, cls.JPEG_OPTIMIZE[effort],
+                cv2.IMWRITE_JPEG_PROGRESSIVE, int(progressive),
+            ]
+        elif suffix == '.png':
+            if palette:
+                return PillowBackend.encode(cls.to_pillow(img), suffix, quality, effort, palette=palette)
+            compression = int((100 - quality) / 10)  # Convert to PNG compression level (0-9)
+            params = [cv2.IMWRITE_PNG_COMPRESSION, cls.PNG_COMPRESSION.get(effort, compression)]
+        elif suffix == '.webp':
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+        elif suffix == '.avif':
+            if not hasattr(cv2, "IMWRITE_AVIF_SPEED") or not cv2.haveImageWriter(suffix):
+                return PillowBackend.encode(cls.to_pillow(img), suffix, quality, effort)
+            params = [cv2.IMWRITE_AVIF_QUALITY, quality, cv2.IMWRITE_AVIF_SPEED, PillowBackend.AVIF_SPEED[effort]]
+        else:
+            params = []
+        success, buffer = cv2.imencode(suffix, img, params)
+        if not success:
+            raise ValueError(f"Could not encode image as {suffix}")
+        return buffer.tobytes()
+    
+    @staticmethod
+    def to_pillow(img):
+        """Convert an OpenCV (BGR, BGRA or grayscale) array to a Pillow image."""
+        import cv2
+        from PIL import Image
+        
+        if img.ndim == 2:
+            return Image.fromarray(img)
+        code = cv2.COLOR_BGRA2RGBA if img.shape[2] == 4 else cv2.COLOR_BGR2RGB
+        return Image.fromarray(cv2.cvtColor(img, code))
+    
+    def to_luma(self, img):
+        import cv2
+        
+        if img.ndim == 2:
+            return img
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY if img.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    
+    def decode_luma(self, data: bytes):
+        import cv2
+        import numpy as np
+        
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+    
+    def mosaic(self, img, boxes: List[Tuple[int, int, int, int]], tile: int):
+        import numpy as np
+        
+        columns = math.isqrt(len(boxes))
+        tiles = [img[top:bottom, left:right] for left, top, right, bottom in boxes]
+        tiles += [np.zeros_like(tiles[0])] * (-len(tiles) % columns)
+        return np.ascontiguousarray(np.vstack([
+            np.hstack(tiles[row:row + columns]) for row in range(0, len(tiles), columns)
+        ]))
+    
+    def decode_flags(self, header_format: str, header_size: Tuple[int, int], new_size: Tuple[int, int]) -> Tuple[int, int]:
+        """
+        Choose the cv2 decode flags for an image, using libjpeg's reduced
+        decoding (1/2, 1/4, 1/8) for JPEGs when the output is small enough.
+        
+        Returns:
+            Tuple of (cv2.imread/imdecode flags, reduction factor)
+        """
+        import cv2
+        
+        if header_format == 'JPEG':
+            factor = ImageProcessor.reduction_factor(header_size, new_size)
+            for reduced_factor, reduced_flag in self.reduced_flags:
+                if factor >= reduced_factor:
+                    return reduced_flag, reduced_factor
+        return cv2.IMREAD_COLOR, 1
+    
+    def decode(
+        self,
+        source,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        max_memory_mb: Optional[float] = None,
+        name: Optional[str] = None
+    ) -> Tuple[object, Tuple[int, int], str]:
+        """
+        Decode an image with OpenCV, decoding JPEGs at reduced scale if safe.
+        
+        Args:
+            source: Path or encoded bytes of the input image
+            max_memory_mb: Raise ImageTooLargeError, before decoding, if the
+                decoded image would not fit (OpenCV cannot decode in strips)
+            name: Name of in-memory input (e.g. its file path) for error messages
+        
+        Returns:
+            Tuple of (BGR pixel array, original (width, height), Pillow format name)
+        """
+        import cv2
+        import numpy as np
+        from PIL import Image
+        
+        from_memory = isinstance(source, (bytes, bytearray, memoryview))
+        
+        # Header-only read to find the format and full-resolution size
+        header_source = BytesIO(source) if from_memory else source
+        with ImageProcessor.open_image(header_source, lift_pixel_limit=bool(max_memory_mb), name=name) as header:
+            header_format = header.format
+            header_size = header.size
+            # OpenCV applies EXIF orientation, so size the output (and pick the
+            # reduced decode) from the image as displayed
+            if header.getexif().get(self.EXIF_ORIENTATION) in self.TRANSPOSED_ORIENTATIONS:
+                header_size = header_size[::-1]
+        
+        new_size = ImageProcessor.calculate_dimensions(header_size, width, height, scale_percent)
+        flags, factor = self.decode_flags(header_format, header_size, new_size)
+        
+        if max_memory_mb:
+            # BGR decode at the chosen scale plus the resized output
+            needed = (-(-header_size[0] // factor) * -(-header_size[1] // factor) + new_size[0] * new_size[1]) * 3
+            limit = max_memory_mb * 1024 * 1024
+            if needed > limit:
+                raise ImageTooLargeError(
+                    f"{header_size[0]}x{header_size[1]} {header_format} image needs about "
+                    f"{needed / (1024 * 1024):.0f} MB to decode, over the {max_memory_mb:g} MB memory cap "
+                    f"(the pillow method can decode uncompressed images in strips)"
+                )
+        
+        if from_memory:
+            # np.frombuffer wraps the encoded bytes without copying them
+            img = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), flags)
+        else:
+            img = cv2.imread(str(source), flags)
+        if img is None:
+            if not from_memory:
+                raise ValueError(f"Could not read image: {source}")
+            raise ValueError(f"Could not decode image: {name}" if name else "Could not decode image")
+        
+        decoded_height, decoded_width = img.shape[:2]
+        if flags == cv2.IMREAD_COLOR:
+            return img, (decoded_width, decoded_height), header_format
+        
+        # In case this OpenCV build did not apply EXIF orientation, match the pixels
+        header_width, header_height = header_size
+        if (decoded_width > decoded_height) != (header_width > header_height):
+            header_width, header_height = header_height, header_width
+        return img, (header_width, header_height), header_format
+    
+    def decode_frame(
+        self,
+        data: bytes,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        maintain_aspect: bool = True,
+        max_memory_mb: Optional[float] = None,
+        name: Optional[str] = None
+    ) -> Optional[Tuple[object, Tuple[int, int], Tuple[int, int]]]:
+        """Decode to a BGR array with decode(); maintain_aspect is ignored, as in render()."""
+        img, original_size, _ = self.decode(data, width, height, scale_percent, max_memory_mb, name)
+        return img, original_size, ImageProcessor.calculate_dimensions(original_size, width, height, scale_percent)
+    
+    def resize_frame(self, frame, new_size: Tuple[int, int]):
+        """Resize an array from decode_frame() with INTER_AREA, as render() does."""
+        import cv2
+        
+        return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+    
+    def render(
+        self,
+        source,
+        suffix: str,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        scale_percent: Optional[int] = None,
+        quality: int = 85,
+        maintain_aspect: bool = True,
+        target_kb: Optional[float] = None,
+        max_memory_mb: Optional[float] = None,
+        min_ssim: Optional[float] = None,
+        encoder: Optional[Dict] = None,
+        name: Optional[str] = None
+    ) -> Tuple[bytes, Dict]:
+        """
+        Resize and encode an image with OpenCV (see ImageBackend.render()).
+        
+        The aspect ratio is always maintained when only width or height is
+        given, so maintain_aspect is ignored.
+        """
+        import cv2
+        
+        # Read image, using libjpeg's reduced decoding when downscaling
+        started = time.perf_counter()
+        img, original_size, input_format = self.decode(source, width, height, scale_percent, max_memory_mb, name)
+        suffix = suffix or self.default_suffix(input_format)
+        timings = {"decode": time.perf_counter() - started}
+        
+        # Calculate new dimensions
+        new_width, new_height = ImageProcessor.calculate_dimensions(
+            original_size, width, height, scale_percent
+        )
+        
+        # Resize image
+        resize_started = time.perf_counter()
+        resized_img = cv2.resize(img, (new_width, new_height), interpolation=cv2.INTER_AREA)
+        timings["resize"] = time.perf_counter() - resize_started
+        
+        # Encode (searching quality for "auto" and if a target size is set)
+        encode_started = time.perf_counter()
+        data, used_quality, trials = ImageProcessor.encode_image(
+            self, resized_img, suffix, quality, target_kb, min_ssim, encoder
+        )
+        timings["encode"] = time.perf_counter() - encode_started
+        return data, {
+            "original_size": original_size,
+            "new_size": (new_width, new_height),
+            "quality": used_quality,
+            "trials": trials,
+            "target_kb": target_kb,
+            "format": suffix,
+            "timings": timings,
+        }
+
+
+def process_bytes(data: bytes, config: Dict, name: Optional[str] = None) -> Tuple[bytes, Dict]:
+    """
+    Resize and compress an encoded image held in memory, without temp files.
+    
+    Uses the backend named by config["method"] (default: pillow); see
+    ImageBackend.process_bytes() for the config keys and returned metadata.
+    name (e.g. the upload's file name) is used in error messages.
+    
+    Example:
+        thumbnail, metadata = process_bytes(upload, {"width": 200, "quality": 75}, name="upload.jpg")
+    """
+    return get_backend(config.get("method", "pillow")).process_bytes(data, config, name)
+
+
 def main():
     """Main function to run the image processor."""
     print("""
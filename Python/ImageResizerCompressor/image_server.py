@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+HTTP Resize Service for Image Resizer & Compressor
+==================================================
+Serves resized variants of the images in the ingest folder on the fly.
+
+    GET /img/<name>?preset=thumbnail
+    GET /img/<name>?w=800&q=80          (also h, scale, method, format)
+    GET /img/<name>?w=800&q=auto        (lowest quality keeping SSIM >= ssim)
+    GET /img/<name>?w=800&format=webp   (also effort, progressive, palette)
+    GET /stats                          (cache counters as JSON)
+
+- Encoded variants are kept in a size-bounded LRU cache in memory,
+  optionally backed by a size-bounded on-disk cache that survives restarts
+- Requested sizes are limited, so a single request cannot ask for a huge render
+- Concurrent requests for the same variant are coalesced into one render
+- Responses carry an ETag; If-None-Match is answered with 304 without
+  reading or rendering the image
+
+Author: Hacktoberfest 2025 Contributor
+"""
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from image_resizer_compressor import ImageProcessor, get_backend, process_bytes
+
+
+class UnsupportedImageError(ValueError):
+    """Raised when a source file is not an image that can be decoded (HTTP 415)."""
+
+
+class UnprocessableImageError(ValueError):
+    """Raised when a source image is corrupt or cannot be rendered as requested (HTTP 422)."""
+
+
+class _PendingRender:
+    """A render in progress that other requests for the same variant wait on."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class VariantCache:
+    """Size-bounded LRU cache of encoded variants, optionally backed by disk."""
+    
+    TEMP_SUFFIX = ".tmp"
+    
+    def __init__(self, max_mb: float = 256, disk_dir: Optional[str] = None, disk_max_mb: float = 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_mb: Memory budget for cached variants in MB
+            disk_dir: Directory for the on-disk cache (None = memory only)
+            disk_max_mb: Disk budget for the on-disk cache in MB; least
+                recently used files are deleted beyond it
+        """
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self.used_bytes = 0
+        self.disk_bytes = 0
+        self._entries = OrderedDict()  # key -> (data, suffix)
+        self._disk_entries = OrderedDict()  # key -> (suffix, size), least recently used first
+        self._pending: Dict[str, _PendingRender] = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "disk_hits": 0,
+            "coalesced": 0,
+            "renders": 0,
+            "errors": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "not_modified": 0
+        }
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._scan_disk()
+    
+    def count(self, name: str):
+        """Increment a counter."""
+        with self._lock:
+            self.counters[name] += 1
+    
+    def _store(self, key: str, value: Tuple[bytes, str]):
+        """Insert a variant and evict least recently used ones (lock held)."""
+        size = len(value[0])
+        if size > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = value
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            _, (data, _) = self._entries.popitem(last=False)
+            self.used_bytes -= len(data)
+            self.counters["evictions"] += 1
+    
+    def _disk_path(self, key: str, suffix: str) -> Path:
+        return self.disk_dir / f"{key}{suffix}"
+    
+    def _scan_disk(self):
+        """
+        Index the on-disk cache, oldest first, and delete temporary files
+        left by writes that never finished. Files whose names are not a
+        variant key plus an output extension are left alone.
+        """
+        entries = []
+        for path in self.disk_dir.iterdir():
+            try:
+                if path.name.endswith(self.TEMP_SUFFIX):
+                    path.unlink()
+                    continue
+                stat = path.stat()
+            except OSError:
+                continue
+            key, suffix = path.stem, path.suffix
+            if len(key) == 32 and all(c in "0123456789abcdef" for c in key) and suffix in ImageProcessor.OUTPUT_FORMATS:
+                entries.append((stat.st_mtime_ns, key, suffix, stat.st_size))
+        for _, key, suffix, size in sorted(entries):
+            self._disk_entries[key] = (suffix, size)
+            self.disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+    
+    def _evict_disk(self):
+        """Delete least recently used files until the disk cache fits its budget (lock held)."""
+        while self.disk_bytes > self.disk_max_bytes and self._disk_entries:
+            key, (suffix, size) = self._disk_entries.popitem(last=False)
+            self.disk_bytes -= size
+            self.counters["disk_evictions"] += 1
+            try:
+                self._disk_path(key, suffix).unlink()
+            except OSError:
+                pass
+    
+    def _load_disk(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Find a variant in the on-disk cache."""
+        with self._lock:
+            entry = self._disk_entries.get(key)
+            if entry is None:
+                return None
+            self._disk_entries.move_to_end(key)
+        path = self._disk_path(key, entry[0])
+        try:
+            data = path.read_bytes()
+            # The modification time orders files for eviction after a restart
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                if self._disk_entries.pop(key, None) is not None:
+                    self.disk_bytes -= entry[1]
+            return None
+        return data, entry[0]
+    
+    def _save_disk(self, key: str, value: Tuple[bytes, str]):
+        """Write a variant to the on-disk cache (atomically, errors ignored)."""
+        size = len(value[0])
+        if size > self.disk_max_bytes:
+            return
+        path = self._disk_path(key, value[1])
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}{self.TEMP_SUFFIX}")
+        try:
+            tmp_path.write_bytes(value[0])
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠ Could not write disk cache entry {path.name}: {e}")
+            return
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        with self._lock:
+            previous = self._disk_entries.pop(key, None)
+            if previous is not None:
+                self.disk_bytes -= previous[1]
+            self._disk_entries[key] = (value[1], size)
+            self.disk_bytes += size
+            self._evict_disk()
+    
+    def get_or_render(self, key: str, render: Callable[[], Tuple[bytes, str]]) -> Tuple[bytes, str]:
+        """
+        Get a variant from the cache, rendering it on a miss.
+        
+        Only one render runs per key; concurrent callers for the same key
+        wait for it and share its result (or its exception).
+        
+        Args:
+            key: Variant key (see ImageServer.variant_key())
+            render: Callable returning (encoded bytes, output suffix)
+        
+        Returns:
+            Tuple of (encoded bytes, output suffix)
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return value
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingRender()
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+        
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+        
+        try:
+            value = self._load_disk(key) if self.disk_dir else None
+            if value is not None:
+                self.count("disk_hits")
+            else:
+                value = render()
+                self.count("renders")
+                if self.disk_dir:
+                    self._save_disk(key, value)
+            pending.value = value
+            with self._lock:
+                self._store(key, value)
+            return value
+        except Exception as e:
+            self.count("errors")
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+    
+    def stats(self) -> Dict:
+        """Get cache counters and occupancy."""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.used_bytes
+            stats["max_bytes"] = self.max_bytes
+            if self.disk_dir:
+                stats["disk_entries"] = len(self._disk_entries)
+                stats["disk_bytes"] = self.disk_bytes
+                stats["disk_max_bytes"] = self.disk_max_bytes
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 4) if lookups else 0.0
+        stats["disk_cache"] = str(self.disk_dir) if self.disk_dir else None
+        return stats
+
+
+class ImageServer(ThreadingHTTPServer):
+    """HTTP server rendering variants of the images in an ImageProcessor's input_dir."""
+    
+    daemon_threads = True
+    
+    CONTENT_TYPES = {
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.png': 'image/png',
+        '.webp': 'image/webp',
+        '.avif': 'image/avif',
+        '.bmp': 'image/bmp',
+        '.tif': 'image/tiff',
+        '.tiff': 'image/tiff'
+    }
+    
+    # Query parameter -> (config key, type)
+    QUERY_PARAMS = {
+        "w": ("width", int),
+        "h": ("height", int),
+        "scale": ("scale_percent", int),
+        "q": ("quality", ImageProcessor.parse_quality),
+        "ssim": ("min_ssim", float),
+        "method": ("method", str),
+        "format": ("format", str),
+        "effort": ("effort", str),
+        "progressive": ("progressive", int),
+        "palette": ("palette", int)
+    }
+    
+    # Largest width/height (px) and scale (%) a request may ask for
+    MAX_DIMENSION = 8192
+    MAX_SCALE_PERCENT = 200
+    
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        processor: ImageProcessor,
+        presets: Dict[str, Dict],
+        defaults: Optional[Dict] = None,
+        cache: Optional[VariantCache] = None,
+        max_dimension: int = MAX_DIMENSION,
+        max_scale_percent: int = MAX_SCALE_PERCENT
+    ):
+        """
+        Initialize the server.
+        
+        Args:
+            address: (host, port) to listen on
+            processor: ImageProcessor whose input_dir holds the source images
+            presets: Configurations selectable with ?preset=<name>
+            defaults: Configuration used when no preset is given
+            cache: Variant cache (default: 256 MB in memory)
+            max_dimension: Largest w and h a request may ask for, in pixels
+            max_scale_percent: Largest scale a request may ask for, in percent
+        """
+        super().__init__(address, ImageRequestHandler)
+        self.processor = processor
+        self.presets = presets
+        self.defaults = defaults or {"method": "pillow", "quality": 85}
+        self.cache = cache or VariantCache()
+        self.limits = {"w": max_dimension, "h": max_dimension, "scale": max_scale_percent}
+    
+    def variant_config(self, query: Dict[str, list]) -> Dict:
+        """Build the processing configuration for a request (raises ValueError)."""
+        preset = query.get("preset", [None])[0]
+        if preset:
+            if preset not in self.presets:
+                raise ValueError(f"Unknown preset '{preset}'")
+            config = dict(self.presets[preset])
+        else:
+            config = dict(self.defaults)
+        
+        for param, (key, cast) in self.QUERY_PARAMS.items():
+            if param in query:
+                try:
+                    config[key] = cast(query[param][0])
+                except ValueError:
+                    raise ValueError(f"Invalid value for '{param}': {query[param][0]}")
+                if param in self.limits and not 1 <= config[key] <= self.limits[param]:
+                    raise ValueError(f"'{param}' must be between 1 and {self.limits[param]}")
+        
+        if config.get("quality") is not None:
+            config["quality"] = ImageProcessor.parse_quality(config["quality"])
+        if config.get("min_ssim") is not None and not 0 < config["min_ssim"] <= 1:
+            raise ValueError("SSIM threshold must be between 0 and 1")
+        if config.get("format"):
+            config["format"] = "." + config["format"].lower().lstrip(".")
+            if config["format"] not in self.CONTENT_TYPES:
+                raise ValueError(f"Unsupported output format '{config['format']}'")
+        # Rejects an unknown effort level or palette size
+        ImageProcessor.effective_settings(config)
+        get_backend(config.get("method", "pillow"))
+        return config
+    
+    def source_path(self, name: str) -> Optional[Path]:
+        """Resolve an image name to a file directly inside input_dir."""
+        if not name or "/" in name or "\\" in name or name.startswith("."):
+            return None
+        path = self.processor.input_dir / name
+        if path.suffix.lower() not in self.processor.SUPPORTED_FORMATS or not path.is_file():
+            return None
+        return path
+    
+    @staticmethod
+    def variant_key(path: Path, stat: os.stat_result, config: Dict) -> str:
+        """
+        Key a variant by source identity and the settings that affect output.
+        
+        The key only needs a stat() call, so it doubles as the ETag and
+        conditional requests never read the image.
+        """
+        settings = ImageProcessor.effective_settings(config)
+        settings["format"] = config.get("format") or path.suffix.lower()
+        identity = [path.name, stat.st_size, stat.st_mtime_ns, settings]
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:32]
+    
+    @staticmethod
+    def render(path: Path, config: Dict) -> Tuple[bytes, str]:
+        """
+        Render a variant of an image file to (encoded bytes, suffix).
+        
+        Raises:
+            UnsupportedImageError: If the file is not a recognized image
+            UnprocessableImageError: If the image data is corrupt, or the
+                image cannot be rendered with these settings (e.g. too large)
+        """
+        from PIL import Image, UnidentifiedImageError
+        
+        data = path.read_bytes()
+        try:
+            encoded, metadata = process_bytes(data, config, name=path.name)
+        except UnidentifiedImageError as e:
+            raise UnsupportedImageError(str(e)) from e
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+            # Decoders report broken data as OSError (truncated), SyntaxError or ValueError
+            raise UnprocessableImageError(str(e)) from e
+        return encoded, metadata["format"]
+
+
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    """Handles /img/<name> and /stats requests for an ImageServer."""
+    
+    server_version = "ImageResizer/1.0"
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/stats":
+            self.send_json(200, self.server.cache.stats())
+        elif url.path.startswith("/img/"):
+            self.send_image(unquote(url.path[len("/img/"):]), parse_qs(url.query))
+        else:
+            self.send_json(404, {"error": "Not found"})
+    
+    def send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, indent=2).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_image(self, name: str, query: Dict[str, list]):
+        server = self.server
+        path = server.source_path(name)
+        if path is None:
+            self.send_json(404, {"error": f"Image '{name}' not found"})
+            return
+        try:
+            config = server.variant_config(query)
+            stat = path.stat()
+        except (ValueError, ImportError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except OSError:
+            self.send_json(404, {"error": f"Image '{name}' not found"})
+            return
+        
+        key = server.variant_key(path, stat, config)
+        etag = f'"{key}"'
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            server.cache.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        
+        try:
+            data, suffix = server.cache.get_or_render(key, lambda: server.render(path, config))
+        except UnsupportedImageError as e:
+            self.send_json(415, {"error": f"'{name}' is not a supported image: {e}"})
+            return
+        except UnprocessableImageError as e:
+            self.send_json(422, {"error": f"Could not process '{name}': {e}"})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"Could not process '{name}': {e}"})
+            return
+        
+        self.send_response(200)
+        self.send_header("Content-Type", server.CONTENT_TYPES.get(suffix, "application/octet-stream"))
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(
+    processor: ImageProcessor,
+    presets: Dict[str, Dict],
+    defaults: Optional[Dict] = None,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    cache_mb: float = 256,
+    disk_cache: Optional[str] = None,
+    disk_cache_mb: float = 1024,
+    max_dimension: int = ImageServer.MAX_DIMENSION
+):
+    """Run the resize service for processor.input_dir until interrupted."""
+    cache = VariantCache(cache_mb, disk_cache, disk_cache_mb)
+    server = ImageServer((host, port), processor, presets, defaults, cache, max_dimension)
+    print(f"🌐 Serving {processor.input_dir} on http://{host}:{server.server_port}/img/<name>")
+    print(f"   Cache: {cache_mb:g} MB in memory"
+          + (f", {disk_cache_mb:g} MB on disk in {disk_cache}" if disk_cache else ""))
+    print(f"   Stats: http://{host}:{server.server_port}/stats (press Ctrl+C to stop)\n")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Archive Output for Image Resizer & Compressor
+=============================================
+Writes processed images into a single archive instead of one file each,
+which avoids per-file metadata operations on slow network storage.
+
+- ZIP (.zip, stored, no recompression) and tar (.tar) archives
+- Pack files (.pack): append-only records with an index at the end, so an
+  entry can be read with one seek; a pack cut short by a crash is still
+  readable up to its last complete record
+- Encoded buffers are streamed into the archive, no temporary files
+- Entries can be looked up by output name or by original source filename
+
+Usage:
+    python output_archive.py thumbs.pack                  # list entries
+    python output_archive.py thumbs.pack photo.jpg -o out.jpg
+
+Author: Hacktoberfest 2025 Contributor
+"""
+
+import sys
+import json
+import time
+import struct
+import tarfile
+import zipfile
+import argparse
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+ARCHIVE_FORMATS = {
+    '.zip': 'zip',
+    '.tar': 'tar',
+    '.pack': 'pack',
+}
+
+# Pax header carrying the source filename of a tar entry
+TAR_SOURCE_HEADER = "IRC.source"
+
+
+def archive_format(path) -> str:
+    """Get the archive format for a path from its extension (raises ValueError)."""
+    suffix = Path(path).suffix.lower()
+    if suffix not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive type '{suffix}' (use {', '.join(ARCHIVE_FORMATS)})")
+    return ARCHIVE_FORMATS[suffix]
+
+
+class ArchiveWriter:
+    """Base class for archive writers; entries are written as they are added."""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = 0
+    
+    def add(self, name: str, data: bytes, source: Optional[str] = None):
+        """
+        Append an encoded image.
+        
+        Args:
+            name: Entry name (the output filename)
+            data: Encoded image bytes
+            source: Original source filename, for lookups by source
+        """
+        raise NotImplementedError
+    
+    def add_copy(self, name: str, target: str, data: bytes, source: Optional[str] = None):
+        """Append an entry with the same content as entry target (stored again by default)."""
+        self.add(name, data, source)
+    
+    def close(self):
+        raise NotImplementedError
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *_):
+        self.close()
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    """ZIP archive with stored (uncompressed) entries; the source name is the entry comment."""
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True)
+    
+    def add(self, name: str, data: bytes, source: Optional[str] = None):
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        if source:
+            info.comment = source.encode()
+        self._zip.writestr(info, data)
+        self.entries += 1
+    
+    def close(self):
+        self._zip.close()
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """POSIX (pax) tar archive; copies are stored as hardlink members."""
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self._tar = tarfile.open(self.path, "w", format=tarfile.PAX_FORMAT)
+    
+    def _info(self, name: str, source: Optional[str]) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        if source:
+            info.pax_headers = {TAR_SOURCE_HEADER: source}
+        return info
+    
+    def add(self, name: str, data: bytes, source: Optional[str] = None):
+        info = self._info(name, source)
+        info.size = len(data)
+        self._tar.addfile(info, BytesIO(data))
+        self.entries += 1
+    
+    def add_copy(self, name: str, target: str, data: bytes, source: Optional[str] = None):
+        info = self._info(name, source)
+        info.type = tarfile.LNKTYPE
+        info.linkname = target
+        self._tar.addfile(info)
+        self.entries += 1
+    
+    def close(self):
+        self._tar.close()
+
+
+class PackWriter(ArchiveWriter):
+    """
+    Append-only pack file.
+    
+    Layout: MAGIC, then one record per entry (RECORD header, name, source,
+    payload), then an index record (JSON: name -> [offset, size, source])
+    and a FOOTER holding the index record's offset. Copies are alias
+    records whose payload is the target entry's name; the index points
+    them at the target's data.
+    """
+    
+    MAGIC = b"IRCPACK1"
+    RECORD = struct.Struct("<4sBHHQ")  # marker, kind, name length, source length, payload length
+    RECORD_MARKER = b"IRCR"
+    FOOTER = struct.Struct("<Q8s")  # index record offset, FOOTER_MAGIC
+    FOOTER_MAGIC = b"IRCINDEX"
+    KIND_DATA = 0
+    KIND_ALIAS = 1
+    KIND_INDEX = 2
+    
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(self.path, "wb")
+        self._file.write(self.MAGIC)
+        self._offset = len(self.MAGIC)
+        self.index: Dict[str, List] = {}
+    
+    def _record(self, kind: int, name: str, source: Optional[str], payload: bytes) -> int:
+        """Write one record and return the offset of its payload."""
+        name_bytes = name.encode()
+        source_bytes = (source or "").encode()
+        header = self.RECORD.pack(self.RECORD_MARKER, kind, len(name_bytes), len(source_bytes), len(payload))
+        self._file.write(header + name_bytes + source_bytes)
+        self._file.write(payload)
+        payload_offset = self._offset + len(header) + len(name_bytes) + len(source_bytes)
+        self._offset = payload_offset + len(payload)
+        return payload_offset
+    
+    def add(self, name: str, data: bytes, source: Optional[str] = None):
+        offset = self._record(self.KIND_DATA, name, source, data)
+        self.index[name] = [offset, len(data), source]
+        self.entries += 1
+    
+    def add_copy(self, name: str, target: str, data: bytes, source: Optional[str] = None):
+        if target not in self.index:
+            self.add(name, data, source)
+            return
+        self._record(self.KIND_ALIAS, name, source, target.encode())
+        self.index[name] = [self.index[target][0], self.index[target][1], source]
+        self.entries += 1
+    
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._offset
+        self._record(self.KIND_INDEX, "", None, json.dumps(self.index).encode())
+        self._file.write(self.FOOTER.pack(index_offset, self.FOOTER_MAGIC))
+        self._file.close()
+
+
+def open_writer(path) -> ArchiveWriter:
+    """Create an archive writer for path, chosen by its extension (overwrites path)."""
+    return {
+        'zip': ZipArchiveWriter,
+        'tar': TarArchiveWriter,
+        'pack': PackWriter,
+    }[archive_format(path)](path)
+
+
+class ArchiveReader:
+    """
+    Random-access reader for archives written by open_writer().
+    
+    Entries are found by output name or by original source filename.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.format = archive_format(path)
+        self._sources: Dict[str, str] = {}
+        if self.format == 'zip':
+            self._zip = zipfile.ZipFile(self.path)
+            self._names = [info.filename for info in self._zip.infolist()]
+            for info in self._zip.infolist():
+                if info.comment:
+                    self._sources[info.comment.decode()] = info.filename
+        elif self.format == 'tar':
+            self._tar = tarfile.open(self.path)
+            self._members = {member.name: member for member in self._tar.getmembers()}
+            self._names = list(self._members)
+            for member in self._members.values():
+                if TAR_SOURCE_HEADER in member.pax_headers:
+                    self._sources[member.pax_headers[TAR_SOURCE_HEADER]] = member.name
+        else:
+            self._file = open(self.path, "rb")
+            self._index = self._load_pack_index()
+            self._names = list(self._index)
+            for name, (_, _, source) in self._index.items():
+                if source:
+                    self._sources[source] = name
+    
+    def _load_pack_index(self) -> Dict[str, List]:
+        """Read a pack's index, or rebuild it by scanning if the pack was not closed."""
+        f = self._file
+        if f.read(len(PackWriter.MAGIC)) != PackWriter.MAGIC:
+            raise ValueError(f"{self.path} is not a pack file")
+        f.seek(0, 2)
+        end = f.tell()
+        if end >= len(PackWriter.MAGIC) + PackWriter.FOOTER.size:
+            f.seek(end - PackWriter.FOOTER.size)
+            index_offset, magic = PackWriter.FOOTER.unpack(f.read(PackWriter.FOOTER.size))
+            if magic == PackWriter.FOOTER_MAGIC:
+                f.seek(index_offset)
+                kind, _, payload = self._read_record()
+                if kind == PackWriter.KIND_INDEX:
+                    return json.loads(payload)
+        
+        # No valid footer: recover every complete record
+        index = {}
+        f.seek(len(PackWriter.MAGIC))
+        while True:
+            offset = f.tell()
+            record = self._read_record()
+            if record is None:
+                break
+            kind, (name, source), payload = record
+            if kind == PackWriter.KIND_DATA:
+                index[name] = [f.tell() - len(payload), len(payload), source or None]
+            elif kind == PackWriter.KIND_ALIAS and payload.decode() in index:
+                index[name] = index[payload.decode()][:2] + [source or None]
+            elif kind == PackWriter.KIND_INDEX:
+                f.seek(offset)
+                break
+        return index
+    
+    def _read_record(self) -> Optional[Tuple[int, Tuple[str, str], bytes]]:
+        """Read the record at the current position (None if it is missing or incomplete)."""
+        f = self._file
+        header = f.read(PackWriter.RECORD.size)
+        if len(header) < PackWriter.RECORD.size:
+            return None
+        marker, kind, name_length, source_length, length = PackWriter.RECORD.unpack(header)
+        if marker != PackWriter.RECORD_MARKER:
+            return None
+        names = f.read(name_length + source_length)
+        payload = f.read(length)
+        if len(names) < name_length + source_length or len(payload) < length:
+            return None
+        name = names[:name_length].decode()
+        source = names[name_length:].decode()
+        return kind, (name, source), payload
+    
+    def names(self) -> List[str]:
+        """Entry names in archive order."""
+        return list(self._names)
+    
+    def sources(self) -> Dict[str, str]:
+        """Mapping of source filename to entry name."""
+        return dict(self._sources)
+    
+    def resolve(self, name: str) -> Optional[str]:
+        """Get the entry name for an output name or a source filename."""
+        if name in self._sources:
+            return self._sources[name]
+        if self.format == 'zip':
+            return name if name in self._names else None
+        if self.format == 'tar':
+            return name if name in self._members else None
+        return name if name in self._index else None
+    
+    def __contains__(self, name: str) -> bool:
+        return self.resolve(name) is not None
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def read(self, name: str) -> bytes:
+        """Read an entry by output name or source filename (raises KeyError)."""
+        entry = self.resolve(name)
+        if entry is None:
+            raise KeyError(f"No entry for '{name}' in {self.path}")
+        if self.format == 'zip':
+            return self._zip.read(entry)
+        if self.format == 'tar':
+            return self._tar.extractfile(self._members[entry]).read()
+        offset, size, _ = self._index[entry]
+        self._file.seek(offset)
+        return self._file.read(size)
+    
+    def close(self):
+        {'zip': lambda: self._zip.close(), 'tar': lambda: self._tar.close(),
+         'pack': lambda: self._file.close()}[self.format]()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *_):
+        self.close()
+
+
+def open_archive(path) -> ArchiveReader:
+    """Open an archive written by open_writer() for random access."""
+    return ArchiveReader(path)
+
+
+def main():
+    """List an archive or extract one entry."""
+    parser = argparse.ArgumentParser(
+        description="Read archives written with cli_interface.py --archive",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # List entries (output name <- source name)
+  python output_archive.py output/thumbs.pack
+
+  # Extract one image by its original filename
+  python output_archive.py output/thumbs.pack IMG_0042.jpg -o thumb.jpg
+        """
+    )
+    parser.add_argument('archive', help='Archive file (.zip, .tar or .pack)')
+    parser.add_argument('name', nargs='?', help='Entry to extract (output name or source filename)')
+    parser.add_argument('--output', '-o', help='File to write the entry to (default: the entry name)')
+    args = parser.parse_args()
+    
+    with open_archive(args.archive) as archive:
+        if not args.name:
+            by_entry = {entry: source for source, entry in archive.sources().items()}
+            for entry in archive:
+                source = by_entry.get(entry)
+                print(f"{entry}" + (f" <- {source}" if source and source != entry else ""))
+            print(f"\n{len(archive)} entr{'y' if len(archive) == 1 else 'ies'} in {args.archive}")
+            return
+        try:
+            data = archive.read(args.name)
+        except KeyError as e:
+            print(f"❌ {e.args[0]}")
+            sys.exit(1)
+        output = Path(args.output or archive.resolve(args.name))
+        output.write_bytes(data)
+        print(f"✓ Extracted {args.name} to {output} ({len(data) / 1024:.2f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,50 @@ This script verifies that all dependencies are installed correctly
 and creates a test image to verify the functionality.
 """
 
+import io
+import os
 import sys
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
 from pathlib import Path
 
+try:
+    from image_resizer_compressor import ImageProcessor
+except Exception:
+    # Reported by test_script_import()
+    ImageProcessor = object
+
+
+class CrashingProcessor(ImageProcessor):
+    """ImageProcessor whose worker process dies on one image, as if killed for running out of memory."""
+    
+    CRASH_NAME = "img_2.jpg"
+    
+    def process_image(self, image_path, *args, **kwargs):
+        if image_path.name == self.CRASH_NAME:
+            os._exit(1)
+        return super().process_image(image_path, *args, **kwargs)
+
+
+class KilledProcessor(ImageProcessor):
+    """ImageProcessor whose process is killed while writing one image's output."""
+    
+    KILL_NAME = "img_2.jpg"
+    
+    def process_image(self, image_path, *args, **kwargs):
+        if image_path.name == self.KILL_NAME:
+            self.temp_path(self.output_dir / image_path.name).write_bytes(b"\xff\xd8 torn")
+            os._exit(1)
+        return super().process_image(image_path, *args, **kwargs)
+
+
+def run_killed_batch(input_dir: str, output_dir: str):
+    """Serial batch run that is killed part-way (target of a child process)."""
+    with redirect_stdout(io.StringIO()):
+        KilledProcessor(input_dir, output_dir).batch_process(width=120, quiet=True)
+
 
 def test_imports():
     """Test if all required modules can be imported."""
@@ -153,7 +194,356 @@ def run_quick_test():
         else:
             print(f"\n⚠ No images were processed")
             return False
+    
+    except Exception as e:
+        print(f"✗ Test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def make_test_images(directory: Path, sizes, suffix: str = ".jpg"):
+    """Write distinct noisy gradient images named img_0, img_1, ... into directory."""
+    from PIL import Image
+    
+    paths = []
+    for index, size in enumerate(sizes):
+        img = Image.merge("RGB", (
+            Image.linear_gradient("L").resize(size),
+            Image.effect_noise(size, 20 + index * 5),
+            Image.new("L", size, (60 * index) % 256),
+        ))
+        path = directory / f"img_{index}{suffix}"
+        if suffix == ".jpg":
+            img.save(path, quality=90)
+        else:
+            img.save(path)
+        paths.append(path)
+    return paths
+
+
+def test_resize_service():
+    """Check the resize service cache (coalescing, LRU and disk eviction) and HTTP status codes."""
+    print("\nTesting resize service...")
+    
+    try:
+        import urllib.error
+        import urllib.request
+        from image_resizer_compressor import ImageProcessor
+        from image_server import ImageServer, VariantCache
+        
+        # Simultaneous requests for one variant wait for a single render
+        cache = VariantCache(max_mb=1)
+        renders = []
+        
+        def slow_render():
+            renders.append(1)
+            time.sleep(0.2)
+            return b"x" * 100, ".jpg"
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_render("k", slow_render)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(renders) == 1 and len(results) == 5, f"{len(renders)} render(s) for 5 requests"
+        assert cache.stats()["coalesced"] == 4, cache.stats()
+        print("✓ 5 simultaneous requests coalesced into 1 render")
+        
+        # The least recently used variant is evicted from memory
+        rendered = []
+        
+        def render(key):
+            def render_variant():
+                rendered.append(key)
+                return b"x" * 1000, ".jpg"
+            return render_variant
+        
+        cache = VariantCache(max_mb=3500 / (1024 * 1024))
+        for key in ("a", "b", "c"):
+            cache.get_or_render(key, render(key))
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("d", render("d"))
+        cache.get_or_render("a", render("a"))
+        cache.get_or_render("b", render("b"))
+        assert rendered == ["a", "b", "c", "d", "b"], rendered
+        print("✓ Memory cache evicts the least recently used variant")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            
+            # The disk cache keeps to its budget, least recently used first, and survives a restart
+            disk_dir = tmp / "cache"
+            keys = [f"{index:032x}" for index in range(3)]
+            rendered = []
+            cache = VariantCache(max_mb=0, disk_dir=str(disk_dir), disk_max_mb=2500 / (1024 * 1024))
+            cache.get_or_render(keys[0], render(keys[0]))
+            cache.get_or_render(keys[1], render(keys[1]))
+            cache.get_or_render(keys[0], render(keys[0]))
+            cache.get_or_render(keys[2], render(keys[2]))
+            files = sorted(path.stem for path in disk_dir.iterdir())
+            assert rendered == [keys[0], keys[1], keys[2]], rendered
+            assert files == [keys[0], keys[2]], files
+            assert cache.stats()["disk_evictions"] == 1, cache.stats()
+            (disk_dir / f"{keys[1]}.jpg.1.tmp").write_bytes(b"torn write")
+            cache = VariantCache(max_mb=0, disk_dir=str(disk_dir), disk_max_mb=2500 / (1024 * 1024))
+            cache.get_or_render(keys[2], render(keys[2]))
+            assert rendered == [keys[0], keys[1], keys[2]], rendered
+            assert cache.stats()["disk_hits"] == 1, cache.stats()
+            assert not list(disk_dir.glob("*.tmp")), "leftover temp file"
+            print("✓ Disk cache evicts beyond its budget and is reused after a restart")
+            
+            # ETag revalidation, and client errors instead of 500
+            ingest = tmp / "ingest"
+            ingest.mkdir()
+            image = make_test_images(ingest, [(200, 150)])[0]
+            (ingest / "bad.jpg").write_bytes(b"not an image")
+            data = image.read_bytes()
+            (ingest / "broken.jpg").write_bytes(data[:len(data) // 2])
+            server = ImageServer(("127.0.0.1", 0), ImageProcessor(str(ingest), str(tmp / "output")), {})
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            
+            def get(query, headers=None):
+                request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/img/{query}",
+                                                 headers=headers or {})
+                try:
+                    with urllib.request.urlopen(request) as response:
+                        return response.status, response.headers
+                except urllib.error.HTTPError as e:
+                    return e.code, e.headers
             
+            try:
+                status, headers = get("img_0.jpg?w=40")
+                assert status == 200 and headers["ETag"], status
+                assert get("img_0.jpg?w=40", {"If-None-Match": headers["ETag"]})[0] == 304
+                assert server.cache.stats()["renders"] == 1, server.cache.stats()
+                statuses = {query: get(query)[0] for query in
+                            ("bad.jpg?w=10", "broken.jpg?w=10", "img_0.jpg?w=0", "missing.jpg?w=10")}
+                expected = {"bad.jpg?w=10": 415, "broken.jpg?w=10": 422,
+                            "img_0.jpg?w=0": 400, "missing.jpg?w=10": 404}
+                assert statuses == expected, statuses
+            finally:
+                server.shutdown()
+                server.server_close()
+            print("✓ ETag answered with 304; undecodable 415, corrupt 422, bad size 400, missing 404")
+        return True
+        
+    except AssertionError as e:
+        print(f"✗ Resize service check failed: {e}")
+        return False
+    except Exception as e:
+        print(f"✗ Test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_parallel_batches():
+    """Check that parallel runs match serial ones, keep input order and survive a dead worker."""
+    print("\nTesting parallel batch processing...")
+    
+    try:
+        from batch_scheduler import BatchScheduler
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            ingest = tmp / "ingest"
+            ingest.mkdir()
+            # Not sorted by size, so largest-first scheduling differs from input order
+            sizes = [(320, 240), (640, 480), (200, 300), (480, 360), (100, 100), (256, 256)]
+            names = [path.name for path in make_test_images(ingest, sizes)]
+            
+            def run(mode, workers, method="pillow"):
+                """Outputs and result names of one run in its own output directory."""
+                processor = ImageProcessor(str(ingest), str(tmp / f"{mode}_{workers}_{method}"))
+                settings = processor.effective_settings({"method": method, "width": 120, "quality": 80})
+                scheduler = BatchScheduler(processor, settings, workers=workers)
+                with redirect_stdout(io.StringIO()):
+                    results = list(scheduler.run(mode, processor.get_image_files()))
+                assert all(result["success"] for result in results), [r["error"] for r in results]
+                outputs = {path.name: path.read_bytes() for path in processor.output_dir.iterdir()}
+                return outputs, [result["name"] for result in results]
+            
+            serial = {method: run("scheduled", 1, method) for method in ("pillow", "opencv")}
+            assert serial["pillow"][1] == names, serial["pillow"][1]
+            for mode in BatchScheduler.MODES:
+                method = "opencv" if mode == "shape_batches" else "pillow"
+                outputs, order = run(mode, 3, method)
+                assert order == names, f"{mode}: results in order {order}"
+                assert outputs == serial[method][0], f"{mode}: outputs differ from a serial run"
+            print(f"✓ {len(BatchScheduler.MODES)} parallel modes match serial output, results in input order")
+            
+            # A worker process that dies fails its images; the rest of the batch goes on
+            processor = CrashingProcessor(str(ingest), str(tmp / "crash"))
+            with redirect_stdout(io.StringIO()):
+                successful, failed = processor.batch_process(width=120, workers=2, quiet=True)
+            results = {result["name"]: result for result in processor.last_results}
+            crashed = results[CrashingProcessor.CRASH_NAME]
+            assert len(results) == len(names), sorted(results)
+            assert not crashed["success"] and crashed["error"].startswith("Worker process failed"), crashed
+            # Only images running alongside it in the pool fail with it
+            assert 1 <= failed <= 2 and successful == len(names) - failed, (successful, failed)
+            assert processor.last_schedule["pool_restarts"] == 1, processor.last_schedule
+            print(f"✓ Dead worker reported as failed ({failed} image(s)), {successful} processed in a new pool")
+        return True
+        
+    except AssertionError as e:
+        print(f"✗ Parallel batch check failed: {e}")
+        return False
+    except Exception as e:
+        print(f"✗ Test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_resume():
+    """Check that a killed run leaves a journal and resuming skips its images without leftover temp files."""
+    print("\nTesting resume after a killed run...")
+    
+    try:
+        import multiprocessing
+        from image_resizer_compressor import ProcessingManifest
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            ingest = tmp / "ingest"
+            output = tmp / "output"
+            ingest.mkdir()
+            names = [path.name for path in make_test_images(ingest, [(320, 240)] * 5)]
+            finished = names[:names.index(KilledProcessor.KILL_NAME)]
+            
+            child = multiprocessing.Process(target=run_killed_batch, args=(str(ingest), str(output)))
+            child.start()
+            child.join()
+            assert child.exitcode == 1, f"killed run exited with {child.exitcode}"
+            assert not (output / ProcessingManifest.FILE_NAME).exists(), "killed run saved its manifest"
+            manifest = ProcessingManifest(output)
+            assert sorted(Path(entry["source"]).name for entry in manifest.interrupted.values()) == finished, \
+                manifest.interrupted
+            assert any(path.name.endswith(".tmp") for path in output.iterdir()), "no torn temp file to clean up"
+            print(f"✓ Killed run journaled {len(finished)} finished image(s)")
+            mtimes = {name: (output / name).stat().st_mtime_ns for name in finished}
+            
+            processor = ImageProcessor(str(ingest), str(output))
+            with redirect_stdout(io.StringIO()):
+                successful, failed = processor.batch_process(width=120, resume=True, quiet=True)
+            skipped = sorted(result["name"] for result in processor.last_results if result["skipped"])
+            assert skipped == finished, f"skipped {skipped}"
+            assert (successful, failed) == (len(names) - len(finished), 0), (successful, failed)
+            rewritten = [name for name in finished if (output / name).stat().st_mtime_ns != mtimes[name]]
+            assert not rewritten, f"finished outputs rewritten: {rewritten}"
+            leftovers = [path.name for path in output.iterdir() if path.name.endswith(".tmp")]
+            assert not leftovers, f"temp files left: {leftovers}"
+            assert not (output / ProcessingManifest.JOURNAL_NAME).exists(), "journal left after resume"
+            assert len(ProcessingManifest(output).entries) == len(names)
+            print(f"✓ Resume skipped {len(skipped)} image(s), processed {successful}, left no temp files")
+        return True
+        
+    except AssertionError as e:
+        print(f"✗ Resume check failed: {e}")
+        return False
+    except Exception as e:
+        print(f"✗ Test failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_shared_frames():
+    """Check frame ring slot reuse, oversize frames and shared memory cleanup after an error."""
+    print("\nTesting shared memory frames...")
+    
+    try:
+        import numpy as np
+        from multiprocessing import shared_memory
+        from batch_scheduler import BatchScheduler, _FrameRing
+        
+        def segments():
+            # Linux lists shared memory blocks here; elsewhere the leak check is skipped
+            return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+        
+        before = segments()
+        
+        # A frame waits for a free slot and gets the one given back
+        ring = _FrameRing(2, 64)
+        try:
+            taken = [ring.acquire(), ring.acquire()]
+            waiting = []
+            thread = threading.Thread(target=lambda: waiting.append(ring.acquire()))
+            thread.start()
+            time.sleep(0.1)
+            assert not waiting, "acquired a slot while none was free"
+            ring.release(taken[1])
+            thread.join(5)
+            assert waiting == [taken[1]] and ring.deferred == 1, (waiting, ring.deferred)
+            frame = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+            metadata = ring.put(waiting[0], frame)
+            assert (_FrameRing.view(ring.memory, **metadata) == frame).all(), "slot does not hold the frame"
+        finally:
+            ring.close()
+        try:
+            shared_memory.SharedMemory(name=ring.name).close()
+            raise AssertionError(f"{ring.name} still exists after close()")
+        except FileNotFoundError:
+            pass
+        print("✓ Frame ring hands a released slot to the waiting frame and removes its block")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            ingest = tmp / "ingest"
+            ingest.mkdir()
+            make_test_images(ingest, [(320, 240)] * 8)
+            # PNGs are decoded at full size, too large for a slot of the ring below
+            make_test_images(ingest, [(800, 600)] * 2, ".png")
+            
+            def run(name, mode, **options):
+                processor = ImageProcessor(str(ingest), str(tmp / name))
+                settings = processor.effective_settings({"method": "pillow", "width": 120})
+                stats = {}
+                scheduler = BatchScheduler(processor, settings, stats=stats, **options)
+                with redirect_stdout(io.StringIO()):
+                    results = list(scheduler.run(mode, processor.get_image_files()))
+                outputs = {path.name: path.read_bytes() for path in processor.output_dir.iterdir()}
+                return results, outputs, stats
+            
+            _, serial, _ = run("serial", "scheduled")
+            results, outputs, stats = run("shared", "shared_memory", workers=2, max_inflight_mb=1.5)
+            assert all(result["success"] for result in results), [result["error"] for result in results]
+            assert outputs == serial, "outputs differ from a serial run"
+            # 8 frames through 4 slots means slots were reused
+            assert stats["shared_frames"] == 8 and stats["ring_slots"] == 4, stats
+            assert stats["unshared"] == 2, stats
+            print(f"✓ {stats['shared_frames']} frames shared through {stats['ring_slots']} slots, "
+                  f"{stats['unshared']} oversize frame(s) processed whole")
+            
+            # A corrupt image fails on its own; a run abandoned by an error still removes its block
+            (ingest / "broken.jpg").write_bytes((ingest / "img_0.jpg").read_bytes()[:300])
+            processor = ImageProcessor(str(ingest), str(tmp / "error"))
+            settings = processor.effective_settings({"method": "pillow", "width": 120})
+            results = BatchScheduler(processor, settings, workers=2, max_inflight_mb=1.5).run(
+                "shared_memory", processor.get_image_files()
+            )
+            try:
+                with redirect_stdout(io.StringIO()):
+                    for result in results:
+                        if result["name"] == "broken.jpg":
+                            assert not result["success"], "corrupt image succeeded"
+                            raise RuntimeError("stop")
+                raise AssertionError("no result for the corrupt image")
+            except RuntimeError:
+                # As when a caller's loop is left by an exception and the generator is collected
+                results.close()
+            leaked = segments() - before
+            assert not leaked, f"shared memory left behind: {sorted(leaked)}"
+            print("✓ Corrupt image failed alone; no shared memory left after an aborted run")
+        return True
+        
+    except AssertionError as e:
+        print(f"✗ Shared memory check failed: {e}")
+        return False
     except Exception as e:
         print(f"✗ Test failed: {str(e)}")
         import traceback
@@ -171,30 +561,46 @@ def main():
     
     all_passed = True
     
+    # Behavior checks, each in its own temporary directory
+    behavior_tests = [
+        ("Testing parallel batches", test_parallel_batches),
+        ("Testing resume after a killed run", test_resume),
+        ("Testing shared memory frames", test_shared_frames),
+        ("Testing the resize service", test_resize_service),
+    ]
+    total = 4 + len(behavior_tests)
+    
     # Test 1: Imports
-    print("\n[Test 1/4] Checking dependencies...")
+    print(f"\n[Test 1/{total}] Checking dependencies...")
     if not test_imports():
         print("\n❌ Please install dependencies:")
         print("   pip install -r requirements.txt")
         all_passed = False
     
     # Test 2: Script import
-    print("\n[Test 2/4] Checking main script...")
+    print(f"\n[Test 2/{total}] Checking main script...")
     if not test_script_import():
         all_passed = False
     
     # Test 3: Create test images
     if all_passed:
-        print("\n[Test 3/4] Creating test images...")
+        print(f"\n[Test 3/{total}] Creating test images...")
         if not create_test_image():
             all_passed = False
     
     # Test 4: Run functionality test
     if all_passed:
-        print("\n[Test 4/4] Testing image processing...")
+        print(f"\n[Test 4/{total}] Testing image processing...")
         if not run_quick_test():
             all_passed = False
     
+    # Tests 5+: Behavior checks
+    if all_passed:
+        for number, (title, test) in enumerate(behavior_tests, 5):
+            print(f"\n[Test {number}/{total}] {title}...")
+            if not test():
+                all_passed = False
+    
     # Final result
     print("\n" + "="*60)
     if all_passed:
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Watch Folder Mode for Image Resizer & Compressor
+================================================
+Continuously processes images as they are dropped into an ingest folder.
+
+- Uses Linux inotify (through ctypes, no extra packages) to learn about
+  new or changed files, and falls back to polling the folder elsewhere
+- Waits until a file has stopped growing before processing it
+- Keeps a warm pool of worker processes for the whole session, and
+  replaces it if a worker dies
+- Skips images whose output is already up to date (processing manifest),
+  including those finished by a session that was killed
+- Drains in-flight images and saves the manifest on SIGTERM / Ctrl+C
+
+Author: Hacktoberfest 2025 Contributor
+"""
+
+import os
+import sys
+import time
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from image_resizer_compressor import ImageProcessor, ProcessingManifest, RunMetrics, get_backend
+
+
+def _init_worker():
+    """
+    Pool initializer: let the parent decide when workers stop on Ctrl+C, and
+    let SIGTERM (sent when the pool is torn down) end a worker instead of
+    running the watcher's stop handler inherited through fork.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+class _InotifySource:
+    """File change events for one directory from Linux inotify."""
+    
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+    EVENT_HEADER = struct.Struct("iIII")
+    
+    def __init__(self, directory: Path):
+        """Start watching directory (raises OSError if inotify is unavailable)."""
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.directory = directory
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+    
+    def wait(self, timeout: float) -> Set[Path]:
+        """
+        Wait up to timeout seconds and return the paths that changed.
+        
+        If the kernel's event queue overflowed, events were lost, so every
+        file in the directory is returned instead.
+        """
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        overflowed = False
+        while offset < len(data):
+            _, mask, _, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            if mask & self.IN_Q_OVERFLOW:
+                overflowed = True
+            elif name:
+                changed.add(self.directory / os.fsdecode(name))
+        if overflowed:
+            print("⚠ inotify event queue overflowed; rescanning the folder")
+            with os.scandir(self.directory) as entries:
+                changed.update(Path(entry.path) for entry in entries)
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingSource:
+    """File change events for one directory, found by rescanning it."""
+    
+    def __init__(self, directory: Path, interval: float = 1.0):
+        self.directory = directory
+        self.interval = interval
+        self.signatures: Dict[Path, Tuple[int, int]] = {}
+        self.next_scan = 0.0
+    
+    def wait(self, timeout: float) -> Set[Path]:
+        """Wait up to timeout seconds and return the paths that changed."""
+        delay = self.next_scan - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                return set()
+        self.next_scan = time.monotonic() + self.interval
+        
+        changed = set()
+        signatures = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                path = Path(entry.path)
+                signatures[path] = (stat.st_size, stat.st_mtime_ns)
+                if self.signatures.get(path) != signatures[path]:
+                    changed.add(path)
+        self.signatures = signatures
+        return changed
+    
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """Watch an ingest folder and process new or changed images continuously."""
+    
+    def __init__(
+        self,
+        processor: ImageProcessor,
+        settings: Dict,
+        workers: int = 1,
+        settle_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        force: bool = False,
+        max_memory_mb: Optional[float] = None,
+        quiet: bool = False,
+        metrics_path: Optional[str] = None
+    ):
+        """
+        Initialize the watcher.
+        
+        Args:
+            processor: ImageProcessor whose input_dir is watched
+            settings: Processing settings (see ImageProcessor.effective_settings())
+            workers: Number of worker processes kept warm (0 = one per CPU)
+            settle_seconds: How long a file's size and mtime must stay
+                unchanged before it is processed
+            poll_interval: Rescan interval when inotify is unavailable
+            force: Process images even if their output is up to date
+            max_memory_mb: Memory cap per image (see ImageBackend.render())
+            quiet: Only print failed images and the summary
+            metrics_path: JSON Lines file to append per-image metrics to
+        """
+        self.processor = processor
+        self.settings = ImageProcessor.effective_settings(settings)
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.force = force
+        self.max_memory_mb = max_memory_mb
+        self.quiet = quiet
+        self.metrics = RunMetrics(metrics_path)
+        # A watcher restarted after a crash picks up what the last session finished
+        self.manifest = ProcessingManifest(processor.output_dir, resume=True)
+        self.config_hash = self.manifest.config_hash(self.settings)
+        self.successful = 0
+        self.failed = 0
+        self._stopping = False
+    
+    def stop(self, *_):
+        """Stop accepting new files; in-flight images are still finished."""
+        if not self._stopping:
+            print("\n⏹ Stopping: finishing images in progress...")
+        self._stopping = True
+    
+    def _open_source(self):
+        try:
+            source = _InotifySource(self.processor.input_dir)
+            print("👀 Watching with inotify")
+        except OSError:
+            source = _PollingSource(self.processor.input_dir, self.poll_interval)
+            print(f"👀 Watching by polling every {self.poll_interval:g}s")
+        return source
+    
+    def _is_image(self, path: Path) -> bool:
+        return path.suffix.lower() in self.processor.SUPPORTED_FORMATS and path.parent == self.processor.input_dir
+    
+    def _output_path(self, path: Path) -> Path:
+        return self.processor.output_dir / ImageProcessor.output_name(path, self.settings.get("output_format"))
+    
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+    
+    def _finish(self, future, path: Path):
+        try:
+            result = future.result()
+        except Exception as e:
+            # A worker died (BrokenProcessPool) or the result could not be sent back
+            result = self.processor.failed_result(path, self._output_path(path), self.settings["method"], e)
+        self.metrics.record(result)
+        if not self.quiet or not result["success"]:
+            self.processor.print_result(result)
+        if result["success"]:
+            self.successful += 1
+            self.manifest.update(result, self.config_hash)
+        else:
+            self.failed += 1
+    
+    def run(self) -> Tuple[int, int]:
+        """
+        Process the folder until stopped by SIGTERM or Ctrl+C.
+        
+        Images already in the folder are picked up first (up-to-date ones
+        are skipped), then new or changed files as they settle.
+        
+        Returns:
+            Tuple of (successful_count, failed_count)
+        """
+        get_backend(self.settings["method"])
+        self.processor.remove_stale_temp_files(self.processor.output_dir)
+        # path -> ((size, mtime_ns), monotonic time that signature was first seen)
+        pending: Dict[Path, Tuple[Optional[Tuple[int, int]], float]] = {}
+        in_flight = {}
+        last_save = time.monotonic()
+        tick = min(0.25, self.settle_seconds / 2) or 0.05
+        
+        # Files already present are treated like new arrivals
+        for image_path in self.processor.get_image_files():
+            pending[image_path] = (None, time.monotonic())
+        
+        source = self._open_source()
+        previous_handlers = {}
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                previous_handlers[signum] = signal.signal(signum, self.stop)
+            except ValueError:
+                pass  # Not in the main thread; rely on stop() being called
+        
+        print(f"📁 Watching {self.processor.input_dir} (press Ctrl+C to stop)\n")
+        
+        pool = self._new_pool()
+        try:
+            while not self._stopping:
+                for path in source.wait(tick):
+                    if self._is_image(path):
+                        pending[path] = (None, time.monotonic())
+                
+                # Submit files whose size and mtime have settled
+                now = time.monotonic()
+                broken = False
+                for path, (signature, since) in list(pending.items()):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        del pending[path]
+                        continue
+                    current = (stat.st_size, stat.st_mtime_ns)
+                    if current != signature:
+                        pending[path] = (current, now)
+                        continue
+                    if now - since < self.settle_seconds or path in in_flight.values():
+                        continue
+                    if not self.force and self.manifest.is_up_to_date(path, self._output_path(path), self.config_hash):
+                        del pending[path]
+                        continue
+                    try:
+                        future = pool.submit(
+                            self.processor.process_image, path, self.settings,
+                            hash_source=True, max_memory_mb=self.max_memory_mb
+                        )
+                    except BrokenProcessPool:
+                        # Replaced below; the file is submitted again next tick
+                        broken = True
+                        break
+                    del pending[path]
+                    in_flight[future] = path
+                
+                done = [future for future in in_flight if future.done()]
+                broken = broken or any(isinstance(future.exception(), BrokenProcessPool) for future in done)
+                if broken:
+                    # Every image in a broken pool fails; collect them all before replacing it
+                    done = list(wait(in_flight).done)
+                for future in done:
+                    self._finish(future, in_flight.pop(future))
+                if broken:
+                    print("⚠ A worker process died; starting a new pool")
+                    pool.shutdown(wait=False)
+                    pool = self._new_pool()
+                if done and time.monotonic() - last_save > 5:
+                    self.manifest.save()
+                    last_save = time.monotonic()
+            
+            # Graceful drain
+            for future in wait(in_flight).done if in_flight else ():
+                self._finish(future, in_flight[future])
+        finally:
+            pool.shutdown()
+            source.close()
+            self.manifest.save()
+            self.metrics.close()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        
+        print("=" * 60)
+        print("\nWatch stopped.")
+        print(f"✓ Successful: {self.successful}")
+        print(f"✗ Failed: {self.failed}")
+        self.metrics.print_summary()
+        return self.successful, self.failed
@@ -1,21 +1,240 @@
 import os
+import sqlite3
+import argparse
 import hashlib
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-def get_file_hash(path, chunk_size=8192):
-    """Generate SHA256 hash for a file."""
-    h = hashlib.sha256()
+# Bytes hashed from each end of a file before it is hashed in full
+PARTIAL_BLOCK = 64 * 1024
+
+# Read buffer for full hashes; hashlib releases the GIL while hashing it
+CHUNK_SIZE = 1024 * 1024
+
+# Selectable digests; BLAKE2b is several times faster than SHA-256 on
+# 64-bit CPUs without SHA extensions
+DIGESTS = ("sha256", "blake2b")
+
+# Cache file used by --cache when no path is given
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "find_duplicates.sqlite")
+
+def get_file_hash(path, chunk_size=CHUNK_SIZE, digest="sha256"):
+    """Generate a hash (SHA256 by default, see DIGESTS) for a file."""
+    h = hashlib.new(digest)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            while size := f.readinto(buffer):
+                h.update(view[:size])
+        return h.hexdigest()
+    except (PermissionError, FileNotFoundError):
+        return None
+
+def get_partial_hash(path, size, block_size=PARTIAL_BLOCK, digest="sha256"):
+    """Generate a hash of the first and last block_size bytes of a file.
+
+    A file of at most two blocks is hashed whole, so its partial hash is
+    the same as get_file_hash().
+    """
+    h = hashlib.new(digest)
     try:
         with open(path, "rb") as f:
-            while chunk := f.read(chunk_size):
-                h.update(chunk)
+            if size <= 2 * block_size:
+                h.update(f.read())
+            else:
+                h.update(f.read(block_size))
+                f.seek(-block_size, os.SEEK_END)
+                h.update(f.read(block_size))
         return h.hexdigest()
     except (PermissionError, FileNotFoundError):
         return None
 
-def scan_folder(folder_path, mode="hash"):
-    """Scan folder and find duplicates based on mode ('name', 'size', or 'hash')."""
+class HashCache:
+    """On-disk SQLite cache of partial and full digests, for repeated scans.
+
+    Entries are keyed by device and inode, and only used while the file's
+    size and mtime_ns are unchanged. A file rewritten in place with its
+    size and mtime kept (e.g. restored by a backup tool) is not rehashed.
+    The entries under the scanned folder are read in one query up front,
+    and only new or changed entries are written back.
+    """
+
+    def __init__(self, path, folder_path, digest="sha256"):
+        self.path = path
+        # Partial digests also depend on the block size
+        self.digest = f"{digest}:{PARTIAL_BLOCK}"
+        self.prefix = os.path.join(os.path.abspath(folder_path), "")
+        self.hits = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS hashes (
+                dev INTEGER, inode INTEGER, digest TEXT, size INTEGER, mtime_ns INTEGER,
+                partial TEXT, full TEXT, path TEXT,
+                PRIMARY KEY (dev, inode, digest)
+            )
+        """)
+        rows = self.db.execute(
+            "SELECT dev, inode, size, mtime_ns, partial, full, path FROM hashes "
+            "WHERE digest = ? AND substr(path, 1, ?) = ?",
+            (self.digest, len(self.prefix), self.prefix)
+        )
+        self.entries = {(row[0], row[1]): row[2:] for row in rows}
+        # (dev, inode) of the files this scan compared; the rest are pruned
+        self.used = set()
+
+    def lookup(self, stat):
+        """Get the cached (partial, full) digests of a file, or None if it changed."""
+        key = (stat.st_dev, stat.st_ino)
+        self.used.add(key)
+        entry = self.entries.get(key)
+        if entry and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            self.hits += 1
+            return entry[2:4]
+        return None
+
+    def store(self, entries):
+        """Save (path, stat, partial, full) entries that are new or changed; full may be None.
+
+        An entry whose size, mtime and digests are unchanged keeps its stored
+        path, so hardlinks and symlinks to one inode do not rewrite it on
+        every scan.
+        """
+        rows = []
+        for path, stat, partial, full in entries:
+            key = (stat.st_dev, stat.st_ino)
+            entry = (stat.st_size, stat.st_mtime_ns, partial, full, os.path.abspath(path))
+            self.used.add(key)
+            cached = self.entries.get(key)
+            if cached is None or cached[:4] != entry[:4]:
+                self.entries[key] = entry
+                rows.append(key + (self.digest,) + entry)
+        self.db.executemany(
+            "INSERT OR REPLACE INTO hashes (dev, inode, digest, size, mtime_ns, partial, full, path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        self.db.commit()
+
+    def prune(self):
+        """Delete entries under the folder that this scan did not use; returns how many.
+
+        These are files that were deleted or replaced, and files no longer
+        compared because their size became unique.
+        """
+        stale = [key for key in self.entries if key not in self.used]
+        self.db.executemany(
+            "DELETE FROM hashes WHERE dev = ? AND inode = ? AND digest = ?",
+            [key + (self.digest,) for key in stale]
+        )
+        self.db.commit()
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def close(self):
+        self.db.close()
+
+def hash_files(hash_file, files, jobs=1):
+    """Hash (path, size) pairs with hash_file(path, size), largest first.
+
+    With jobs > 1 (0 = one per CPU core), files are hashed on a thread
+    pool. Starting with the largest keeps one huge file from being hashed
+    alone at the end. Returns a dict of path to digest.
+    """
+    files = sorted(files, key=lambda item: item[1], reverse=True)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(files) < 2:
+        return {path: hash_file(path, size) for path, size in files}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        digests = pool.map(lambda item: hash_file(*item), files)
+        return {path: digest for (path, _), digest in zip(files, digests)}
+
+def find_hash_duplicates(file_paths, stats=None, jobs=1, digest="sha256", cache=None):
+    """Group files by content hash, reading as little of them as possible.
+
+    Files are grouped by size first. Only files that share a size get a
+    partial hash (see get_partial_hash()), and only files that share a
+    partial hash are hashed in full. The groups and their order are the
+    same as when every file is hashed.
+
+    Each stage hashes its files on jobs threads (see hash_files()), with
+    digest (see DIGESTS) as the hash. With a HashCache, digests of
+    unchanged files are taken from it, and the new ones are saved to it.
+    If stats is a dict, it gets the number of files, their total bytes
+    and the bytes actually read.
+    """
+    by_size = defaultdict(list)
+    stats_of = {}
+    for path in file_paths:
+        try:
+            stats_of[path] = os.stat(path)
+        except OSError:
+            # Files that cannot be read are skipped, as when hashing
+            continue
+        by_size[stats_of[path].st_size].append(path)
+
+    candidates = [(path, size) for size, paths in by_size.items() if len(paths) > 1 for path in paths]
+    cached = {}
+    if cache:
+        for path, _ in candidates:
+            row = cache.lookup(stats_of[path])
+            if row:
+                cached[path] = row
+    partial = {path: cached[path][0] for path in cached}
+    to_hash = [(path, size) for path, size in candidates if path not in partial]
+    partial.update(hash_files(lambda path, size: get_partial_hash(path, size, digest=digest), to_hash, jobs))
+    by_partial = defaultdict(list)
+    bytes_read = sum(min(size, 2 * PARTIAL_BLOCK) for path, size in to_hash if partial[path])
+    for path, size in candidates:
+        if partial[path]:
+            by_partial[(size, partial[path])].append(path)
+
+    hashes = {}
+    survivors = []
+    for (size, key), same in by_partial.items():
+        if len(same) < 2:
+            continue
+        for path in same:
+            if size <= 2 * PARTIAL_BLOCK:
+                hashes[path] = key
+            elif path in cached and cached[path][1]:
+                hashes[path] = cached[path][1]
+            else:
+                survivors.append((path, size))
+                bytes_read += size
+    hashes.update(hash_files(lambda path, size: get_file_hash(path, digest=digest), survivors, jobs))
+
+    if cache:
+        # A full digest from an earlier run is kept while the file is unchanged
+        cache.store([
+            (path, stats_of[path], partial[path], hashes.get(path) or (cached[path][1] if path in cached else None))
+            for path, _ in candidates if partial[path]
+        ])
+
     duplicates = defaultdict(list)
+    for path in file_paths:
+        key = hashes.get(path)
+        if key:
+            duplicates[key].append(path)
+    if stats is not None:
+        stats["files"] = len(file_paths)
+        stats["bytes_total"] = sum(size * len(paths) for size, paths in by_size.items())
+        stats["bytes_read"] = bytes_read
+        stats["cached"] = len(cached)
+    return {k: v for k, v in duplicates.items() if len(v) > 1}
+
+def scan_folder(folder_path, mode="hash", stats=None, jobs=1, digest="sha256", cache=None):
+    """Scan folder and find duplicates based on mode ('name', 'size', or 'hash').
+
+    In 'hash' mode, files are hashed with digest on jobs threads, and
+    stats (a dict) is filled as in find_hash_duplicates(). With a
+    HashCache for folder_path, unchanged files are not rehashed, and cache
+    entries that the scan did not use are pruned.
+    """
+    duplicates = defaultdict(list)
+    file_paths = []
     for root, _, files in os.walk(folder_path):
         for file in files:
             file_path = os.path.join(root, file)
@@ -27,12 +246,18 @@ def scan_folder(folder_path, mode="hash"):
                 except OSError:
                     continue
             elif mode == "hash":
-                key = get_file_hash(file_path)
-                if not key:
-                    continue
+                file_paths.append(file_path)
+                continue
             else:
                 raise ValueError("Mode must be 'name', 'size', or 'hash'.")
             duplicates[key].append(file_path)
+    if mode == "hash":
+        duplicates = find_hash_duplicates(file_paths, stats, jobs, digest, cache)
+        if cache:
+            pruned = cache.prune()
+            if stats is not None:
+                stats["pruned"] = pruned
+        return duplicates
     return {k: v for k, v in duplicates.items() if len(v) > 1}
 
 def display_duplicates(duplicates):
@@ -58,14 +283,41 @@ def delete_duplicates(duplicates):
                 print(f"⚠️ Could not delete {f}: {e}")
 
 if __name__ == "__main__":
-    folder = input("Enter folder path to scan: ").strip()
-    print("\nSelect comparison mode:")
-    print("1. By name\n2. By size\n3. By hash (recommended)")
-    mode_choice = input("Enter choice (1/2/3): ").strip()
-    mode = {"1": "name", "2": "size", "3": "hash"}.get(mode_choice, "hash")
+    parser = argparse.ArgumentParser(description="Find duplicate files by name, size or content hash.")
+    parser.add_argument("folder", nargs="?", help="Folder to scan (asked for if omitted)")
+    parser.add_argument("--mode", choices=("name", "size", "hash"), help="Comparison mode (asked for if omitted)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Threads hashing files, 0 = one per CPU core (default: 1)")
+    parser.add_argument("--digest", choices=DIGESTS, default="sha256",
+                        help="Hash for content comparison (default: sha256)")
+    parser.add_argument("--cache", nargs="?", const=DEFAULT_CACHE, metavar="FILE",
+                        help=f"Keep digests in a SQLite cache so unchanged files are not rehashed "
+                             f"on the next scan (default file: {DEFAULT_CACHE})")
+    args = parser.parse_args()
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
 
-    duplicates = scan_folder(folder, mode)
+    folder = args.folder or input("Enter folder path to scan: ").strip()
+    mode = args.mode
+    if not mode:
+        print("\nSelect comparison mode:")
+        print("1. By name\n2. By size\n3. By hash (recommended)")
+        mode_choice = input("Enter choice (1/2/3): ").strip()
+        mode = {"1": "name", "2": "size", "3": "hash"}.get(mode_choice, "hash")
+
+    stats = {}
+    cache = HashCache(args.cache, folder, args.digest) if args.cache and mode == "hash" else None
+    try:
+        duplicates = scan_folder(folder, mode, stats, args.jobs, args.digest, cache)
+    finally:
+        if cache:
+            cache.close()
     display_duplicates(duplicates)
+    if stats.get("bytes_total"):
+        print(f"📊 Read {stats['bytes_read'] / 1024 / 1024:.1f} of {stats['bytes_total'] / 1024 / 1024:.1f} MB "
+              f"({stats['files']} files)")
+    if cache:
+        print(f"♻ {stats['cached']} file(s) reused cached digests, {stats.get('pruned', 0)} stale entries pruned")
 
     if duplicates:
         action = input("\nDo you want to delete duplicates? (y/n): ").strip().lower()
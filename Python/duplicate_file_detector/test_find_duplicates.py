@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Script for the Duplicate File Detector
+===========================================
+Scans a temporary folder twice with a hash cache and checks that edited
+files are rehashed and their stale cache entries pruned.
+"""
+
+import os
+import sys
+import tempfile
+
+from find_duplicates import HashCache, PARTIAL_BLOCK, get_file_hash, scan_folder
+
+# Larger than both partial blocks, so matching files are hashed in full
+FILE_SIZE = 3 * PARTIAL_BLOCK
+
+def write(path, middle):
+    """Write FILE_SIZE bytes whose first and last blocks are the same for every file."""
+    edge = b"e" * PARTIAL_BLOCK
+    with open(path, "wb") as f:
+        f.write(edge + middle * (FILE_SIZE - 2 * PARTIAL_BLOCK) + edge)
+
+def touch_later(path, stat):
+    """Move a file's mtime past stat's, in case the edit landed in the same clock tick."""
+    mtime_ns = max(os.stat(path).st_mtime_ns, stat.st_mtime_ns + 1_000_000)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def scan(folder, cache_path):
+    """Scan folder with the cache; returns (sorted groups of names, stats, cache entries)."""
+    stats = {}
+    cache = HashCache(cache_path, folder)
+    try:
+        duplicates = scan_folder(folder, "hash", stats, cache=cache)
+        entries = dict(cache.entries)
+    finally:
+        cache.close()
+    groups = sorted(sorted(os.path.basename(path) for path in paths) for paths in duplicates.values())
+    return groups, stats, entries
+
+def test_hash_cache():
+    """Check that the cache skips unchanged files, rehashes edited ones and prunes stale entries."""
+    print("Testing hash cache...")
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "files")
+        os.mkdir(folder)
+        cache_path = os.path.join(tmp, "cache.sqlite")
+        paths = {name: os.path.join(folder, name) for name in ("a.bin", "b.bin", "c.bin", "d.bin")}
+        write(paths["a.bin"], b"1")
+        write(paths["b.bin"], b"1")
+        # Same size and partial hash as a and b, so only its full hash tells it apart
+        write(paths["c.bin"], b"2")
+        with open(paths["d.bin"], "wb") as f:
+            f.write(b"unique size")
+
+        groups, stats, entries = scan(folder, cache_path)
+        assert groups == [["a.bin", "b.bin"]], groups
+        assert stats["cached"] == 0 and len(entries) == 3, (stats, entries)
+
+        groups, stats, entries = scan(folder, cache_path)
+        assert groups == [["a.bin", "b.bin"]], groups
+        assert stats["cached"] == 3 and stats["bytes_read"] == 0, stats
+        print("✓ Unchanged files are not read again")
+
+        # Edited in place: same inode, so its entry is replaced
+        old_b = os.stat(paths["b.bin"])
+        write(paths["b.bin"], b"2")
+        touch_later(paths["b.bin"], old_b)
+        groups, stats, entries = scan(folder, cache_path)
+        assert groups == [["b.bin", "c.bin"]], groups
+        assert stats["cached"] == 2 and stats["pruned"] == 0, stats
+        entry = entries[(old_b.st_dev, old_b.st_ino)]
+        assert entry[3] == get_file_hash(paths["b.bin"]), "cached digest of b.bin not recomputed"
+        print("✓ File edited in place is rehashed")
+
+        # Saved as a new file and renamed over the old one, as editors do: a new inode
+        old_c = os.stat(paths["c.bin"])
+        write(paths["c.bin"] + ".new", b"1")
+        os.replace(paths["c.bin"] + ".new", paths["c.bin"])
+        new_c = os.stat(paths["c.bin"])
+        groups, stats, entries = scan(folder, cache_path)
+        assert groups == [["a.bin", "c.bin"]], groups
+        assert stats["cached"] == 2 and stats["pruned"] == 1, stats
+        assert (old_c.st_dev, old_c.st_ino) not in entries, "stale entry of the replaced c.bin kept"
+        assert entries[(new_c.st_dev, new_c.st_ino)][3] == get_file_hash(paths["a.bin"]), entries
+        cache = HashCache(cache_path, folder)
+        try:
+            assert len(cache.entries) == 3, cache.entries
+        finally:
+            cache.close()
+        print("✓ Replaced file is rehashed and its stale entry pruned")
+    return True
+
+def main():
+    """Run all tests."""
+    try:
+        test_hash_cache()
+    except AssertionError as e:
+        print(f"✗ Hash cache check failed: {e}")
+        return 1
+    print("✅ All tests passed!")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())